@@ -0,0 +1,7 @@
+# bench/__main__.py
+import sys
+
+from bench.harness import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+# bench/harness.py
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from scraper import registry
+from bench.standin import FaultPolicy, FixtureStore, StandInServer, local_path
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Reported metrics and whether a higher value is better
+METRICS = (
+    ("pages_per_sec", True),
+    ("parse_ms_per_page", False),
+    ("db_rows_per_sec", True),
+    ("peak_rss_mb", False),
+    ("wall_time_s", False),
+)
+
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def peak_rss_mb(children=False):
+    """
+    Peak resident set size in MiB of this process, or with children=True of
+    the largest finished child process. None if it cannot be measured.
+    """
+    try:
+        import resource
+    except ImportError:
+        if children:
+            return None
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    if not rss:
+        return None
+    return rss / 2 ** 20 if sys.platform == "darwin" else rss / 1024
+
+
+class Probe:
+    """Counters filled in by the instrumented database functions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.db_rows = 0
+        self.db_time = 0.0
+
+    def wrap_write(self, func, count_rows):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.db_time += elapsed
+                self.db_rows += count_rows(result)
+            return result
+        return wrapper
+
+
+def measure(module_name, target, cache=False):
+    """Run one scraper against the stand-in at target and return its metrics (runs in the child process)."""
+    from scraper import fetch, metrics, parsing
+    from scraper.database import Database, get_writer
+
+    fetch.CACHE_ENABLED = cache
+    fetch.URL_REWRITE = lambda url: target + local_path(url)
+    scrape = registry.get_scrape(module_name)
+
+    probe = Probe()
+    Database.apply_page = probe.wrap_write(Database.apply_page, lambda changes: sum(len(names) for names in changes))
+    Database.remove_pages = probe.wrap_write(Database.remove_pages, len)
+
+    start = time.perf_counter()
+    scrape()
+    get_writer().flush()
+    wall = time.perf_counter() - start
+    parsed = parsing.stats()
+    # Stop the parsing processes so their peak RSS can be read
+    parsing.shutdown()
+    peak, parser_peak = peak_rss_mb(), peak_rss_mb(children=True)
+
+    db = Database()
+    try:
+        rows = db.cursor.execute("SELECT COUNT(*) FROM doctors").fetchone()[0]
+    finally:
+        db.close()
+    site = metrics.get_metrics().snapshot()["sites"][module_name]
+    counters = site["counters"]
+    fetch_p95 = site["spans"]["fetch"]["p95"]
+
+    return {
+        "module": module_name,
+        "wall_time_s": round(wall, 3),
+        "requests": counters["requests"],
+        "pages": counters["pages"],
+        "errors": counters["errors"] + counters["server_errors"] + counters["short_circuited"],
+        "bytes": counters["bytes"],
+        "retries": counters["retries"],
+        "throttled": counters["throttled"],
+        "fetch_p95_ms": round(fetch_p95 * 1000) if fetch_p95 is not None else None,
+        "pages_per_sec": round(counters["pages"] / wall, 2) if wall else None,
+        "parse_calls": parsed["pages"],
+        "parse_ms_per_page": round(parsed["cpu_seconds"] * 1000 / parsed["pages"], 3) if parsed["pages"] else None,
+        "rows": rows,
+        "db_rows_per_sec": round(probe.db_rows / probe.db_time, 1) if probe.db_time else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "parser_peak_rss_mb": round(parser_peak, 1) if parser_peak is not None else None,
+    }
+
+
+def run_scraper(module_name, server, cache=False, verbose=False):
+    """Run one scraper in a fresh process and working directory; return its metrics or an error dict."""
+    workdir = tempfile.mkdtemp(prefix=f"bench-{module_name}-")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_ROOT, env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "bench", "--child", module_name, "--target", server.base_url]
+    if cache:
+        command.append("--cache")
+    before = dict(server.stats)
+    try:
+        completed = subprocess.run(
+            command, cwd=workdir, env=env, stdout=subprocess.PIPE,
+            stderr=None if verbose else subprocess.DEVNULL, text=True
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    served = {key: server.stats[key] - before[key] for key in server.stats}
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+            result["injected_faults"] = served["injected"]
+            result["missing_fixtures"] = served["missing"]
+            return result
+    return {"module": module_name, "error": f"benchmark process exited with code {completed.returncode}"}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def latest_result(results_dir, exclude=None):
+    if not os.path.isdir(results_dir):
+        return None
+    names = sorted(name for name in os.listdir(results_dir) if name.endswith(".json"))
+    paths = [os.path.join(results_dir, name) for name in names]
+    paths = [path for path in paths if path != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(current, baseline, threshold):
+    """Return (rows, regressions): per-metric changes against baseline and the ones worse than threshold."""
+    rows, regressions = [], []
+    for name, result in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or "error" in result or "error" in old:
+            continue
+        for metric, higher_is_better in METRICS:
+            new_value, old_value = result.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            worse = -change if higher_is_better else change
+            rows.append((name, metric, old_value, new_value, change))
+            if worse > threshold:
+                regressions.append((name, metric, old_value, new_value, change))
+    return rows, regressions
+
+
+def print_results(results):
+    header = f"{'scraper':<36} {'pages/s':>9} {'parse ms':>9} {'rows/s':>10} {'RSS MiB':>8} {'wall s':>8} {'rows':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        if "error" in result:
+            print(f"{name:<36} {result['error']}")
+            continue
+
+        def cell(key, width):
+            value = result.get(key)
+            return f"{value:>{width}}" if value is not None else f"{'-':>{width}}"
+
+        print(f"{name:<36} {cell('pages_per_sec', 9)} {cell('parse_ms_per_page', 9)} {cell('db_rows_per_sec', 10)} "
+              f"{cell('peak_rss_mb', 8)} {cell('wall_time_s', 8)} {cell('rows', 6)}")
+
+
+def select_scrapers(names):
+    if not names:
+        return dict(registry.SCRAPERS)
+    selected = {}
+    for requested in names:
+        try:
+            name = registry.resolve(requested)
+        except KeyError:
+            raise SystemExit(f"Unknown scraper: {requested}")
+        selected[name] = registry.SCRAPERS[name]
+    return selected
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Offline scraper benchmark against recorded fixtures.")
+    parser.add_argument("scrapers", nargs="*", help="scraper names or modules (default: all)")
+    parser.add_argument("--latency", type=float, default=20, help="mean injected latency per request in ms")
+    parser.add_argument("--jitter", type=float, default=0.5, help="latency jitter as a fraction of --latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 5xx")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with injected 429s")
+    parser.add_argument("--seed", type=int, default=0, help="seed for latency and error injection")
+    parser.add_argument("--cache", action="store_true", help="keep the HTTP response cache enabled")
+    parser.add_argument("--results-dir", default=RESULTS_DIR, help="where result files are saved")
+    parser.add_argument("--baseline", help="result file to compare with (default: the previous run)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not save this run")
+    parser.add_argument("--record", action="store_true", help="fetch pages without a fixture from the live site and save them")
+    parser.add_argument("--verbose", action="store_true", help="show scraper logs")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.child:
+        print(RESULT_PREFIX + json.dumps(measure(args.child, args.target, cache=args.cache)), flush=True)
+        return 0
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    selected = select_scrapers(args.scrapers)
+    if args.record and len(selected) != 1:
+        raise SystemExit("--record needs exactly one scraper")
+
+    faults = FaultPolicy(
+        latency=args.latency / 1000, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after, seed=args.seed
+    )
+    server = StandInServer(FixtureStore(), faults, record_as=next(iter(selected.values())) if args.record else None).start()
+    results = {}
+    try:
+        for name, module_name in selected.items():
+            print(f"Running {name} ...", flush=True)
+            results[name] = run_scraper(module_name, server, cache=args.cache, verbose=args.verbose)
+    finally:
+        server.stop()
+
+    run = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {key: getattr(args, key) for key in ("latency", "jitter", "error_rate", "throttle_rate", "retry_after", "seed", "cache")},
+        "results": results,
+    }
+    print()
+    print_results(results)
+
+    path = None
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        path = os.path.join(args.results_dir, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"\nSaved results to {path}")
+
+    baseline_path = args.baseline or latest_result(args.results_dir, exclude=path)
+    failed = any("error" in result for result in results.values())
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(run, baseline, args.threshold)
+        print(f"\nCompared with {baseline_path} ({baseline.get('revision') or 'unknown revision'}):")
+        for name, metric, old_value, new_value, change in regressions:
+            print(f"  REGRESSION {name}: {metric} {old_value} -> {new_value} ({change:+.0%})")
+        if not regressions:
+            print(f"  no regressions over {args.threshold:.0%} in {len(rows)} compared metrics")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
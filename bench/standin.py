@@ -0,0 +1,255 @@
+# bench/standin.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def local_path(url):
+    """Path under which the stand-in serves url: /<scheme>/<host>/<path>?<query>."""
+    parts = urlsplit(url)
+    path = f"/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    return f"{path}?{parts.query}" if parts.query else path
+
+
+def original_url(path):
+    """Inverse of local_path()."""
+    scheme, _, rest = path.lstrip("/").partition("/")
+    return f"{scheme}://{rest}"
+
+
+def _expand_ids(ranges):
+    for bounds in ranges:
+        start, end = bounds[0], bounds[1]
+        step = bounds[2] if len(bounds) > 2 else 1
+        yield from range(start, end + 1, step)
+
+
+class FixtureStore:
+    """
+    Recorded responses of every scraper, loaded from fixtures/<scraper>/manifest.json.
+
+    A manifest entry maps a URL (plus, for POST requests, the form fields that
+    select it) to an HTML file. An entry with "ids" is a template: its URL and
+    file contain "{id}", expanded for every ID in the listed [start, end(, step)]
+    ranges. The first matching entry wins.
+    """
+
+    def __init__(self, root=FIXTURES_DIR):
+        self.root = root
+        self._pages = {}
+        self._forms = {}
+        self._files = {}
+        self._lock = threading.Lock()
+        for scraper in sorted(os.listdir(root)):
+            if os.path.isfile(os.path.join(root, scraper, "manifest.json")):
+                self._load(scraper)
+
+    def _load(self, scraper):
+        with open(os.path.join(self.root, scraper, "manifest.json"), encoding="utf-8") as f:
+            entries = json.load(f)["entries"]
+        for entry in entries:
+            path = os.path.join(self.root, scraper, entry["file"])
+            status = entry.get("status", 200)
+            if "ids" in entry:
+                for doctor_id in _expand_ids(entry["ids"]):
+                    key = ("GET", entry["url"].replace("{id}", str(doctor_id)))
+                    self._pages.setdefault(key, (status, path, str(doctor_id)))
+            elif entry.get("method", "GET") == "POST":
+                self._forms.setdefault(entry["url"], []).append((entry.get("form", {}), (status, path, None)))
+            else:
+                self._pages.setdefault(("GET", entry["url"]), (status, path, None))
+
+    def _read(self, path, doctor_id):
+        body = self._files.get(path)
+        if body is None:
+            with open(path, "rb") as f:
+                body = f.read()
+            self._files[path] = body
+        return body.replace(b"{id}", doctor_id.encode()) if doctor_id else body
+
+    def lookup(self, method, url, form=None):
+        """Return (status, body) for a request, or None if nothing was recorded for it."""
+        if method == "POST":
+            for fields, found in self._forms.get(url, []):
+                if all(form.get(key) == value for key, value in fields.items()):
+                    break
+            else:
+                return None
+        else:
+            found = self._pages.get((method, url))
+            if found is None:
+                return None
+        status, path, doctor_id = found
+        with self._lock:
+            return status, self._read(path, doctor_id)
+
+    def record(self, scraper, method, url, form, status, body):
+        """Save a live response as a new fixture of scraper and serve it from now on."""
+        directory = os.path.join(self.root, scraper)
+        os.makedirs(directory, exist_ok=True)
+        manifest_path = os.path.join(directory, "manifest.json")
+        with self._lock:
+            manifest = {"entries": []}
+            if os.path.exists(manifest_path):
+                with open(manifest_path, encoding="utf-8") as f:
+                    manifest = json.load(f)
+            name = f"recorded-{len(manifest['entries']) + 1}.html"
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(body)
+            entry = {"url": url, "file": name}
+            if status != 200:
+                entry["status"] = status
+            if method == "POST":
+                entry.update(method="POST", form=form)
+            manifest["entries"].append(entry)
+            with open(manifest_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2)
+                f.write("\n")
+        found = (status, os.path.join(directory, name), None)
+        if method == "POST":
+            self._forms.setdefault(url, []).append((form, found))
+        else:
+            self._pages[(method, url)] = found
+
+
+class FaultPolicy:
+    """Latency and error injection applied to every request the stand-in serves."""
+
+    def __init__(self, latency=0.02, jitter=0.5, error_rate=0.0, throttle_rate=0.0, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Return (delay seconds, injected status or None) for the next request."""
+        with self._lock:
+            delay = self.latency * (1 + self.jitter * (2 * self._random.random() - 1))
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, (500, 502, 503)[int(roll * 1000) % 3]
+        return delay, None
+
+
+class StandInServer:
+    """
+    Local HTTP server answering scraper requests from a FixtureStore.
+
+    Requests arrive with the original URL encoded in the path (see local_path);
+    point scraper.fetch.URL_REWRITE at rewrite() to send scrapers here. With
+    record_as set, requests that have no fixture are forwarded to the live site
+    and the answer is stored as a fixture of that scraper.
+    """
+
+    def __init__(self, store=None, faults=None, host="127.0.0.1", port=0, record_as=None):
+        self.store = store or FixtureStore()
+        self.faults = faults or FaultPolicy()
+        self.record_as = record_as
+        self.stats = {"requests": 0, "served": 0, "missing": 0, "injected": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rewrite(self, url):
+        return self.base_url + local_path(url)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="StandInServer", daemon=True)
+        self._thread.start()
+        logger.info(f"Stand-in server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def _fetch_live(self, method, url, body, headers):
+        request = urllib.request.Request(url, data=body if method == "POST" else None, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _respond(self, status, body, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                form = dict(parse_qsl(body.decode("utf-8", errors="replace"))) if method == "POST" else None
+                url = original_url(self.path)
+                server._count(requests=1)
+
+                delay, injected = server.faults.draw()
+                if delay > 0:
+                    time.sleep(delay)
+                if injected is not None:
+                    server._count(injected=1)
+                    headers = {"Retry-After": str(server.faults.retry_after)} if injected == 429 else None
+                    self._respond(injected, b"<html><body>Injected error</body></html>", headers)
+                    return
+
+                found = server.store.lookup(method, url, form)
+                if found is None and server.record_as:
+                    user_agent = self.headers.get("User-Agent", "Mozilla/5.0")
+                    status, content = server._fetch_live(method, url, body, {"User-Agent": user_agent})
+                    server.store.record(server.record_as, method, url, form, status, content)
+                    found = (status, content)
+                if found is None:
+                    server._count(missing=1)
+                    self._respond(404, b"<html><body>Not Found</body></html>")
+                    return
+                status, content = found
+                server._count(served=1, bytes=len(content))
+                self._respond(status, content)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        return Handler
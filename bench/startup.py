@@ -0,0 +1,86 @@
+# bench/startup.py
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench.harness import REPO_ROOT
+from startup import TIMING_ENV
+
+APPS = {
+    "main": "main.py",
+    "display": "display.py",
+}
+
+
+def measure(app, runs, timeout=60):
+    """Start app runs times, each in a fresh process, and return its startup timings in ms."""
+    workdir = tempfile.mkdtemp(prefix=f"startup-{app}-")
+    timing_file = os.path.join(workdir, "timings.jsonl")
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env[TIMING_ENV] = timing_file
+    try:
+        # display.py opens scraper_data.db in the working directory
+        subprocess.run(
+            [sys.executable, "-c", "from scraper.database import Database; Database().close()"],
+            cwd=workdir, env=dict(env, PYTHONPATH=REPO_ROOT), check=True
+        )
+        cold, imports, paint = [], [], []
+        for _ in range(runs):
+            launched = time.time()
+            subprocess.run(
+                [sys.executable, os.path.join(REPO_ROOT, APPS[app])], cwd=workdir, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout
+            )
+            with open(timing_file, encoding="utf-8") as f:
+                timings = json.loads(f.readlines()[-1])
+            cold.append((timings["painted"] - launched) * 1000)
+            imports.append((timings["started"] - launched) * 1000)
+            paint.append(timings["startup_ms"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "runs": runs,
+        "cold_start_ms": round(statistics.median(cold), 1),
+        "cold_start_max_ms": round(max(cold), 1),
+        "interpreter_ms": round(statistics.median(imports), 1),
+        "start_to_paint_ms": round(statistics.median(paint), 1),
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m bench.startup", description="Cold start to first paint of the GUI apps.")
+    parser.add_argument("apps", nargs="*", help=f"apps to measure: {', '.join(APPS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="starts per app; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="median cold start above which the run fails")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    unknown = [app for app in args.apps if app not in APPS]
+    if unknown:
+        raise SystemExit(f"Unknown app: {', '.join(unknown)}")
+    over_budget = False
+    for app in args.apps or list(APPS):
+        try:
+            result = measure(app, args.runs)
+        except (OSError, subprocess.SubprocessError, IndexError, ValueError) as e:
+            print(f"{app:<8} failed: {str(e)}")
+            over_budget = True
+            continue
+        flag = "" if result["cold_start_ms"] <= args.budget_ms else f"  OVER BUDGET ({args.budget_ms:.0f} ms)"
+        over_budget = over_budget or bool(flag)
+        print(f"{app:<8} cold start {result['cold_start_ms']:>7.1f} ms (max {result['cold_start_max_ms']:.1f}), "
+              f"interpreter {result['interpreter_ms']:.1f} ms, imports to paint {result['start_to_paint_ms']:.1f} ms{flag}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
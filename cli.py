@@ -0,0 +1,265 @@
+import argparse
+import json
+import logging
+import sys
+import threading
+import time
+
+from scraper import logs, metrics, registry
+
+# Exit codes
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_PARTIAL = 3
+EXIT_INTERRUPTED = 130
+# Seconds an interrupted run waits for its scrapers to stop and checkpoint
+STOP_GRACE = 30
+
+logger = logging.getLogger("cli")
+
+
+class ErrorCounter(logging.Handler):
+    """Counts the ERROR records of each scraper while it runs, wherever they are logged from."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        # On the root logger it runs in the thread that logged, where the current scraper is still known
+        module = logs.site_of(record)
+        if module is not None:
+            with self._lock:
+                self.counts[module] = self.counts.get(module, 0) + 1
+
+    def count(self, module):
+        with self._lock:
+            return self.counts.get(module, 0)
+
+
+class Reporter:
+    """Writes one JSON object per line to stdout."""
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def run_scraper(name, reporter, errors):
+    """
+    Run one scraper and return its result dict. Its status is "failed" when the
+    run never finished or no page it tried could be loaded, "partial" when it
+    was stopped early or some pages failed or errors were logged, else "ok"
+    (including a resumed run with nothing left to fetch).
+    """
+    module = registry.module_name(name)
+    reporter.emit("start", scraper=name, module=module)
+    start = time.perf_counter()
+    result = {"scraper": name, "module": module}
+    try:
+        from scraper.incremental import last_run
+        scrape = registry.get_scrape(name)
+        scrape()
+        run = last_run(module)
+        if run is not None:
+            result.update(
+                pages=run.fetched, unchanged_pages=run.skipped, failed_pages=run.failures,
+                added=len(run.changes.added), updated=len(run.changes.updated), removed=len(run.changes.removed)
+            )
+        result["errors"] = errors.count(module)
+        if run is None or (run.failures and not run.fetched):
+            result["status"] = "failed"
+        elif not run.complete or run.failures or result["errors"]:
+            result["status"] = "partial"
+        else:
+            result["status"] = "ok"
+    except Exception as e:
+        logger.exception(f"Scraper {name} crashed")
+        result.update(status="failed", errors=errors.count(module) + 1, error=str(e))
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    result.update(site_metrics(module))
+    reporter.emit("finish", **result)
+    return result
+
+
+def site_metrics(module):
+    """Headline performance numbers of one scraper from the process metrics."""
+    site = metrics.get_metrics().snapshot()["sites"].get(module)
+    if site is None:
+        return {}
+    counters, spans = site["counters"], site["spans"]
+    fetch_p95, parse = spans["fetch"]["p95"], spans["parse"]
+    return {
+        "requests": counters["requests"],
+        "bytes": counters["bytes"],
+        "retries": counters["retries"],
+        "throttled": counters["throttled"],
+        "fetch_p95_ms": round(fetch_p95 * 1000) if fetch_p95 is not None else None,
+        "parse_ms_per_page": round(parse["sum"] * 1000 / parse["count"], 3) if parse["count"] else None,
+        "rows_per_sec": site["rows_per_sec"],
+    }
+
+
+def total_rows():
+    """(stored doctors, distinct doctors once cross-source duplicates are merged)."""
+    from scraper import dedup
+    from scraper.database import Database
+    db = Database()
+    try:
+        rows = db.cursor.execute("SELECT COUNT(*) FROM doctors").fetchone()[0]
+        return rows, dedup.duplicate_stats(db.conn)[1]
+    finally:
+        db.close()
+
+
+def write_metrics(path):
+    if not path:
+        return
+    try:
+        metrics.write(path)
+    except OSError as e:
+        logger.error(f"Could not write metrics to {path}: {str(e)}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Run the hospital scrapers without the GUI. Progress and a summary are printed as JSON lines on stdout.",
+    )
+    parser.add_argument("sites", nargs="*", help="scrapers to run, by name or module (see --list)")
+    parser.add_argument("--all", action="store_true", help="run every scraper")
+    parser.add_argument("--list", action="store_true", help="list the available scrapers and exit")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="global budget of HTTP requests in flight across all scrapers")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="average requests per second sent to each site (0: no limit)")
+    parser.add_argument("--jobs", type=int, default=4, help="number of scrapers run at the same time")
+    parser.add_argument("--images", action="store_true",
+                        help="also download the doctors' images into the local image store")
+    parser.add_argument("--log-level", default="WARNING", type=str.upper,
+                        choices=("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"),
+                        help="level of the log written to stderr")
+    parser.add_argument("--metrics", metavar="FILE", default=None,
+                        help="write per-site timings and counters to FILE (Prometheus text, or JSON for *.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    reporter = Reporter()
+
+    if args.list:
+        for name, module in registry.SCRAPERS.items():
+            reporter.emit("scraper", scraper=name, module=module)
+        return EXIT_OK
+
+    if args.all:
+        selected = list(registry.SCRAPERS)
+    else:
+        selected = []
+        for site in args.sites:
+            try:
+                selected.append(registry.resolve(site))
+            except KeyError:
+                reporter.emit("error", message=f"Unknown scraper: {site}")
+                return EXIT_USAGE
+    if not selected:
+        reporter.emit("error", message="No scraper selected; name one or more sites, or use --all")
+        return EXIT_USAGE
+    if args.jobs < 1 or (args.concurrency is not None and args.concurrency < 1):
+        reporter.emit("error", message="--jobs and --concurrency must be at least 1")
+        return EXIT_USAGE
+    if args.rate is not None and args.rate < 0:
+        reporter.emit("error", message="--rate must not be negative")
+        return EXIT_USAGE
+
+    # Log records go to stderr and this run's log files from a background
+    # thread, leaving stdout to the JSON output. Errors are counted as they
+    # are logged, so each scraper's result includes them
+    logs.start(args.log_level, stream=sys.stderr)
+    errors = ErrorCounter()
+    logging.getLogger().addHandler(errors)
+
+    from scraper import fetch
+    if args.concurrency is not None:
+        fetch.MAX_IN_FLIGHT = args.concurrency
+        fetch.PER_HOST_LIMIT = min(fetch.PER_HOST_LIMIT, args.concurrency)
+    if args.rate is not None:
+        fetch.HOST_RATE = args.rate or None
+    if args.images:
+        from scraper import images
+        images.STORE_IMAGES = True
+
+    reporter.emit("run", scrapers=selected, jobs=args.jobs, concurrency=args.concurrency, rate=fetch.HOST_RATE)
+    start = time.perf_counter()
+    results = []
+    results_lock = threading.Lock()
+    slots = threading.Semaphore(args.jobs)
+
+    def job(name):
+        try:
+            result = run_scraper(name, reporter, errors)
+            with results_lock:
+                results.append(result)
+        finally:
+            slots.release()
+
+    threads = []
+    try:
+        for name in selected:
+            slots.acquire()
+            thread = threading.Thread(target=job, args=(name,), name=f"cli-{registry.module_name(name)}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # Let the scrapers stop at their next page and keep their frontier,
+        # so the next run resumes them; a second Ctrl-C gives up waiting
+        from scraper import frontier
+        frontier.request_stop()
+        deadline = time.monotonic() + STOP_GRACE
+        try:
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+        except KeyboardInterrupt:
+            pass
+        reporter.emit("interrupted", finished=len(results), seconds=round(time.perf_counter() - start, 3))
+        write_metrics(args.metrics)
+        return EXIT_INTERRUPTED
+
+    statuses = [result["status"] for result in results]
+    summary = {
+        "scrapers": len(results),
+        "ok": statuses.count("ok"),
+        "partial": statuses.count("partial"),
+        "failed": statuses.count("failed"),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    for key in ("pages", "unchanged_pages", "failed_pages", "added", "updated", "removed", "errors"):
+        summary[key] = sum(result.get(key, 0) for result in results)
+    try:
+        summary["rows_total"], summary["distinct_doctors"] = total_rows()
+    except Exception as e:
+        logger.error(f"Could not count stored doctors: {str(e)}")
+    reporter.emit("summary", **summary)
+    write_metrics(args.metrics)
+
+    if summary["failed"]:
+        return EXIT_FAILED
+    if summary["partial"]:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,394 @@
+import startup
+import os
 import sys
+import queue
+import hashlib
 import sqlite3
-import requests
+import itertools
+import threading
 import webbrowser
-import pandas as pd
+from array import array
+from collections import OrderedDict
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                            QTableWidget, QTableWidgetItem, QLineEdit, QPushButton,
+                            QTableView, QLineEdit, QPushButton, QProgressBar, QFileDialog, QComboBox,
                             QLabel, QHeaderView, QSplitter, QScrollArea, QMessageBox)
-from PyQt5.QtGui import QPixmap, QFont, QIcon
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QPixmap, QFont, QIcon, QImage
+from PyQt5.QtCore import Qt, QTimer, QThread, QObject, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from scraper import facets, images, search
+from scraper.export import ExportCancelled, export_doctors
+
+# Rows read from SQLite at a time, and how many such pages are kept in memory
+PAGE_SIZE = 200
+CACHED_PAGES = 10
+# Pause in typing, in milliseconds, after which the search runs
+SEARCH_DEBOUNCE_MS = 150
+DB_PATH = "scraper_data.db"
+# Facet filters shown above the table, and their labels
+FACET_LABELS = {"source": "المصدر", "specialty": "التخصص", "city": "المدينة"}
+# Doctor photos: scaled size, pixmaps kept in memory, and the thumbnail cache on disk
+IMAGE_SIZE = 300
+IMAGE_MEMORY_ITEMS = 200
+IMAGE_CACHE_DIR = "image_cache"
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_WORKERS = 4
+# Seconds a photo download may spend retrying: the user is waiting for it
+IMAGE_RETRY_BUDGET = 15
+# Rows above and below the selection whose photos are loaded ahead of time
+PREFETCH_ROWS = 5
+DEFAULT_IMAGE_URL = "https://c8.alamy.com/comp/2FJR92X/flat-male-doctor-avatar-in-medical-face-protection-mask-and-stethoscope-healthcare-vector-illustration-people-cartoon-avatar-profile-character-icon-2FJR92X.jpg"
+IMAGE_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+
+EXPORT_FILTERS = "Excel (*.xlsx);;CSV (*.csv);;Parquet (*.parquet)"
+
+class ExportWorker(QThread):
+    """Streams doctors to a file on its own connection; ids limits the export to those rows, in order."""
+    progress = pyqtSignal(int, int)
+    finished_export = pyqtSignal(str, int, bool, str)
+
+    def __init__(self, db_path, path, ids=None, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.path = path
+        self.ids = ids
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            written = export_doctors(
+                conn, self.path, ids=self.ids,
+                progress=self.progress.emit, cancelled=lambda: self.cancel_requested
+            )
+            self.finished_export.emit(self.path, written, False, "")
+        except ExportCancelled:
+            self.finished_export.emit(self.path, 0, True, "")
+        except Exception as e:
+            self.finished_export.emit(self.path, 0, False, str(e))
+        finally:
+            conn.close()
+
+class ImageLoader(QObject):
+    """
+    Loads doctor photos on background threads.
+
+    Photos already in the scraper's image store are read from it. Others
+    are downloaded; scaled pixmaps are kept in an LRU of IMAGE_MEMORY_ITEMS,
+    and thumbnails are saved under IMAGE_CACHE_DIR so later sessions skip
+    the download (the default avatar is fetched once). Requests for the selected row are
+    served before prefetches. loaded / failed are emitted on the GUI thread.
+    """
+    loaded = pyqtSignal(str, QPixmap)
+    failed = pyqtSignal(str)
+    _decoded = pyqtSignal(str, object)
+
+    PRIORITY_NOW = 0
+    PRIORITY_PREFETCH = 1
+
+    def __init__(self, parent=None, cache_dir=IMAGE_CACHE_DIR):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.pixmaps = OrderedDict()
+        self.failures = set()
+        self.pending = {}
+        self.requests = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._started = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._decoded.connect(self._finish)
+
+    def cached(self, url):
+        """Pixmap for url if it is in memory, else None."""
+        pixmap = self.pixmaps.get(url)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(url)
+        return pixmap
+
+    def load(self, url, prefetch=False):
+        """Queue url for loading unless it is in memory, already queued, or known to fail."""
+        priority = self.PRIORITY_PREFETCH if prefetch else self.PRIORITY_NOW
+        if url in self.pixmaps or url in self.failures or self.pending.get(url, priority + 1) <= priority:
+            return
+        self.pending[url] = priority
+        if not self._threads:
+            self._start()
+        self.requests.put((priority, next(self._order), url))
+
+    def stop(self):
+        for _ in self._threads:
+            self.requests.put((len(self._threads), next(self._order), None))
+
+    def _start(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for index in range(IMAGE_WORKERS):
+            thread = threading.Thread(target=self._work, args=(index == 0,), name=f"ImageLoader-{index + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self, prune):
+        if prune:
+            self._prune()
+        # Each thread looks up the image store on its own connection
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            while True:
+                _, _, url = self.requests.get()
+                if url is None:
+                    return
+                with self._lock:
+                    # A prefetch moved up to the front is queued twice; load it once
+                    if url in self._started:
+                        continue
+                    self._started.add(url)
+                self._decoded.emit(url, self._read(url, conn))
+        finally:
+            conn.close()
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".png")
+
+    def _read(self, url, conn):
+        """Scaled QImage for url from the image store, the thumbnail cache or the network; None if it cannot be loaded."""
+        stored = images.stored_file(conn, url)
+        if stored is not None:
+            image = QImage(stored)
+            if not image.isNull():
+                return image.scaled(IMAGE_SIZE, IMAGE_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        path = self._path(url)
+        if os.path.exists(path):
+            image = QImage(path)
+            if not image.isNull():
+                os.utime(path)
+                return image
+        try:
+            from scraper import fetch
+            response = fetch.get(url, headers=IMAGE_HEADERS, timeout=10, cache=False, budget=IMAGE_RETRY_BUDGET)
+        except Exception:
+            return None
+        if response.status_code != 200:
+            return None
+        image = QImage.fromData(response.content)
+        if image.isNull():
+            return None
+        image = image.scaled(IMAGE_SIZE, IMAGE_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        image.save(path, "PNG")
+        return image
+
+    def _prune(self):
+        """Delete the least recently used thumbnails beyond IMAGE_CACHE_MAX_BYTES."""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.is_file()]
+            entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+            total = 0
+            for entry in entries:
+                total += entry.stat().st_size
+                if total > IMAGE_CACHE_MAX_BYTES:
+                    os.remove(entry.path)
+        except OSError:
+            pass
+
+    def _finish(self, url, image):
+        self.pending.pop(url, None)
+        with self._lock:
+            self._started.discard(url)
+        if image is None:
+            self.failures.add(url)
+            self.failed.emit(url)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[url] = pixmap
+        if len(self.pixmaps) > IMAGE_MEMORY_ITEMS:
+            self.pixmaps.popitem(last=False)
+        self.loaded.emit(url, pixmap)
+
+def find_matches(conn, text, filters):
+    """
+    Ids of the doctors matching text (best match first) and every facet
+    filter {facet: value id}, as an array; None when neither is active.
+    """
+    filters = {facet: value for facet, value in filters.items() if value is not None}
+    if search.match_query(text) is None:
+        return facets.filter_ids(conn, filters) if filters else None
+    matches = search.search(conn, text)
+    if filters:
+        allowed = set(facets.filter_ids(conn, filters))
+        matches = array('q', (doctor_id for doctor_id in matches if doctor_id in allowed))
+    return matches
+
+class SearchWorker(QThread):
+    """
+    Runs searches against the full-text index and the facet tables on its own
+    connection, so a broad query never blocks the GUI. Only the newest pending
+    request is run.
+    """
+    results_ready = pyqtSignal(int, str, object, object)
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.requests = queue.Queue()
+
+    def request(self, generation, text, filters):
+        self.requests.put((generation, text, dict(filters)))
+
+    def stop(self):
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            while True:
+                request = self.requests.get()
+                while request is not None:
+                    try:
+                        newer = self.requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    request = newer
+                if request is None:
+                    return
+                generation, text, filters = request
+                try:
+                    matches = find_matches(conn, text, filters)
+                except sqlite3.Error:
+                    matches = array('q')
+                self.results_ready.emit(generation, text, filters, matches)
+        finally:
+            conn.close()
+
+class DoctorTableModel(QAbstractTableModel):
+    """
+    Table model over the doctors table that reads rows from SQLite only when
+    the view asks for them, one page at a time. Only the row count and the
+    last CACHED_PAGES pages are held in memory; while a search or a facet
+    filter is active, also the (ranked) ids of the matching rows.
+    """
+
+    def __init__(self, conn, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        cursor = self.conn.execute("SELECT * FROM doctors LIMIT 0")
+        self.columns = [description[0] for description in cursor.description]
+        self.search_text = ""
+        self.filters = {}
+        self.matches = None
+        self.pages = OrderedDict()
+        # Last rowid of each page read so far: the next page starts after it
+        self.page_ends = {}
+        self.count = self._count()
+
+    def _count(self):
+        if self.matches is not None:
+            return len(self.matches)
+        return self.conn.execute("SELECT COUNT(*) FROM doctors").fetchone()[0]
+
+    def _page(self, number):
+        page = self.pages.get(number)
+        if page is not None:
+            self.pages.move_to_end(number)
+            return page
+        if self.matches is None:
+            start = self._page_start(number)
+            rows = [] if start is None else self.conn.execute(
+                "SELECT rowid, * FROM doctors WHERE rowid > ? ORDER BY rowid LIMIT ?", (start, PAGE_SIZE)
+            ).fetchall()
+            if rows:
+                self.page_ends[number] = rows[-1][0]
+            page = [row[1:] for row in rows]
+        else:
+            ids = self.matches[number * PAGE_SIZE:(number + 1) * PAGE_SIZE].tolist()
+            rows = self.conn.execute(
+                f"SELECT rowid, * FROM doctors WHERE rowid IN ({', '.join('?' * len(ids))})", ids
+            ).fetchall()
+            by_id = {row[0]: row[1:] for row in rows}
+            page = [by_id.get(doctor_id, ()) for doctor_id in ids]
+        self.pages[number] = page
+        if len(self.pages) > CACHED_PAGES:
+            self.pages.popitem(last=False)
+        return page
+
+    def _page_start(self, number):
+        """Rowid after which page number starts, or None past the last row."""
+        if number == 0:
+            return 0
+        end = self.page_ends.get(number - 1)
+        if end is not None:
+            return end
+        # A jump (e.g. dragging the scroll bar): count rowids on from the nearest page read before it
+        known = max((page for page in self.page_ends if page < number), default=-1)
+        after = self.page_ends.get(known, 0)
+        skip = (number - known - 1) * PAGE_SIZE - 1
+        row = self.conn.execute(
+            "SELECT rowid FROM doctors WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?", (after, skip)
+        ).fetchone()
+        if row is None:
+            return None
+        self.page_ends[number - 1] = row[0]
+        return row[0]
+
+    def row_values(self, row):
+        """Values of one row, in column order (empty tuple if it no longer exists)."""
+        page = self._page(row // PAGE_SIZE)
+        offset = row % PAGE_SIZE
+        return page[offset] if offset < len(page) else ()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            values = self.row_values(index.row())
+            if index.column() >= len(values):
+                return ""
+            cell_data = values[index.column()]
+            return str(cell_data) if cell_data else ""
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section]
+        return super().headerData(section, orientation, role)
+
+    def set_filter(self, text, filters=None):
+        """
+        Show the doctors matching text in the search index, best match first,
+        and the facet filters {facet: value id}; with neither, show all rows.
+        """
+        self.search_text = text
+        self.filters = dict(filters or {})
+        self.refresh()
+
+    def show_matches(self, text, filters, matches):
+        """Show search results computed elsewhere (see SearchWorker)."""
+        self.beginResetModel()
+        self.pages.clear()
+        self.page_ends.clear()
+        self.search_text = text
+        self.filters = dict(filters)
+        self.matches = matches
+        self.count = self._count()
+        self.endResetModel()
+
+    def refresh(self):
+        """Drop cached rows and re-run the search, e.g. after the table changed."""
+        self.beginResetModel()
+        self.pages.clear()
+        self.page_ends.clear()
+        self.matches = find_matches(self.conn, self.search_text, self.filters)
+        self.count = self._count()
+        self.endResetModel()
 
 class DatabaseViewer(QMainWindow):
     def __init__(self):
@@ -15,8 +396,21 @@ class DatabaseViewer(QMainWindow):
         self.setWindowTitle("عارض الأطباء - تطبيق استخراج البيانات | By A.S & Abdallah")
         self.setGeometry(100, 100, 1200, 700)
         
-        self.conn = sqlite3.connect("scraper_data.db")
+        self.conn = sqlite3.connect(DB_PATH)
         self.cursor = self.conn.cursor()
+        # Databases written before the search index existed get it on first open
+        search.create_index(self.cursor)
+        facets.create_schema(self.cursor)
+        self.conn.commit()
+        self.facet_filters = dict.fromkeys(FACET_LABELS)
+        self.search_generation = 0
+        self.search_worker = SearchWorker(DB_PATH, self)
+        self.search_worker.results_ready.connect(self.show_results)
+        self.search_worker.start()
+        self.current_image_url = None
+        self.image_loader = ImageLoader(self)
+        self.image_loader.loaded.connect(self.show_image)
+        self.image_loader.failed.connect(self.image_failed)
         
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -25,28 +419,47 @@ class DatabaseViewer(QMainWindow):
         self.search_layout = QHBoxLayout()
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("البحث في جميع الحقول...")
-        self.search_input.textChanged.connect(self.filter_data)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_data)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
         
         self.clear_button = QPushButton("مسح")
         self.clear_button.clicked.connect(self.clear_search)
         
-        self.export_button = QPushButton("تصدير البيانات إلى XLSX")
-        self.export_button.clicked.connect(self.export_to_excel)
+        self.export_button = QPushButton("تصدير البيانات")
+        self.export_button.clicked.connect(self.export_data)
+        self.export_worker = None
         
         self.search_layout.addWidget(self.search_input)
         self.search_layout.addWidget(self.clear_button)
         self.search_layout.addWidget(self.export_button)
         self.main_layout.addLayout(self.search_layout)
         
+        self.facet_layout = QHBoxLayout()
+        self.facet_boxes = {}
+        for facet in FACET_LABELS:
+            box = QComboBox()
+            box.currentIndexChanged.connect(lambda _, facet=facet: self.facet_changed(facet))
+            self.facet_boxes[facet] = box
+            self.facet_layout.addWidget(box)
+        self.main_layout.addLayout(self.facet_layout)
+        
+        self.export_progress = QProgressBar()
+        self.export_progress.setFormat("التصدير: %p%")
+        self.export_progress.hide()
+        self.statusBar().addPermanentWidget(self.export_progress)
+        
         self.splitter = QSplitter(Qt.Horizontal)
         self.main_layout.addWidget(self.splitter)
         
-        self.table_widget = QTableWidget()
-        self.table_widget.setAlternatingRowColors(False)
-        self.table_widget.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table_widget.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table_widget.itemSelectionChanged.connect(self.display_details)
-        self.splitter.addWidget(self.table_widget)
+        self.table_view = QTableView()
+        self.table_view.setAlternatingRowColors(False)
+        self.table_view.setSelectionBehavior(QTableView.SelectRows)
+        self.table_view.setEditTriggers(QTableView.NoEditTriggers)
+        self.splitter.addWidget(self.table_view)
+        self.model = None
         
         self.right_widget = QWidget()
         self.right_layout = QVBoxLayout(self.right_widget)
@@ -67,6 +480,7 @@ class DatabaseViewer(QMainWindow):
         self.splitter.setSizes([800, 400])
         
         self.load_data()
+        self.update_facets()
         
         # Apply the cyberpunk stylesheet from main.py
         self.setStyleSheet("""
@@ -88,7 +502,7 @@ class DatabaseViewer(QMainWindow):
                 font-size: 14px;
                 border-radius: 12px;
             }
-            QTableWidget {
+            QTableView {
                 background-color: rgba(255, 255, 255, 0.05);
                 color: #e0e7ff;
                 border: 2px solid rgba(0, 255, 255, 0.5);
@@ -98,16 +512,16 @@ class DatabaseViewer(QMainWindow):
                 animation: glow 3s infinite;
                 gridline-color: rgba(0, 255, 255, 0.2);
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 12px;
                 border-bottom: 1px solid rgba(0, 255, 255, 0.2);
                 color: #e0e7ff;
             }
-            QTableWidget::item:hover {
+            QTableView::item:hover {
                 background-color: rgba(0, 255, 255, 0.1);
                 color: #00FFFF;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
                     stop:0 #00FFFF, stop:1 #FF00FF);
                 color: #ffffff;
@@ -176,6 +590,13 @@ class DatabaseViewer(QMainWindow):
                 padding: 12px;
                 font-size: 14px;
             }
+            QComboBox {
+                background-color: rgba(255, 255, 255, 0.05);
+                color: #e0e7ff;
+                border: 2px solid rgba(0, 255, 255, 0.4);
+                border-radius: 8px;
+                padding: 4px 12px;
+            }
             QScrollArea {
                 background-color: rgba(255, 255, 255, 0.05);
                 border: 2px solid rgba(0, 255, 255, 0.4);
@@ -227,50 +648,84 @@ class DatabaseViewer(QMainWindow):
         """)
 
     def load_data(self):
-        self.cursor.execute("SELECT * FROM doctors")
-        self.all_data = self.cursor.fetchall()
-        self.columns = [description[0] for description in self.cursor.description]
-        
-        self.table_widget.setRowCount(len(self.all_data))
-        self.table_widget.setColumnCount(len(self.columns))
-        self.table_widget.setHorizontalHeaderLabels(self.columns)
-        
-        for row_idx, row_data in enumerate(self.all_data):
-            for col_idx, cell_data in enumerate(row_data):
-                item = QTableWidgetItem(str(cell_data) if cell_data else "")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table_widget.setItem(row_idx, col_idx, item)
-        
-        self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        if self.model is None:
+            self.model = DoctorTableModel(self.conn, self)
+            self.columns = self.model.columns
+            self.table_view.setModel(self.model)
+            self.table_view.selectionModel().selectionChanged.connect(lambda *_: self.display_details())
+            self.table_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        else:
+            self.model.refresh()
 
     def filter_data(self):
-        search_text = self.search_input.text().lower()
-        self.table_widget.setRowCount(0)
-        
-        filtered_data = [
-            row for row in self.all_data
-            if any(search_text in str(cell).lower() for cell in row)
-        ]
-        
-        self.table_widget.setRowCount(len(filtered_data))
-        for row_idx, row_data in enumerate(filtered_data):
-            for col_idx, cell_data in enumerate(row_data):
-                item = QTableWidgetItem(str(cell_data) if cell_data else "")
-                item.setTextAlignment(Qt.AlignCenter)
-                self.table_widget.setItem(row_idx, col_idx, item)
+        self.search_generation += 1
+        text = self.search_input.text()
+        if search.match_query(text) is None and not any(value is not None for value in self.facet_filters.values()):
+            self.model.set_filter("")
+        else:
+            self.search_worker.request(self.search_generation, text, self.facet_filters)
+
+    def show_results(self, generation, text, filters, matches):
+        # Drop results of a search the user has typed past
+        if generation == self.search_generation:
+            self.model.show_matches(text, filters, matches)
+
+    def update_facets(self):
+        """Refill the facet boxes with counts narrowed by the other selected facets."""
+        for facet, box in self.facet_boxes.items():
+            box.blockSignals(True)
+            box.clear()
+            box.addItem(f"{FACET_LABELS[facet]}: الكل", None)
+            for value_id, name, doctors in facets.facet_counts(self.conn, facet, self.facet_filters):
+                box.addItem(f"{name} ({doctors})", value_id)
+            index = box.findData(self.facet_filters[facet])
+            box.setCurrentIndex(max(index, 0))
+            box.blockSignals(False)
+
+    def facet_changed(self, facet):
+        self.facet_filters[facet] = self.facet_boxes[facet].currentData()
+        self.update_facets()
+        self.filter_data()
 
     def clear_search(self):
         self.search_input.clear()
-        self.load_data()
+        self.search_timer.stop()
+        self.search_generation += 1
+        self.facet_filters = dict.fromkeys(FACET_LABELS)
+        self.update_facets()
+        self.model.set_filter("")
 
-    def export_to_excel(self):
-        try:
-            df = pd.read_sql_query("SELECT * FROM doctors", self.conn)
-            output_file = "doctors_data.xlsx"
-            df.to_excel(output_file, index=False, engine='openpyxl')
-            self.show_notification(f"تم تصدير البيانات بنجاح إلى {output_file}!")
-        except Exception as e:
-            self.show_notification(f"خطأ في تصدير البيانات: {str(e)}")
+    def export_data(self):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            return
+        output_file, _ = QFileDialog.getSaveFileName(self, "تصدير البيانات", "doctors_data.xlsx", EXPORT_FILTERS)
+        if not output_file:
+            return
+        # With a search or facet filter active, export the rows it shows, in the same order
+        ids = array('q', self.model.matches) if self.model.matches is not None else None
+        self.export_worker = ExportWorker(DB_PATH, output_file, ids, self)
+        self.export_worker.progress.connect(self.export_progressed)
+        self.export_worker.finished_export.connect(self.export_finished)
+        self.export_progress.setValue(0)
+        self.export_progress.show()
+        self.export_button.setText("إلغاء التصدير")
+        self.export_worker.start()
+
+    def export_progressed(self, done, total):
+        self.export_progress.setValue(int(done * 100 / total) if total else 100)
+
+    def export_finished(self, output_file, written, cancelled, error):
+        self.export_worker.wait()
+        self.export_worker = None
+        self.export_progress.hide()
+        self.export_button.setText("تصدير البيانات")
+        if error:
+            self.show_notification(f"خطأ في تصدير البيانات: {error}")
+        elif cancelled:
+            self.show_notification("تم إلغاء التصدير")
+        else:
+            self.show_notification(f"تم تصدير {written} صفًا بنجاح إلى {output_file}!")
 
     def clear_layout(self, layout):
         while layout.count():
@@ -283,59 +738,24 @@ class DatabaseViewer(QMainWindow):
     def display_details(self):
         self.clear_layout(self.data_layout)
         
-        selected_items = self.table_widget.selectedItems()
-        if not selected_items:
+        selected_rows = self.table_view.selectionModel().selectedRows()
+        if not selected_rows:
+            self.current_image_url = None
             self.image_label.setText("اختر صفًا لعرض الصورة")
             self.image_label.setPixmap(QPixmap())
             self.data_layout.addWidget(QLabel("اختر صفًا لعرض التفاصيل"))
             return
         
-        row = selected_items[0].row()
-        row_data = [self.table_widget.item(row, col).text() for col in range(self.table_widget.columnCount())]
+        row = selected_rows[0].row()
+        row_data = [str(cell_data) if cell_data else "" for cell_data in self.model.row_values(row)]
         data_dict = dict(zip(self.columns, row_data))
         
-        image_url_col = self.columns.index("image_url") if "image_url" in self.columns else -1
-        default_image_url = "https://c8.alamy.com/comp/2FJR92X/flat-male-doctor-avatar-in-medical-face-protection-mask-and-stethoscope-healthcare-vector-illustration-people-cartoon-avatar-profile-character-icon-2FJR92X.jpg"
-        
-        if image_url_col != -1:
-            image_url = row_data[image_url_col]
-            if image_url and image_url.startswith("http"):
-                try:
-                    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-                    response = requests.get(image_url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    if pixmap.isNull():
-                        response = requests.get(default_image_url, headers=headers, timeout=10)
-                        response.raise_for_status()
-                        pixmap.loadFromData(response.content)
-                    scaled_pixmap = pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    self.image_label.setPixmap(scaled_pixmap)
-                except requests.exceptions.RequestException as e:
-                    try:
-                        response = requests.get(default_image_url, headers=headers, timeout=10)
-                        response.raise_for_status()
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(response.content)
-                        scaled_pixmap = pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        self.image_label.setPixmap(scaled_pixmap)
-                    except:
-                        self.image_label.setText("فشل في تحميل الصورة الافتراضية")
-                        self.image_label.setPixmap(QPixmap())
-            else:
-                try:
-                    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-                    response = requests.get(default_image_url, headers=headers, timeout=10)
-                    response.raise_for_status()
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    scaled_pixmap = pixmap.scaled(300, 300, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    self.image_label.setPixmap(scaled_pixmap)
-                except:
-                    self.image_label.setText("فشل في تحميل الصورة الافتراضية")
-                    self.image_label.setPixmap(QPixmap())
+        if "image_url" in self.columns:
+            image_url = row_data[self.columns.index("image_url")]
+            self.set_image(image_url if image_url.startswith("http") else DEFAULT_IMAGE_URL)
+            self.prefetch_images(row)
         else:
+            self.current_image_url = None
             self.image_label.setText("لم يتم العثور على عمود رابط الصورة")
         
         fields_to_display = ["name", "specialty", "location", "profile_url", "source"]
@@ -365,6 +785,42 @@ class DatabaseViewer(QMainWindow):
         
         self.data_widget.adjustSize()
 
+    def set_image(self, url):
+        self.current_image_url = url
+        pixmap = self.image_loader.cached(url)
+        if pixmap is not None:
+            self.image_label.setPixmap(pixmap)
+        elif url in self.image_loader.failures:
+            self.image_failed(url)
+        else:
+            self.image_label.setPixmap(QPixmap())
+            self.image_label.setText("جارٍ تحميل الصورة...")
+            self.image_loader.load(url)
+
+    def show_image(self, url, pixmap):
+        if url == self.current_image_url:
+            self.image_label.setPixmap(pixmap)
+
+    def image_failed(self, url):
+        if url != self.current_image_url:
+            return
+        if url != DEFAULT_IMAGE_URL:
+            self.set_image(DEFAULT_IMAGE_URL)
+        else:
+            self.image_label.setText("فشل في تحميل الصورة الافتراضية")
+            self.image_label.setPixmap(QPixmap())
+
+    def prefetch_images(self, row):
+        """Start loading the photos of the rows around row."""
+        if "image_url" not in self.columns:
+            return
+        column = self.columns.index("image_url")
+        for neighbour in range(max(0, row - PREFETCH_ROWS), min(self.model.rowCount(), row + PREFETCH_ROWS + 1)):
+            values = self.model.row_values(neighbour)
+            image_url = values[column] if column < len(values) else None
+            if neighbour != row and image_url and str(image_url).startswith("http"):
+                self.image_loader.load(image_url, prefetch=True)
+
     def copy_to_clipboard(self, text):
         clipboard = QApplication.clipboard()
         clipboard.setText(text)
@@ -385,6 +841,11 @@ class DatabaseViewer(QMainWindow):
         msg.exec_()
 
     def closeEvent(self, event):
+        if self.export_worker is not None:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        self.search_worker.stop()
+        self.image_loader.stop()
         self.conn.close()
         event.accept()
 
@@ -393,4 +854,5 @@ if __name__ == '__main__':
     app.setFont(QFont("Noto Sans Arabic", 10))
     window = DatabaseViewer()
     window.show()
+    startup.track_first_paint(app, window, "display")
     sys.exit(app.exec_())
\ No newline at end of file
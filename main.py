@@ -1,49 +1,149 @@
+import startup
 import os
 import sys
 import sqlite3
 import logging
+import threading
+from collections import deque
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QListWidget, QPushButton, QTextEdit, 
-                            QListWidgetItem, QProgressBar)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                            QHBoxLayout, QListWidget, QPushButton, QPlainTextEdit, 
+                            QListWidgetItem, QProgressBar, QComboBox, QLabel,
+                            QTableWidget, QTableWidgetItem, QHeaderView)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 
-from scraper.database import Database
-from scraper.scrapers import wellness,uaeu,skmc,sharjahcmc,altaie,tawam,dhafrah,
-royalclinic,mezyadmc,livhospital,hsmc,gargashhospital
+from scraper import frontier, logs, metrics, registry
 
-SCRAPERS = {
-    "wellnesssurgerycenter.com": wellness.scrape,
-    "uaeu.ac.ae": uaeu.scrape,
-    "skmca.ae": skmc.scrape,
-    "sharjahcmc.ae": sharjahcmc.scrape,
-    "altaiecenter.com": altaie.scrape,
-    "Tawam Hospital": tawam.scrape,
-    "Dhafrah Hospitals": dhafrah.scrape,
-    "Enfield Royal Clinic": royalclinic.scrape,
-    "Mezyad Health Care Center - Al Ain": mezyadmc.scrape,
-    "Liv Hospital City Walk": livhospital.scrape,
-    "Harley Street Medical Center": hsmc.scrape,
-    "Gargash Hospital": gargashhospital.scrape,
-}
+# Display name -> scraper module; a module is only imported when its scraper starts
+SCRAPERS = registry.SCRAPERS
+# Scrapers running at the same time; the others wait in a queue. Request
+# rates per site are enforced by the shared fetch engine (scraper/fetch.py).
+MAX_PARALLEL_SCRAPERS = 4
+# Lines kept by the log console; older lines are dropped
+LOG_MAX_LINES = 5000
+# How often queued log lines are written to the console, in milliseconds
+LOG_FLUSH_MS = 100
+# Levels offered by the console's filter
+LOG_LEVELS = (("INFO", logging.INFO), ("WARNING", logging.WARNING), ("ERROR", logging.ERROR))
+# How often the stats panel is refreshed, in milliseconds
+STATS_REFRESH_MS = 1000
+# Per-site metrics written when all scrapers finish (Prometheus text; use .json for JSON)
+METRICS_FILE = "scraper_metrics.prom"
+# How long closing the window waits for each stopped scraper to checkpoint, in milliseconds
+STOP_GRACE_MS = 30000
+
+class LogConsole(QPlainTextEdit):
+    """
+    Read-only log view fed from any thread.
+
+    write() only queues a line; a timer on the GUI thread appends everything
+    queued since the last tick in one batch. The last LOG_MAX_LINES lines
+    are kept, so the filter level can be changed afterwards.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(LOG_MAX_LINES)
+        self.level = logging.INFO
+        self.lines = deque(maxlen=LOG_MAX_LINES)
+        self._queued = deque(maxlen=LOG_MAX_LINES)
+        self._lock = threading.Lock()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(LOG_FLUSH_MS)
+
+    def write(self, level, line):
+        """Queue a line for display; safe to call from any thread."""
+        with self._lock:
+            self._queued.append((level, line))
+
+    def flush(self):
+        with self._lock:
+            if not self._queued:
+                return
+            batch = list(self._queued)
+            self._queued.clear()
+        self.lines.extend(batch)
+        shown = [line for level, line in batch if level >= self.level]
+        if shown:
+            self.appendPlainText("\n".join(shown[-LOG_MAX_LINES:]))
+
+    def set_level(self, level):
+        """Show only lines at level or above, including the lines already kept."""
+        self.flush()
+        self.level = level
+        self.setPlainText("\n".join(line for line_level, line in self.lines if line_level >= level))
+        self.moveCursor(self.textCursor().End)
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+def _mean(histogram):
+    return histogram["sum"] / histogram["count"] if histogram["count"] else None
+
+class StatsPanel(QTableWidget):
+    """
+    Live per-site performance table read from the process metrics, slowest
+    site first: request latency, rate-limit wait, parse and insert time per
+    page, throughput and the 429 / retry / error counts.
+    """
+    COLUMNS = ("الموقع", "الطلبات", "ميغابايت", "الجلب p50/p95 ms", "انتظار المعدل p95 ms",
+               "التحليل ms/صفحة", "الحفظ ms/صفحة", "صفوف/ث", "429", "إعادة", "أخطاء", "المدة ث")
+
+    def __init__(self, parent=None):
+        super().__init__(0, len(self.COLUMNS), parent)
+        self.setHorizontalHeaderLabels(self.COLUMNS)
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.verticalHeader().hide()
+        self.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.names = {module: name for name, module in SCRAPERS.items()}
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(STATS_REFRESH_MS)
+
+    def refresh(self):
+        sites = metrics.get_metrics().snapshot()["sites"]
+        rows = sorted(sites.items(), key=lambda item: item[1]["wall_seconds"], reverse=True)
+        self.setRowCount(len(rows))
+        for row, (site, data) in enumerate(rows):
+            counters, spans = data["counters"], data["spans"]
+            values = (
+                self.names.get(site, site),
+                counters["requests"],
+                f"{counters['bytes'] / 2 ** 20:.1f}",
+                f"{_ms(spans['fetch']['p50'])} / {_ms(spans['fetch']['p95'])}",
+                _ms(spans['rate_wait']['p95']),
+                _ms(_mean(spans['parse'])),
+                _ms(_mean(spans['insert'])),
+                "-" if data["rows_per_sec"] is None else f"{data['rows_per_sec']:.0f}",
+                counters["throttled"],
+                counters["retries"],
+                counters["errors"] + counters["server_errors"] + counters["short_circuited"],
+                f"{data['wall_seconds']:.1f}",
+            )
+            for column, value in enumerate(values):
+                self.setItem(row, column, QTableWidgetItem(str(value)))
 
 class QtLogHandler(logging.Handler):
-    def __init__(self, text_widget):
+    def __init__(self, console):
         super().__init__()
-        self.text_widget = text_widget
+        self.console = console
 
     def emit(self, record):
-        msg = self.format(record)
-        self.text_widget.append(msg)
+        try:
+            self.console.write(record.levelno, self.format(record))
+        except Exception:
+            self.handleError(record)
 
 class ScraperWorker(QThread):
     log_signal = pyqtSignal(str)
     progress_signal = pyqtSignal(int)
     
-    def __init__(self, domain, scrape_func):
+    def __init__(self, domain):
         super().__init__()
         self.domain = domain
-        self.scrape_func = scrape_func
+        self.scrape_func = None
         self.is_running = True
     
     def run(self):
@@ -51,6 +151,9 @@ class ScraperWorker(QThread):
             self.log_signal.emit(f"[*] بدء استخراج البيانات لـ {self.domain}")
             self.progress_signal.emit(0)
             
+            # Import the scraper module here, off the GUI thread
+            self.scrape_func = registry.get_scrape(self.domain)
+            
             import inspect
             sig = inspect.signature(self.scrape_func)
             has_callback = len(sig.parameters) > 0
@@ -67,13 +170,17 @@ class ScraperWorker(QThread):
             
             if self.is_running:
                 self.log_signal.emit(f"[+] اكتمل استخراج بيانات {self.domain} بنجاح")
+            else:
+                self.log_signal.emit(f"[*] تم إيقاف {self.domain}؛ سيستأنف التشغيل التالي من حيث توقف")
         except Exception as e:
             if self.is_running:
                 self.log_signal.emit(f"[!] خطأ في استخراج بيانات {self.domain}: {str(e)}")
                 self.progress_signal.emit(0)
     
     def stop(self):
+        """Ask the scraper to stop at its next page; its frontier is kept for the next run."""
         self.is_running = False
+        frontier.request_stop(registry.module_name(self.domain))
 
 class UAEScraperGUI(QMainWindow):
     def __init__(self):
@@ -174,7 +281,20 @@ class UAEScraperGUI(QMainWindow):
                 border-radius: 8px;
                 animation: pulse 2s infinite;
             }
-            QTextEdit {
+            QTableWidget {
+                background-color: rgba(255, 255, 255, 0.05);
+                color: #e0e7ff;
+                border: 2px solid rgba(0, 255, 255, 0.4);
+                border-radius: 12px;
+                gridline-color: rgba(0, 255, 255, 0.2);
+            }
+            QHeaderView::section {
+                background-color: #1a1a2e;
+                color: #e0e7ff;
+                padding: 4px;
+                border: 1px solid rgba(0, 255, 255, 0.4);
+            }
+            QPlainTextEdit {
                 background-color: rgba(255, 255, 255, 0.05);
                 color: #e0e7ff;
                 border: 2px solid rgba(0, 255, 255, 0.4);
@@ -183,10 +303,17 @@ class UAEScraperGUI(QMainWindow):
                 backdrop-filter: blur(10px);
                 font-size: 13px;
             }
-            QTextEdit:focus {
+            QPlainTextEdit:focus {
                 border: 2px solid #00FFFF;
                 box-shadow: 0 0 16px rgba(0, 255, 255, 0.6);
             }
+            QComboBox {
+                background-color: rgba(255, 255, 255, 0.05);
+                color: #e0e7ff;
+                border: 2px solid rgba(0, 255, 255, 0.4);
+                border-radius: 8px;
+                padding: 4px 12px;
+            }
             QScrollBar:vertical {
                 background: transparent;
                 width: 12px;
@@ -234,6 +361,12 @@ class UAEScraperGUI(QMainWindow):
         self.start_all_button.setFont(QFont("Noto Sans Arabic", 12))
         button_layout.addWidget(self.start_all_button)
         
+        self.stop_button = QPushButton("إيقاف الاستخراج")
+        self.stop_button.clicked.connect(self.stop_all)
+        self.stop_button.setFont(QFont("Noto Sans Arabic", 12))
+        self.stop_button.setEnabled(False)
+        button_layout.addWidget(self.stop_button)
+        
         layout.addLayout(button_layout)
         
         self.progress_bar = QProgressBar()
@@ -242,8 +375,27 @@ class UAEScraperGUI(QMainWindow):
         self.progress_bar.setFormat("تقدم الاستخراج: %p%")
         layout.addWidget(self.progress_bar)
         
-        self.console = QTextEdit()
-        self.console.setReadOnly(True)
+        self.stats_panel = StatsPanel()
+        self.stats_panel.setFont(QFont("Noto Sans Arabic", 9))
+        self.stats_panel.setMaximumHeight(220)
+        layout.addWidget(self.stats_panel)
+        
+        level_layout = QHBoxLayout()
+        level_label = QLabel("مستوى السجل:")
+        level_label.setFont(QFont("Noto Sans Arabic", 10))
+        level_layout.addWidget(level_label)
+        self.level_filter = QComboBox()
+        self.level_filter.setFont(QFont("Noto Sans Arabic", 10))
+        for name, level in LOG_LEVELS:
+            self.level_filter.addItem(name, level)
+        self.level_filter.currentIndexChanged.connect(
+            lambda index: self.console.set_level(self.level_filter.itemData(index))
+        )
+        level_layout.addWidget(self.level_filter)
+        level_layout.addStretch()
+        layout.addLayout(level_layout)
+        
+        self.console = LogConsole()
         self.console.setFont(QFont("Noto Sans Arabic", 10))
         layout.addWidget(self.console)
         
@@ -252,23 +404,25 @@ class UAEScraperGUI(QMainWindow):
             '[%(asctime)s] [%(levelname)s] %(message)s', 
             datefmt='%Y-%m-%d %H:%M:%S'
         ))
-        logger = logging.getLogger()
-        logger.addHandler(self.log_handler)
-        logger.setLevel(logging.INFO)
+        # Records reach the console from the background logging thread, which
+        # also writes this run's log files
+        logs.start(logging.INFO)
+        logs.add_handler(self.log_handler)
         
         sys.stdout = Stream(self.console)
         
         self.workers = {}
+        self.pending = deque()
         self.progress_values = {}
         
     def log_message(self, message):
-        self.console.append(message)
+        self.console.write(logging.INFO, message)
         
     def update_progress(self, value):
         sender = self.sender()
         if sender and hasattr(sender, 'domain'):
             self.progress_values[sender.domain] = value
-            total_progress = sum(self.progress_values.values()) / len(self.workers) if self.workers else 0
+            total_progress = sum(self.progress_values.values()) / len(self.progress_values) if self.progress_values else 0
             self.progress_bar.setValue(int(total_progress))
         
     def start_selected(self):
@@ -279,7 +433,7 @@ class UAEScraperGUI(QMainWindow):
             
         for item in selected_items:
             domain = item.text()
-            if domain not in self.workers:
+            if domain not in self.progress_values:
                 self.start_scraper(domain)
             else:
                 self.log_message(f"[*] {domain} قيد الاستخراج بالفعل")
@@ -289,7 +443,7 @@ class UAEScraperGUI(QMainWindow):
             
     def start_all(self):
         for domain in SCRAPERS.keys():
-            if domain not in self.workers:
+            if domain not in self.progress_values:
                 self.start_scraper(domain)
             else:
                 self.log_message(f"[*] {domain} قيد الاستخراج بالفعل")
@@ -298,39 +452,76 @@ class UAEScraperGUI(QMainWindow):
             self.toggle_buttons(True)
             
     def start_scraper(self, domain):
-        if domain in SCRAPERS:
-            worker = ScraperWorker(domain, SCRAPERS[domain])
-            worker.log_signal.connect(self.log_message)
-            worker.progress_signal.connect(self.update_progress)
-            worker.finished.connect(lambda: self.worker_finished(domain))
-            self.workers[domain] = worker
-            self.progress_values[domain] = 0
-            worker.start()
-        else:
+        if domain not in SCRAPERS:
             self.log_message(f"[!] لا يوجد مستخرج متاح لـ {domain}")
+            return
+        self.progress_values[domain] = 0
+        if len(self.workers) >= MAX_PARALLEL_SCRAPERS:
+            self.pending.append(domain)
+            self.log_message(f"[*] {domain} في قائمة الانتظار")
+            return
+        self.run_worker(domain)
+            
+    def run_worker(self, domain):
+        worker = ScraperWorker(domain)
+        worker.log_signal.connect(self.log_message)
+        worker.progress_signal.connect(self.update_progress)
+        worker.finished.connect(lambda: self.worker_finished(domain))
+        self.workers[domain] = worker
+        # Cleared before the thread starts, so a stop() right after is not lost
+        frontier.clear_stop(registry.module_name(domain))
+        worker.start()
             
     def worker_finished(self, domain):
         if domain in self.workers:
             del self.workers[domain]
             del self.progress_values[domain]
+        while self.pending and len(self.workers) < MAX_PARALLEL_SCRAPERS:
+            self.run_worker(self.pending.popleft())
         if not self.workers:
             self.toggle_buttons(False)
             self.progress_bar.setValue(100)
             self.log_message("[+] اكتملت جميع عمليات الاستخراج")
+            self.stats_panel.refresh()
+            try:
+                metrics.write(METRICS_FILE)
+                self.log_message(f"[*] تم حفظ مقاييس الأداء في {METRICS_FILE}")
+            except OSError as e:
+                self.log_message(f"[!] تعذر حفظ مقاييس الأداء: {str(e)}")
         else:
-            total_progress = sum(self.progress_values.values()) / len(self.workers) if self.workers else 0
+            total_progress = sum(self.progress_values.values()) / len(self.progress_values) if self.progress_values else 0
             self.progress_bar.setValue(int(total_progress))
             
+    def stop_all(self):
+        for domain in self.pending:
+            del self.progress_values[domain]
+        self.pending.clear()
+        for worker in self.workers.values():
+            worker.stop()
+        if self.workers:
+            self.log_message("[*] جارٍ إيقاف الاستخراج...")
+            self.stop_button.setEnabled(False)
+            
     def toggle_buttons(self, running):
         self.start_button.setEnabled(not running)
         self.start_all_button.setEnabled(not running)
+        self.stop_button.setEnabled(running)
+        
+    def closeEvent(self, event):
+        # Let running scrapers checkpoint their frontier before the process exits
+        self.stop_all()
+        for worker in list(self.workers.values()):
+            worker.wait(STOP_GRACE_MS)
+        super().closeEvent(event)
 
 class Stream:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
+    def __init__(self, console):
+        self.console = console
 
     def write(self, text):
-        self.text_widget.append(text.strip())
+        text = text.strip()
+        if text:
+            self.console.write(logging.INFO, text)
 
     def flush(self):
         pass
@@ -339,4 +530,5 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = UAEScraperGUI()
     window.show()
+    startup.track_first_paint(app, window, "main")
     sys.exit(app.exec_())
\ No newline at end of file
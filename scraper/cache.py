@@ -0,0 +1,133 @@
+# scraper/cache.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a stored response is served without contacting the server.
+# None means every hit is revalidated with If-None-Match / If-Modified-Since.
+CACHE_TTL = None
+# Upper bound on stored bodies; least recently used entries are evicted first
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache of GET responses, keyed by URL.
+
+    Each entry keeps the body together with its ETag / Last-Modified validators
+    so stale entries can be revalidated with a conditional request. The total
+    body size is kept under max_bytes by evicting least recently used entries.
+    Safe to use from several threads.
+    """
+    DB_PATH = "http_cache.db"
+
+    def __init__(self, path=None, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path or self.DB_PATH, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            status INTEGER,
+            headers TEXT,
+            body BLOB,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL,
+            last_access REAL,
+            size INTEGER
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def lookup(self, url):
+        """Return the stored entry for url as a dict, or None."""
+        with self._lock:
+            row = self.conn.execute("""
+                SELECT status, headers, body, etag, last_modified, fetched_at
+                FROM responses WHERE url = ?
+            """, (url,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        status, headers, body, etag, last_modified, fetched_at = row
+        return {
+            'url': url,
+            'status': status,
+            'headers': json.loads(headers),
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': fetched_at,
+        }
+
+    def is_fresh(self, entry):
+        """True if entry is young enough to be served without revalidation."""
+        return self.ttl is not None and time.time() - entry['fetched_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Request headers that revalidate entry against the server."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, status, headers, body):
+        """Store a response, unless the server forbids it."""
+        if 'no-store' in headers.get('Cache-Control', '').lower():
+            return
+        now = time.time()
+        size = len(body)
+        with self._lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self.conn.execute("""
+                INSERT OR REPLACE INTO responses
+                (url, status, headers, body, etag, last_modified, fetched_at, last_access, size)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (url, status, json.dumps(dict(headers)), body,
+                  headers.get('ETag'), headers.get('Last-Modified'), now, now, size))
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self.conn.commit()
+
+    def touch(self, url, headers):
+        """Mark an entry as revalidated (304), picking up any refreshed validators."""
+        with self._lock:
+            self.conn.execute("""
+                UPDATE responses
+                SET fetched_at = ?, last_access = ?,
+                    etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)
+                WHERE url = ?
+            """, (time.time(), time.time(), headers.get('ETag'), headers.get('Last-Modified'), url))
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes (lock held)."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall()
+        evicted = 0
+        for url, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            self.total_bytes -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} cached responses, cache size now {self.total_bytes} bytes")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,328 @@
+# scraper/database.py
+import os
+import sqlite3
+import queue
+import atexit
+import logging
+import threading
+import time
+
+from scraper import dedup, facets, images, search
+
+logger = logging.getLogger(__name__)
+
+DOCTOR_FIELDS = ('name', 'specialty', 'location', 'profile_url', 'image_url', 'source')
+
+# Connection settings for a single-writer, many-reader workload
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+    # Rows replaced by UPDATE OR REPLACE also fire the delete triggers (search index sync)
+    "PRAGMA recursive_triggers=ON",
+)
+
+def doctor_key(doctor):
+    """Identity of a doctor within one page: the profile URL, or the name when there is none."""
+    profile_url = doctor.get('profile_url')
+    if profile_url and profile_url != "N/A":
+        return profile_url
+    return doctor.get('name')
+
+class Database:
+    """
+    Database handler for storing scraped data.
+    """
+    DB_PATH = "scraper_data.db"
+
+    def __init__(self):
+        self.conn = sqlite3.connect(self.DB_PATH, timeout=30)
+        self.cursor = self.conn.cursor()
+        self.configure()
+        self.create_tables()
+
+    def configure(self):
+        """Enable WAL mode and tune the connection pragmas."""
+        for pragma in PRAGMAS:
+            self.cursor.execute(pragma)
+
+    def create_tables(self):
+        """Create tables if they do not exist."""
+        # self.cursor.execute("""
+        #     CREATE TABLE IF NOT EXISTS doctors (
+        #         id INTEGER PRIMARY KEY AUTOINCREMENT,
+        #         name TEXT,
+        #         specialty TEXT,
+        #         location TEXT,
+        #         profile_url TEXT UNIQUE,
+        #         image_url TEXT,
+        #         source TEXT
+        #     )
+        # """)
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS doctors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            specialty TEXT,
+            location TEXT,
+            profile_url TEXT,
+            image_url TEXT,
+            source TEXT,
+            UNIQUE(name, profile_url, image_url, source)
+            )
+        """)
+        # Content fingerprint of every scraped page, for incremental re-scrapes
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+            page_key TEXT PRIMARY KEY,
+            scraper TEXT,
+            content_hash TEXT,
+            updated_at REAL
+            )
+        """)
+        # URLs of every scraper run still in progress, so an interrupted run can resume
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+            scraper TEXT NOT NULL,
+            url TEXT NOT NULL,
+            state TEXT NOT NULL,
+            result INTEGER,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            PRIMARY KEY (scraper, url)
+            )
+        """)
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(doctors)")]
+        if 'page_key' not in columns:
+            self.cursor.execute("ALTER TABLE doctors ADD COLUMN page_key TEXT")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_doctors_page_key ON doctors(page_key)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_pages_scraper ON pages(scraper)")
+        search.create_index(self.cursor)
+        facets.create_schema(self.cursor)
+        dedup.create_table(self.cursor)
+        images.create_schema(self.cursor)
+
+        self.conn.commit()
+
+    def page_hashes(self, scraper):
+        """Return {page_key: content_hash} for every page stored for a scraper."""
+        self.cursor.execute("SELECT page_key, content_hash FROM pages WHERE scraper = ?", (scraper,))
+        return dict(self.cursor.fetchall())
+
+    def apply_page(self, scraper, page_key, content_hash, doctors, commit=True, single_record=False):
+        """
+        Replace the doctors stored for one page with a freshly parsed list.
+
+        Doctors are matched by profile URL (or name when there is none); only
+        the differences are written. A listing page that parses empty keeps
+        its doctors; a single_record page (one doctor's detail page) that
+        parses empty removes its doctor. With commit=False the caller commits
+        (the writer groups many pages into one transaction). Returns
+        (added, updated, removed) name lists.
+        """
+        self.cursor.execute(f"""
+            SELECT id, {', '.join(DOCTOR_FIELDS)} FROM doctors WHERE page_key = ?
+        """, (page_key,))
+        old = {doctor_key(dict(zip(DOCTOR_FIELDS, row[1:]))): row for row in self.cursor.fetchall()}
+        new = {doctor_key(doctor): tuple(doctor[field] for field in DOCTOR_FIELDS) for doctor in doctors}
+
+        # The page row goes first: the source facet of a doctor is read from it.
+        # It is written even when the doctors are kept below, so the same page
+        # is not downloaded and parsed again on every run.
+        self.cursor.execute("""
+            INSERT OR REPLACE INTO pages (page_key, scraper, content_hash, updated_at)
+            VALUES (?, ?, ?, ?)
+        """, (page_key, scraper, content_hash, time.time()))
+
+        if old and not new and not single_record:
+            # An empty parse of a page that used to list doctors is more likely a
+            # layout change or a bad response than everybody leaving; keep the rows
+            new = {key: tuple(row[1:]) for key, row in old.items()}
+
+        added = [key for key in new if key not in old]
+        updated = [key for key in new if key in old and new[key] != tuple(old[key][1:])]
+        removed = [key for key in old if key not in new]
+
+        self.cursor.executemany("""
+            INSERT INTO doctors (name, specialty, location, profile_url, image_url, source, page_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name, profile_url, image_url, source) DO UPDATE SET
+            specialty = excluded.specialty, location = excluded.location,
+            page_key = COALESCE(doctors.page_key, excluded.page_key)
+        """, [new[key] + (page_key,) for key in added])
+        self.cursor.executemany(f"""
+            UPDATE OR REPLACE doctors SET {', '.join(f'{field} = ?' for field in DOCTOR_FIELDS)} WHERE id = ?
+        """, [new[key] + (old[key][0],) for key in updated])
+        self.cursor.executemany("DELETE FROM doctors WHERE id = ?", [(old[key][0],) for key in removed])
+        if commit:
+            self.conn.commit()
+        return ([new[key][0] for key in added], [new[key][0] for key in updated],
+                [old[key][1] for key in removed])
+
+    def remove_pages(self, scraper, keep):
+        """Delete the stored pages of a scraper that are not in keep, with their doctors. Returns removed names."""
+        stale = [key for key in self.page_hashes(scraper) if key not in keep]
+        removed = []
+        for page_key in stale:
+            self.cursor.execute("SELECT name FROM doctors WHERE page_key = ?", (page_key,))
+            removed.extend(row[0] for row in self.cursor.fetchall())
+            self.cursor.execute("DELETE FROM doctors WHERE page_key = ?", (page_key,))
+            self.cursor.execute("DELETE FROM pages WHERE page_key = ?", (page_key,))
+        self.conn.commit()
+        return removed
+
+    def frontier(self, scraper):
+        """[(url, state, result, attempts)] of a scraper's unfinished run, in the order the URLs were added."""
+        self.cursor.execute(
+            "SELECT url, state, result, attempts FROM frontier WHERE scraper = ? ORDER BY rowid", (scraper,)
+        )
+        return self.cursor.fetchall()
+
+    def save_frontier(self, scraper, rows):
+        """Store (url, state, result, attempts) rows of a scraper's frontier."""
+        now = time.time()
+        self.cursor.executemany("""
+            INSERT INTO frontier (scraper, url, state, result, attempts, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(scraper, url) DO UPDATE SET
+            state = excluded.state, result = excluded.result, attempts = excluded.attempts, updated_at = excluded.updated_at
+        """, [(scraper, url, state, result, attempts, now) for url, state, result, attempts in rows])
+        self.conn.commit()
+
+    def clear_frontier(self, scraper):
+        """Forget the frontier of a scraper whose run went through."""
+        self.cursor.execute("DELETE FROM frontier WHERE scraper = ?", (scraper,))
+        self.conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+class DatabaseWriter:
+    """
+    Single background writer for the database.
+
+    Scraper threads hand operations to submit() and never touch the disk
+    themselves; one thread owns the only write connection and runs them in
+    order. Consecutive batch operations (e.g. the pages of a scrape) share one
+    transaction, committed every BATCH_SIZE operations or FLUSH_INTERVAL seconds.
+    """
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 1.0
+
+    _STOP = object()
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="DatabaseWriter", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, operation, batch=False):
+        """
+        Queue a callable to run on the writer thread as operation(db), in order
+        with the queued ones. A batch operation must not commit: the writer
+        commits it together with the batch operations queued around it.
+        """
+        self.queue.put((operation, batch))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been committed."""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit pending operations and stop the writer thread."""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self):
+        try:
+            db = Database()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        pending = 0
+        deadline = None
+        try:
+            while True:
+                timeout = None if not pending else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if isinstance(item, tuple) and item[1]:
+                    if not pending:
+                        deadline = time.monotonic() + self.flush_interval
+                    self._run_batched(db, item[0])
+                    pending += 1
+                    if pending < self.batch_size:
+                        continue
+
+                self._commit(db, pending)
+                pending = 0
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is self._STOP:
+                    break
+                elif isinstance(item, tuple) and not item[1]:
+                    self._run_operation(db, item[0])
+        finally:
+            db.close()
+
+    def _commit(self, db, count):
+        if not count:
+            return
+        try:
+            db.conn.commit()
+            logger.debug(f"Committed batch of {count} operations")
+        except sqlite3.Error as e:
+            db.conn.rollback()
+            logger.error(f"Failed to commit batch of {count} operations: {str(e)}")
+
+    def _run_batched(self, db, operation):
+        # Each operation runs in a savepoint of the batch's transaction, so one
+        # that fails is undone without losing the others
+        if not db.conn.in_transaction:
+            db.conn.execute("BEGIN")
+        db.conn.execute("SAVEPOINT operation")
+        try:
+            operation(db)
+        except Exception as e:
+            db.conn.execute("ROLLBACK TO operation")
+            logger.error(f"Database writer operation failed: {str(e)}")
+        db.conn.execute("RELEASE operation")
+
+    def _run_operation(self, db, operation):
+        try:
+            operation(db)
+        except Exception as e:
+            db.conn.rollback()
+            logger.error(f"Database writer operation failed: {str(e)}")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the process-wide DatabaseWriter, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = DatabaseWriter()
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,355 @@
+# scraper/dedup.py
+import functools
+import logging
+import re
+import unicodedata
+
+from scraper import search
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_TABLE = "doctor_clusters"
+# Version of the name and specialty keys below; rows keyed by an older
+# version are re-keyed and re-clustered on the next update
+KEY_VERSION = 2
+
+# First/last-name blocks larger than this are not compared pairwise; a block
+# that large is a very common name, and exact name matches still join it
+MAX_BLOCK_SIZE = 50
+
+# Honorifics and qualifications dropped from names before matching
+TITLES = {
+    'dr', 'doctor', 'prof', 'professor', 'mr', 'mrs', 'ms', 'miss', 'assoc', 'asst',
+    'associate', 'assistant', 'consultant', 'specialist',
+    'md', 'mbbs', 'mbchb', 'phd', 'msc', 'bsc', 'bds', 'dds', 'dmd',
+    'frcs', 'frcp', 'frcpc', 'facs', 'facp', 'facc', 'mrcp', 'mrcs', 'mrcog', 'frcog',
+    'د', 'دكتور', 'دكتوره', 'الدكتور', 'الدكتوره', 'بروفيسور', 'البروفيسور', 'ا.د',
+}
+# Words of a specialty that do not name the field: titles, grades and
+# generic terms, which two different specialties would otherwise share
+SPECIALTY_STOPWORDS = TITLES | {
+    'senior', 'junior', 'head', 'chief', 'registrar', 'resident', 'fellow', 'lecturer',
+    'department', 'clinic', 'unit', 'medicine', 'medical', 'surgery', 'surgeon', 'general',
+    'and', 'the', 'for', 'with',
+    'استشاري', 'استشاريه', 'اخصائي', 'اخصائيه', 'طبيب', 'طبيبه', 'قسم', 'عياده',
+}
+# "Abdul Rahman", "Abdel-Rahman" and "Abdulrahman" are one name
+_ABD_PREFIXES = {'abd', 'abdul', 'abdel', 'abdal', 'abdol', 'abdu'}
+_ARTICLES = {'al', 'el', 'ال'}
+_WORD = re.compile(r"[^\W_]+(?:\.[^\W_]+)*", re.UNICODE)
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+# Latin spellings of the same Arabic sound
+_LATIN_FOLDS = (('ph', 'f'), ('ck', 'k'), ('q', 'k'), ('ou', 'u'), ('ee', 'i'), ('oo', 'u'))
+# Latin spellings of the same Arabic name. Only the spellings listed here are
+# joined: vowels tell names apart (Mahmoud / Mohammed, Hamad / Hamid, Omar /
+# Amr / Amir), so a name that is not listed is compared as spelled, after the
+# folds above
+TRANSLITERATIONS = {
+    'muhammad': ('mohammed', 'mohammad', 'mohamed', 'mohamad', 'muhammed', 'muhamed', 'mohd', 'mhd'),
+    'mahmud': ('mahmoud', 'mahmood'),
+    'ahmad': ('ahmed',),
+    'hamid': ('hamed', 'hameed'),
+    'umar': ('omar', 'omer', 'umer'),
+    'amr': ('amro', 'amru'),
+    'amir': ('ameer', 'emir'),
+    'husayn': ('hussein', 'hussain', 'husain', 'husein', 'hosein', 'hossein', 'hosain'),
+    'hasan': ('hassan',),
+    'khalid': ('khaled',),
+    'yusuf': ('yousef', 'yousif', 'yousuf', 'youssef', 'yusef', 'yosef'),
+    'ibrahim': ('ebrahim', 'ibraheem'),
+    'mustafa': ('mostafa', 'moustafa', 'mustapha', 'mostapha'),
+    'abdullah': ('abdallah', 'abdulla', 'abdalla'),
+    'said': ('saeed', 'saied', 'sayeed'),
+    'rashid': ('rasheed', 'rachid'),
+    'salih': ('saleh',),
+    'salim': ('saleem', 'selim'),
+    'karim': ('kareem',),
+    'majid': ('majed', 'majeed'),
+    'walid': ('waleed',),
+    'khalil': ('khaleel',),
+    'jamal': ('gamal',),
+    'nur': ('noor', 'nour'),
+    'fatima': ('fatimah', 'fatma'),
+    'aisha': ('ayesha', 'aysha', 'aishah'),
+    'maryam': ('mariam', 'miriam'),
+    'zaynab': ('zainab', 'zeinab'),
+    'yasmin': ('yasmeen', 'yasmine'),
+}
+
+
+def _fold_spelling(token):
+    """Latin token with the spelling folds applied and doubled letters collapsed."""
+    for source, target in _LATIN_FOLDS:
+        token = token.replace(source, target)
+    folded = [char for i, char in enumerate(token) if i == 0 or char != token[i - 1]]
+    return ''.join(folded)
+
+
+_CANONICAL = {
+    _fold_spelling(variant): name
+    for name, variants in TRANSLITERATIONS.items()
+    for variant in (name,) + variants
+}
+
+
+@functools.lru_cache(maxsize=65536)
+def _fold_latin(token):
+    """
+    Transliteration-insensitive key of a Latin name token: the canonical
+    spelling from TRANSLITERATIONS, so Mohammed, Muhammad and Mohamed all
+    give 'muhammad', else the token with the spelling folds applied.
+    """
+    token = _fold_spelling(token)
+    return _CANONICAL.get(token, token)
+
+
+def _fold_arabic(token):
+    """Key of an Arabic name token (already folded by search.normalize) without its article."""
+    if token.startswith('ال') and len(token) > 4:
+        token = token[2:]
+    return token
+
+
+def name_tokens(name):
+    """
+    Folded tokens of a doctor's name in their original order: titles,
+    qualifications and bracketed notes removed, Latin accents stripped and
+    transliteration variants folded.
+    """
+    if not name:
+        return []
+    # Arabic variants first, as decomposing would split the hamza off its alef
+    text = search.normalize(_PARENTHESES.sub(' ', name).lower())
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    words = [word for word in _WORD.findall(text) if word.rstrip('.') not in TITLES]
+
+    tokens = []
+    i = 0
+    while i < len(words):
+        word = words[i].replace('.', '')
+        if word in _ARTICLES:
+            i += 1
+            continue
+        if word in _ABD_PREFIXES and i + 1 < len(words):
+            following = words[i + 1]
+            if following in _ARTICLES and i + 2 < len(words):
+                following = words[i + 2]
+                i += 1
+            word = 'abdul' + following
+            i += 1
+        i += 1
+        if word.isascii():
+            if word.startswith(('al', 'el')) and len(word) > 5:
+                word = word[2:]
+            tokens.append(_fold_latin(word))
+        else:
+            tokens.append(_fold_arabic(word))
+    return [token for token in tokens if token]
+
+
+def name_key(tokens):
+    """Order-independent key of a folded name; doctors sharing it are match candidates."""
+    return ' '.join(sorted(tokens)) if len(tokens) >= 2 else None
+
+
+def block_key(tokens):
+    """Key of the first and last folded names, so a missing middle name still meets its match."""
+    return f"{tokens[0]} {tokens[-1]}" if len(tokens) >= 2 else None
+
+
+def specialty_key(specialty):
+    """Word stems of a specialty, for telling apart two doctors with the same name."""
+    if not specialty or specialty == "N/A":
+        return ''
+    words = _WORD.findall(search.normalize(specialty.lower()))
+    return ' '.join(sorted({word[:5] for word in words if len(word) > 2 and word not in SPECIALTY_STOPWORDS}))
+
+
+def specialties_compatible(first, second):
+    """True unless both specialties are known and share no word stem."""
+    if not first or not second:
+        return True
+    return bool(set(first.split()) & set(second.split()))
+
+
+def is_match(first, second):
+    """
+    Whether two doctors, as (tokens, specialty key) pairs, are the same person:
+    the same names in any order, or one name missing the middle names of the
+    other, with compatible specialties.
+    """
+    tokens_a, specialty_a = first
+    tokens_b, specialty_b = second
+    if len(tokens_a) < 2 or len(tokens_b) < 2:
+        return False
+    if not specialties_compatible(specialty_a, specialty_b):
+        return False
+    set_a, set_b = set(tokens_a), set(tokens_b)
+    if set_a == set_b:
+        return True
+    return (tokens_a[0], tokens_a[-1]) == (tokens_b[0], tokens_b[-1]) and (set_a <= set_b or set_b <= set_a)
+
+
+def create_table(cursor):
+    """Create the persistent cluster table: one row per clustered doctor."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CLUSTER_TABLE} (
+        doctor_id INTEGER PRIMARY KEY,
+        cluster_id INTEGER,
+        name TEXT,
+        specialty TEXT,
+        tokens TEXT,
+        name_key TEXT,
+        block_key TEXT,
+        specialty_key TEXT,
+        key_version INTEGER
+        )
+    """)
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({CLUSTER_TABLE})")]
+    if 'key_version' not in columns:
+        cursor.execute(f"ALTER TABLE {CLUSTER_TABLE} ADD COLUMN key_version INTEGER")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_clusters_cluster ON {CLUSTER_TABLE}(cluster_id)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_clusters_name_key ON {CLUSTER_TABLE}(name_key)")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_clusters_block_key ON {CLUSTER_TABLE}(block_key)")
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        parent = self.parent.setdefault(item, item)
+        if parent != item:
+            parent = self.parent[item] = self.find(parent)
+        return parent
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            # The smallest doctor id names the cluster
+            if second < first:
+                first, second = second, first
+            self.parent[second] = first
+
+
+def _cluster(doctors):
+    """
+    Group doctors {id: (tokens, specialty key)} into clusters, comparing
+    only doctors that share a name key or a block key. Returns {id: cluster id}.
+    """
+    blocks = {}
+    for doctor_id, (tokens, _) in doctors.items():
+        for key in (('name', name_key(tokens)), ('block', block_key(tokens))):
+            if key[1] is not None:
+                blocks.setdefault(key, []).append(doctor_id)
+
+    clusters = _UnionFind()
+    for (kind, key), members in blocks.items():
+        if len(members) < 2:
+            continue
+        if kind == 'name':
+            # Same names: only the specialties decide, so join through shared
+            # specialty stems in one pass instead of comparing every pair
+            by_stem = {}
+            unknown = []
+            for doctor_id in members:
+                stems = doctors[doctor_id][1].split()
+                if not stems:
+                    unknown.append(doctor_id)
+                for stem in stems:
+                    clusters.union(by_stem.setdefault(stem, doctor_id), doctor_id)
+            # A namesake without a specialty joins them only when that is not
+            # ambiguous, i.e. the ones with a specialty are all one person
+            known = {clusters.find(doctor_id) for doctor_id in by_stem.values()}
+            if len(known) <= 1:
+                for doctor_id in unknown + list(known):
+                    clusters.union(members[0], doctor_id)
+            continue
+        if len(members) > MAX_BLOCK_SIZE:
+            logger.debug(f"Skipping oversized dedup block '{key}' ({len(members)} doctors)")
+            continue
+        for i, doctor_id in enumerate(members):
+            for other_id in members[i + 1:]:
+                if clusters.find(doctor_id) != clusters.find(other_id) and is_match(doctors[doctor_id], doctors[other_id]):
+                    clusters.union(doctor_id, other_id)
+    return {doctor_id: clusters.find(doctor_id) for doctor_id in doctors}
+
+
+def update_clusters(conn):
+    """
+    Bring the cluster table up to date with the doctors table.
+
+    Only doctors that are new, renamed or removed since the last update are
+    re-examined, together with the clusters they belonged to and the clusters
+    sharing a blocking key with them; everything else keeps its cluster.
+    Returns the number of doctors whose cluster was recomputed.
+    """
+    cursor = conn.cursor()
+    create_table(cursor)
+
+    removed = cursor.execute(f"""
+        SELECT doctor_id, cluster_id FROM {CLUSTER_TABLE}
+        WHERE doctor_id NOT IN (SELECT id FROM doctors)
+    """).fetchall()
+    changed = cursor.execute(f"""
+        SELECT d.id, d.name, d.specialty, c.cluster_id FROM doctors d
+        LEFT JOIN {CLUSTER_TABLE} c ON c.doctor_id = d.id
+        WHERE c.doctor_id IS NULL OR c.name IS NOT d.name OR c.specialty IS NOT d.specialty
+        OR c.key_version IS NOT ?
+    """, (KEY_VERSION,)).fetchall()
+    if not removed and not changed:
+        return 0
+
+    cursor.executemany(f"DELETE FROM {CLUSTER_TABLE} WHERE doctor_id = ?", [(row[0],) for row in removed])
+    rows = []
+    for doctor_id, name, specialty, _ in changed:
+        tokens = name_tokens(name)
+        rows.append((doctor_id, doctor_id, name, specialty, ' '.join(tokens),
+                     name_key(tokens), block_key(tokens), specialty_key(specialty), KEY_VERSION))
+    cursor.executemany(f"INSERT OR REPLACE INTO {CLUSTER_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # Clusters to recompute: the ones that lost or changed a member, and the
+    # ones a changed doctor might now join
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS dedup_keys (key TEXT PRIMARY KEY)")
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS dedup_clusters (cluster_id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM dedup_keys")
+    cursor.execute("DELETE FROM dedup_clusters")
+    cursor.executemany("INSERT OR IGNORE INTO dedup_keys VALUES (?)",
+                       [(key,) for row in rows for key in row[5:7] if key is not None])
+    cursor.executemany("INSERT OR IGNORE INTO dedup_clusters VALUES (?)",
+                       [(row[1],) for row in removed] + [(row[3],) for row in changed if row[3] is not None]
+                       + [(row[0],) for row in rows])
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO dedup_clusters SELECT cluster_id FROM {CLUSTER_TABLE}
+        WHERE name_key IN (SELECT key FROM dedup_keys) OR block_key IN (SELECT key FROM dedup_keys)
+    """)
+    members = cursor.execute(f"""
+        SELECT doctor_id, cluster_id, tokens, specialty_key FROM {CLUSTER_TABLE}
+        WHERE cluster_id IN (SELECT cluster_id FROM dedup_clusters)
+    """).fetchall()
+
+    doctors = {doctor_id: (tokens.split(), specialty) for doctor_id, _, tokens, specialty in members}
+    assignment = _cluster(doctors)
+    moved = [(assignment[doctor_id], doctor_id) for doctor_id, old_cluster, _, _ in members
+             if assignment[doctor_id] != old_cluster]
+    cursor.executemany(f"UPDATE {CLUSTER_TABLE} SET cluster_id = ? WHERE doctor_id = ?", moved)
+    conn.commit()
+    logger.info(f"Updated doctor clusters: {len(changed)} changed, {len(removed)} removed, "
+                f"{len(members)} doctors re-clustered")
+    return len(members)
+
+
+def duplicate_stats(conn):
+    """(doctors, distinct doctors) according to the cluster table."""
+    return conn.execute(f"SELECT COUNT(*), COUNT(DISTINCT cluster_id) FROM {CLUSTER_TABLE}").fetchone()
+
+
+def cluster_members(conn, doctor_id):
+    """Ids of every doctor in the same cluster as doctor_id, including itself."""
+    rows = conn.execute(f"""
+        SELECT doctor_id FROM {CLUSTER_TABLE}
+        WHERE cluster_id = (SELECT cluster_id FROM {CLUSTER_TABLE} WHERE doctor_id = ?)
+        ORDER BY doctor_id
+    """, (doctor_id,))
+    return [row[0] for row in rows]
@@ -0,0 +1,139 @@
+# scraper/export.py
+import csv
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Rows read from SQLite and handed to the writer at a time
+CHUNK_SIZE = 2000
+FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be written (unknown format, missing library, ...)."""
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is stopped through its cancelled callback."""
+
+
+def export_format(path):
+    """Export format implied by the extension of path."""
+    fmt = os.path.splitext(path)[1].lower().lstrip('.')
+    if fmt not in FORMATS:
+        raise ExportError(f"Unsupported export format '{fmt or path}'; use one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def _table_chunks(conn, chunk_size):
+    cursor = conn.execute("SELECT * FROM doctors ORDER BY rowid")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _id_chunks(conn, ids, chunk_size):
+    for start in range(0, len(ids), chunk_size):
+        chunk = list(ids[start:start + chunk_size])
+        rows = conn.execute(
+            f"SELECT rowid, * FROM doctors WHERE rowid IN ({', '.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        by_id = {row[0]: row[1:] for row in rows}
+        yield [by_id[doctor_id] for doctor_id in chunk if doctor_id in by_id]
+
+
+class _XlsxWriter:
+    def __init__(self, path, columns):
+        from openpyxl import Workbook
+        # Write-only mode streams rows to disk instead of building every cell in memory
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("doctors")
+        self.sheet.append(columns)
+        self.path = path
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+class _CsvWriter:
+    def __init__(self, path, columns):
+        # utf-8-sig so spreadsheet programs detect UTF-8 and show Arabic text correctly
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ExportError("Parquet export needs the pyarrow package (pip install pyarrow)")
+        self.pyarrow = pyarrow
+        self.columns = columns
+        self.schema = pyarrow.schema(
+            [(column, pyarrow.int64() if column == 'id' else pyarrow.string()) for column in columns]
+        )
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        arrays = [list(values) for values in zip(*rows)] if rows else [[] for _ in self.columns]
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {'xlsx': _XlsxWriter, 'csv': _CsvWriter, 'parquet': _ParquetWriter}
+
+
+def export_doctors(conn, path, ids=None, progress=None, cancelled=None, chunk_size=CHUNK_SIZE):
+    """
+    Stream doctors from conn into path (XLSX, CSV or Parquet, by extension).
+
+    Exports the whole table in id order, or only the given ids in the given
+    order (e.g. the current search results). Rows are read and written
+    chunk_size at a time; progress(done, total) is called after each chunk,
+    and a true cancelled() stops the export. The file is written next to
+    path and moved into place only when complete. Returns the rows written.
+    """
+    fmt = export_format(path)
+    columns = [description[0] for description in conn.execute("SELECT * FROM doctors LIMIT 0").description]
+    total = len(ids) if ids is not None else conn.execute("SELECT COUNT(*) FROM doctors").fetchone()[0]
+    chunks = _table_chunks(conn, chunk_size) if ids is None else _id_chunks(conn, ids, chunk_size)
+
+    partial = f"{path}.part"
+    writer = WRITERS[fmt](partial, columns)
+    done = 0
+    try:
+        try:
+            for rows in chunks:
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled(f"Export to {path} cancelled after {done} rows")
+                writer.write(rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            writer.close()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    logger.info(f"Exported {done} doctors to {path}")
+    return done
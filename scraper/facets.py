@@ -0,0 +1,336 @@
+# scraper/facets.py
+import logging
+import sqlite3
+from array import array
+
+from scraper import registry
+
+logger = logging.getLogger(__name__)
+
+# Facet -> (lookup table of its distinct values, doctors column the value is read from)
+FACETS = {
+    'source': ('sources', 'page_key'),
+    'specialty': ('specialties', 'specialty'),
+    'city': ('cities', 'location'),
+}
+FACET_TABLE = "doctor_facets"
+ALIAS_TABLE = "facet_aliases"
+# Normalized value of every distinct raw string seen, so the alias lookup
+# runs once per string rather than once per doctor
+VALUE_TABLE = "facet_values"
+UNKNOWN = "N/A"
+
+# Canonical facet values and the phrases that name them. Every site words its
+# specialties and addresses its own way ("Cardiologist", "Cardiology
+# Consultant"; "Jumeirah, Dubai"), so a doctor is filed under the canonical
+# value of the first alias found in the field, the longest one when several
+# start at the same word. Aliases are lower case words separated by single
+# spaces; "&" reads as "and" and other punctuation as a space.
+SPECIALTIES = {
+    "Aesthetic Medicine": ("aesthetic medicine", "cosmetic medicine"),
+    "Cardiology": ("cardiology", "cardiologist"),
+    "Dentistry": ("dentistry", "dentist", "dental"),
+    "Dermatology": ("dermatology", "dermatologist"),
+    "ENT": ("ent", "ear nose and throat", "otolaryngology", "otorhinolaryngology", "otolaryngologist"),
+    "Endocrinology": ("endocrinology", "endocrinologist"),
+    "Family Medicine": ("family medicine", "family physician", "family care", "general practice",
+                        "general practitioner"),
+    "Gastroenterology": ("gastroenterology", "gastroenterologist"),
+    "General Surgery": ("general surgery", "general surgeon"),
+    "Hair Restoration": ("hair restoration", "hair transplant"),
+    "Internal Medicine": ("internal medicine", "internist"),
+    "Neurology": ("neurology", "neurologist"),
+    "Nutrition": ("nutrition", "nutritionist", "dietician", "dietitian", "dietetics"),
+    "Obstetrics & Gynecology": ("obstetrics and gynecology", "obstetrics and gynaecology", "obstetrics",
+                                "gynecology", "gynaecology", "gynecologist", "gynaecologist", "obgyn", "ob gyn"),
+    "Oncology": ("oncology", "oncologist"),
+    "Ophthalmology": ("ophthalmology", "ophthalmologist"),
+    "Orthopedic Surgery": ("orthopedic surgery", "orthopaedic surgery", "orthopedics", "orthopaedics",
+                           "orthopedic", "orthopaedic"),
+    "Pediatrics": ("pediatrics", "paediatrics", "pediatric", "paediatric", "pediatrician", "paediatrician"),
+    "Physiotherapy": ("physiotherapy", "physiotherapist", "physical therapy"),
+    "Plastic Surgery": ("plastic surgery", "plastic surgeon"),
+    "Psychiatry": ("psychiatry", "psychiatrist"),
+    "Radiology": ("radiology", "radiologist"),
+    "Urology": ("urology", "urologist"),
+}
+# Hospitals and the city they are in. A hospital named in the location wins
+# over any city named there: "Tawam Hospital, Abu Dhabi" is in Al Ain.
+HOSPITAL_CITIES = {
+    "Abu Dhabi": ("sheikh khalifa medical city", "skmc", "harley street medical center",
+                  "harley street medical centre"),
+    "Al Ain": ("tawam hospital", "tawam", "mezyad health care center"),
+    "Al Dhafra": ("zayed city hospital",),
+    "Dubai": ("liv hospital city walk", "gargash hospital", "al taie medical center", "enfield royal clinic"),
+    "Sharjah": ("sharjah corniche hospital",),
+}
+# Cities (and the districts the sites name instead of them)
+CITIES = {
+    "Abu Dhabi": ("abu dhabi", "al markaziyah", "mussafah", "al reem island"),
+    "Ajman": ("ajman",),
+    "Al Ain": ("al ain",),
+    "Al Dhafra": ("al dhafra", "al dhafrah", "dhafra", "dhafrah", "zayed city", "madinat zayed", "ruwais"),
+    "Dubai": ("dubai", "jumeirah", "umm suqeim", "umm suqaim", "city walk", "deira", "al barsha"),
+    "Fujairah": ("fujairah",),
+    "Ras Al Khaimah": ("ras al khaimah",),
+    "Sharjah": ("sharjah", "halwan"),
+    "Umm Al Quwain": ("umm al quwain",),
+}
+# Facets normalized through the alias table, with their alias maps in order of
+# precedence; a specialty no alias names is kept as it is, a location naming
+# no known city is UNKNOWN
+ALIASES = {'specialty': (SPECIALTIES,), 'city': (HOSPITAL_CITIES, CITIES)}
+KEEP_UNMATCHED = ('specialty',)
+# Facets read from a column of the doctor's page (pages row of its page_key)
+# rather than from the doctor, and the names their raw values are shown under:
+# the source is the scraper that stored the page
+SOURCES = {name: (module,) for name, module in registry.SCRAPERS.items()}
+PAGE_FACETS = {'source': ('scraper', SOURCES)}
+# Characters read as word separators when looking for aliases
+SEPARATORS = (",", "-", "(", ")", "/", ".", "'", "\n", "\t")
+
+# Every combination of facets is answered by the prefix of one of these
+# (covering) indexes, so a filter is an index range lookup, never a scan
+INDEXES = (
+    ('specialty', 'city', 'source'),
+    ('city', 'source', 'specialty'),
+    ('source', 'specialty', 'city'),
+)
+
+
+def _literal(text):
+    if text == "\n":
+        return "char(10)"
+    if text == "\t":
+        return "char(9)"
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _words_sql(expression):
+    """SQL expression of expression as ' word word ... ', lower case, for alias lookups."""
+    words = f"lower(coalesce({expression}, ''))"
+    words = f"replace({words}, '&', ' and ')"
+    for separator in SEPARATORS:
+        words = f"replace({words}, {_literal(separator)}, ' ')"
+    # Runs of up to eight spaces left by the separators become one
+    for _ in range(3):
+        words = f"replace({words}, '  ', ' ')"
+    return f"(' ' || {words} || ' ')"
+
+
+def _normalize_sql(facet, expression):
+    """SQL expression of the facet value of expression: its canonical value, else trimmed, blank as UNKNOWN."""
+    if facet in PAGE_FACETS:
+        expression = f"(SELECT {PAGE_FACETS[facet][0]} FROM pages WHERE page_key = {expression})"
+    trimmed = f"nullif(trim({expression}), '')"
+    if facet in PAGE_FACETS:
+        name = f"(SELECT canonical FROM {ALIAS_TABLE} WHERE facet = '{facet}' AND alias = {expression})"
+        return f"coalesce({name}, {trimmed}, '{UNKNOWN}')"
+    if facet not in ALIASES:
+        return f"coalesce({trimmed}, '{UNKNOWN}')"
+    lookup = f"""(SELECT canonical FROM (
+        SELECT canonical, priority, instr({_words_sql(expression)}, ' ' || alias || ' ') AS start,
+        length(alias) AS size
+        FROM {ALIAS_TABLE} WHERE facet = '{facet}'
+    ) WHERE start > 0 ORDER BY priority, start, size DESC LIMIT 1)"""
+    if facet in KEEP_UNMATCHED:
+        return f"coalesce({lookup}, {trimmed}, '{UNKNOWN}')"
+    return f"coalesce({lookup}, '{UNKNOWN}')"
+
+
+def _value_sql(facet, expression):
+    """SQL expression of the facet value of expression, read from VALUE_TABLE for the normalized facets."""
+    if facet not in ALIASES:
+        return _normalize_sql(facet, expression)
+    return f"(SELECT value FROM {VALUE_TABLE} WHERE facet = '{facet}' AND raw = coalesce({expression}, ''))"
+
+
+def _remember_sql(facet, expression):
+    """Statement adding the value of expression to VALUE_TABLE unless it is there already."""
+    return f"""INSERT INTO {VALUE_TABLE} (facet, raw, value)
+        SELECT '{facet}', coalesce({expression}, ''), {_normalize_sql(facet, expression)}
+        WHERE NOT EXISTS (SELECT 1 FROM {VALUE_TABLE} WHERE facet = '{facet}' AND raw = coalesce({expression}, ''));"""
+
+
+def _column(facet):
+    return f"{facet}_id"
+
+
+def _alias_rows():
+    maps = list(ALIASES.items())
+    maps += [(facet, (names,)) for facet, (_, names) in PAGE_FACETS.items()]
+    return sorted(
+        (facet, alias, canonical, priority)
+        for facet, names_by_priority in maps
+        for priority, names in enumerate(names_by_priority)
+        for canonical, aliases in names.items()
+        for alias in aliases
+    )
+
+
+def _current(cursor):
+    """Whether the facet tables exist and were built with the aliases defined here."""
+    tables = {row[0] for row in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)", (FACET_TABLE, ALIAS_TABLE)
+    )}
+    if tables != {FACET_TABLE, ALIAS_TABLE}:
+        return False
+    try:
+        stored = cursor.execute(f"SELECT facet, alias, canonical, priority FROM {ALIAS_TABLE} ORDER BY facet, alias")
+    except sqlite3.OperationalError:
+        # Alias table of an older layout, without the priority column
+        return False
+    return stored.fetchall() == _alias_rows()
+
+
+def _drop(cursor):
+    """Drop the facet tables and triggers, including those of older layouts."""
+    for trigger in ('doctors_facets_insert', 'doctors_facets_delete', 'doctors_facets_update'):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    # 'locations' held raw location strings before they were filed by city
+    for table in (FACET_TABLE, ALIAS_TABLE, VALUE_TABLE, 'locations', *(table for table, _ in FACETS.values())):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def create_schema(cursor):
+    """
+    Create the facet lookup tables, the doctor -> facet value mapping and the
+    triggers that keep both, and the per-value doctor counts, in sync with the
+    doctors table; fill them from the existing rows when they are new, or
+    rebuild them when the aliases above have changed.
+    """
+    if _current(cursor):
+        return
+    _drop(cursor)
+    cursor.execute(f"""
+        CREATE TABLE {ALIAS_TABLE} (
+        facet TEXT,
+        alias TEXT,
+        canonical TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (facet, alias)
+        )
+    """)
+    cursor.executemany(
+        f"INSERT INTO {ALIAS_TABLE} (facet, alias, canonical, priority) VALUES (?, ?, ?, ?)", _alias_rows()
+    )
+    cursor.execute(f"""
+        CREATE TABLE {VALUE_TABLE} (
+        facet TEXT,
+        raw TEXT,
+        value TEXT NOT NULL,
+        PRIMARY KEY (facet, raw)
+        )
+    """)
+    for table, _ in FACETS.values():
+        # NOCASE so "Al Ain" and "AL AIN" from two sites are one value
+        cursor.execute(f"""
+            CREATE TABLE {table} (
+            id INTEGER PRIMARY KEY,
+            name TEXT UNIQUE COLLATE NOCASE,
+            doctors INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+    cursor.execute(f"""
+        CREATE TABLE {FACET_TABLE} (
+        doctor_id INTEGER PRIMARY KEY,
+        {', '.join(f'{_column(facet)} INTEGER' for facet in FACETS)}
+        )
+    """)
+    for facets in INDEXES:
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_facets_{'_'.join(facets)}
+            ON {FACET_TABLE}({', '.join(_column(facet) for facet in facets)})
+        """)
+
+    add = []
+    remove = []
+    for facet, (table, field) in FACETS.items():
+        value = _value_sql(facet, f"new.{field}")
+        if facet in ALIASES:
+            add.append(_remember_sql(facet, f"new.{field}"))
+        add.append(f"INSERT OR IGNORE INTO {table} (name) VALUES ({value});")
+        add.append(f"UPDATE {table} SET doctors = doctors + 1 WHERE name = {value};")
+        remove.append(f"""UPDATE {table} SET doctors = doctors - 1
+            WHERE id = (SELECT {_column(facet)} FROM {FACET_TABLE} WHERE doctor_id = old.id);""")
+    columns = ", ".join(_column(facet) for facet in FACETS)
+    ids = ", ".join(
+        f"(SELECT id FROM {table} WHERE name = {_value_sql(facet, f'new.{field}')})"
+        for facet, (table, field) in FACETS.items()
+    )
+    add.append(f"INSERT OR REPLACE INTO {FACET_TABLE} (doctor_id, {columns}) VALUES (new.id, {ids});")
+    remove.append(f"DELETE FROM {FACET_TABLE} WHERE doctor_id = old.id;")
+    add, remove = "\n".join(add), "\n".join(remove)
+    fields = sorted({field for _, field in FACETS.values()})
+
+    cursor.execute(f"""
+        CREATE TRIGGER doctors_facets_insert AFTER INSERT ON doctors BEGIN
+            {add}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER doctors_facets_delete AFTER DELETE ON doctors BEGIN
+            {remove}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER doctors_facets_update AFTER UPDATE OF {', '.join(fields)} ON doctors BEGIN
+            {remove}
+            {add}
+        END
+    """)
+
+    for facet, (table, field) in FACETS.items():
+        if facet in ALIASES:
+            cursor.execute(f"""
+                INSERT INTO {VALUE_TABLE} (facet, raw, value)
+                SELECT '{facet}', raw, {_normalize_sql(facet, 'raw')}
+                FROM (SELECT DISTINCT coalesce({field}, '') AS raw FROM doctors)
+            """)
+        cursor.execute(f"""
+            INSERT OR IGNORE INTO {table} (name, doctors)
+            SELECT value, COUNT(*) FROM (SELECT {_value_sql(facet, f'doctors.{field}')} AS value FROM doctors)
+            GROUP BY value COLLATE NOCASE
+        """)
+    ids = ", ".join(
+        f"(SELECT id FROM {table} WHERE name = {_value_sql(facet, f'doctors.{field}')})"
+        for facet, (table, field) in FACETS.items()
+    )
+    cursor.execute(f"INSERT INTO {FACET_TABLE} (doctor_id, {columns}) SELECT doctors.id, {ids} FROM doctors")
+    logger.info(f"Built the doctor facet tables ({cursor.rowcount} rows)")
+
+def _where(filters):
+    """WHERE clause and parameters restricting doctor_facets to filters {facet: value id}."""
+    filters = {facet: value for facet, value in filters.items() if value is not None}
+    if not filters:
+        return "", []
+    return "WHERE " + " AND ".join(f"{_column(facet)} = ?" for facet in filters), list(filters.values())
+
+
+def facet_counts(conn, facet, filters=None):
+    """
+    [(value id, name, doctors)] of one facet, most doctors first, counting
+    only the doctors that match the other facets' filters {facet: value id}.
+    Without other filters this reads the counts kept by the triggers.
+    """
+    table, _ = FACETS[facet]
+    others = {other: value for other, value in (filters or {}).items() if other != facet}
+    where, params = _where(others)
+    if not where:
+        return conn.execute(
+            f"SELECT id, name, doctors FROM {table} WHERE doctors > 0 ORDER BY doctors DESC, name"
+        ).fetchall()
+    return conn.execute(f"""
+        SELECT {table}.id, {table}.name, counts.doctors FROM (
+            SELECT {_column(facet)} AS value_id, COUNT(*) AS doctors FROM {FACET_TABLE} {where}
+            GROUP BY {_column(facet)}
+        ) AS counts JOIN {table} ON {table}.id = counts.value_id
+        ORDER BY counts.doctors DESC, {table}.name
+    """, params).fetchall()
+
+
+def filter_ids(conn, filters):
+    """Ids of the doctors matching every facet filter {facet: value id}, in id order, as an array."""
+    where, params = _where(filters)
+    rows = conn.execute(f"SELECT doctor_id FROM {FACET_TABLE} {where} ORDER BY doctor_id", params)
+    return array('q', (row[0] for row in rows))
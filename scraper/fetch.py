@@ -0,0 +1,474 @@
+# scraper/fetch.py
+import asyncio
+import atexit
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from scraper import metrics
+from scraper.cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Global cap on requests in flight across every scraper
+MAX_IN_FLIGHT = 64
+# Default number of concurrent requests allowed against a single host
+PER_HOST_LIMIT = 8
+# Per-host overrides for PER_HOST_LIMIT, keyed by hostname
+HOST_LIMITS = {}
+# Average requests per second sent to a single host (None: no rate limit)
+HOST_RATE = 20.0
+# Requests a host may receive back to back before HOST_RATE applies
+HOST_BURST = 10
+# Per-host overrides for HOST_RATE, keyed by hostname
+HOST_RATES = {}
+# Longest Retry-After (in seconds) a host may pause our requests for
+MAX_RETRY_AFTER = 120
+# Retry policy shared by every scraper: statuses worth another try, attempts
+# per request, and seconds a request may take in total, backoff included
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_ATTEMPTS = 4
+RETRY_BUDGET = 90.0
+# Backoff before retry n is random between 0 and min(BACKOFF_MAX, BACKOFF_BASE * 2 ** n)
+# seconds, or at least the Retry-After the server asked for
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 20.0
+# Consecutive failures (connection errors, timeouts, 5xx) after which a host's
+# circuit opens and its requests fail at once, and how long it stays open
+# before a probe request is let through (doubling up to BREAKER_MAX_COOLDOWN)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 300.0
+# Seconds an idle pooled connection is kept open for reuse
+KEEPALIVE_TIMEOUT = 60
+DEFAULT_TIMEOUT = 30
+# Keep GET responses in the on-disk ResponseCache and revalidate them on reuse
+CACHE_ENABLED = True
+# Optional callable mapping a request URL to the URL actually contacted; used by
+# the offline benchmark to send every scraper to a local stand-in server
+URL_REWRITE = None
+
+
+class FetchError(Exception):
+    """Raised when a request could not be completed (connection error, timeout, ...)."""
+
+
+class CircuitOpenError(FetchError):
+    """Raised without contacting a host whose circuit breaker is open."""
+
+
+class Response:
+    """
+    Downloaded HTTP response, exposing the parts of requests.Response the scrapers use.
+    """
+
+    def __init__(self, url, status_code, headers, content, encoding=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        # True when the body came from the ResponseCache (fresh hit or 304 revalidation)
+        self.from_cache = from_cache
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Build a Response from a ResponseCache entry."""
+        headers = entry['headers']
+        return cls(entry['url'], entry['status'], headers, entry['body'],
+                   _charset(headers.get('Content-Type', '')), from_cache=True)
+
+    @property
+    def text(self):
+        """Body decoded with the charset announced by the server (UTF-8 otherwise)."""
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+def retry_after_seconds(value):
+    """Seconds to wait for a Retry-After header value (delta-seconds or HTTP date); None if unparseable."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Request rate limit of one host: rate requests per second on average, with
+    bursts of up to burst requests. pause() holds every request back, e.g.
+    for as long as a Retry-After header asks. Used inside the engine loop only.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Send nothing to this host for the next seconds, then restart without a burst."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self.updated = self.paused_until
+
+    async def acquire(self):
+        """Wait until a request may be sent to this host."""
+        # The lock hands out tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                if not self.rate:
+                    return
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """
+    Failure detector of one host. After threshold consecutive failures the
+    circuit opens and allow() refuses requests; once cooldown seconds have
+    passed, a single probe request is allowed, which closes the circuit on
+    success or re-opens it for twice as long on failure. Used inside the
+    engine loop only.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = None
+        self.probing = False
+
+    @property
+    def is_open(self):
+        return self.open_until is not None
+
+    def allow(self):
+        """Whether a request may be sent now."""
+        if self.open_until is None:
+            return True
+        if self.probing or time.monotonic() < self.open_until:
+            return False
+        self.probing = True
+        return True
+
+    def success(self):
+        self.failures = 0
+        self.open_until = None
+        self.probing = False
+        self.cooldown = self.base_cooldown
+
+    def failure(self):
+        """Record a failed request; True when this opened the circuit."""
+        self.failures += 1
+        if self.probing:
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN)
+        elif self.open_until is not None or not self.threshold or self.failures < self.threshold:
+            return False
+        self.probing = False
+        self.open_until = time.monotonic() + self.cooldown
+        return True
+
+    def release(self):
+        """End a request that neither proved nor disproved the host is up (e.g. a 429)."""
+        self.probing = False
+
+
+def _charset(content_type):
+    for part in content_type.split(';')[1:]:
+        key, _, value = part.strip().partition('=')
+        if key.lower() == 'charset' and value:
+            return value.strip('"\'')
+    return None
+
+
+class FetchEngine:
+    """
+    Shared asyncio HTTP engine running on a background event loop.
+
+    All requests go through one pooled keep-alive connector, are capped globally
+    by MAX_IN_FLIGHT and per host by PER_HOST_LIMIT / HOST_LIMITS, and are
+    spaced out per host by a TokenBucket (HOST_RATE / HOST_RATES). A 429 or
+    503 with Retry-After pauses every request to that host until then.
+    Failed requests are retried under one policy (RETRY_ATTEMPTS within
+    RETRY_BUDGET seconds, jittered exponential backoff), and a per-host
+    CircuitBreaker makes requests to a host that keeps failing fail fast. The blocking
+    helpers (get, post, fetch_all) can be called from any scraper thread.
+    When a ResponseCache is given, GET responses are served from it or
+    revalidated with conditional requests. Every request is recorded in the
+    process metrics under the scraper that made it (or its host).
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, per_host=PER_HOST_LIMIT, host_limits=None, cache=None,
+                 host_rate=HOST_RATE, host_burst=HOST_BURST, host_rates=None):
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self._session = None
+        self._in_flight = None
+        self._host_slots = {}
+        self._buckets = {}
+        self._breakers = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="FetchEngine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _get_session(self):
+        """Create the pooled session on first use (must run inside the engine loop)."""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_in_flight,
+                limit_per_host=0,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        return self._session
+
+    def _host_slot(self, host):
+        """Semaphore limiting concurrent requests against one host."""
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = asyncio.Semaphore(self.host_limits.get(host, self.per_host))
+            self._host_slots[host] = slot
+        return slot
+
+    def _bucket(self, host):
+        """TokenBucket spacing out the requests sent to one host."""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.host_rates.get(host, self.host_rate), self.host_burst)
+            self._buckets[host] = bucket
+        return bucket
+
+    def _breaker(self, host):
+        """CircuitBreaker of one host."""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_COOLDOWN)
+            self._breakers[host] = breaker
+        return breaker
+
+    async def request(self, method, url, headers=None, data=None, timeout=DEFAULT_TIMEOUT, cache=True, site=None,
+                      budget=None):
+        """
+        Perform a request, with retries, and return a fully read Response.
+        timeout bounds each attempt and budget (default RETRY_BUDGET) all of
+        them; cache=False bypasses the ResponseCache; site names the scraper
+        in the metrics. Raises FetchError when no response was received.
+        """
+        site = site or urlsplit(url).hostname or ""
+        budget = RETRY_BUDGET if budget is None else budget
+        if self.cache is None or method != "GET" or not cache:
+            return await self._send(method, url, headers, data, timeout, site, budget)
+
+        loop = asyncio.get_running_loop()
+        entry = await loop.run_in_executor(None, self.cache.lookup, url)
+        if entry is not None:
+            if self.cache.is_fresh(entry):
+                metrics.get_metrics().count(site, 'cache_hits')
+                return Response.from_entry(entry)
+            headers = {**(headers or {}), **self.cache.conditional_headers(entry)}
+
+        response = await self._send(method, url, headers, data, timeout, site, budget)
+        if response.status_code == 304 and entry is not None:
+            metrics.get_metrics().count(site, 'cache_hits')
+            await loop.run_in_executor(None, self.cache.touch, url, response.headers)
+            return Response.from_entry(entry)
+        if response.status_code == 200:
+            await loop.run_in_executor(
+                None, self.cache.store, url, response.status_code, response.headers, response.content
+            )
+        return response
+
+    async def _send(self, method, url, headers, data, timeout, site, budget):
+        """Send a request under the retry policy and the host's circuit breaker."""
+        host = urlsplit(url).hostname or ""
+        breaker = self._breaker(host)
+        stats = metrics.get_metrics()
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                stats.count(site, 'short_circuited')
+                raise CircuitOpenError(f"{method} {url} not sent: {host} keeps failing (circuit open)")
+            attempt += 1
+            response = error = None
+            try:
+                response = await self._attempt(
+                    method, url, headers, data, max(0.1, min(timeout, deadline - time.monotonic())), site, host
+                )
+            except FetchError as e:
+                error = e
+
+            if error is not None or response.status_code >= 500:
+                if breaker.failure():
+                    logger.warning(f"{host} failed {breaker.failures} times in a row; "
+                                   f"failing its requests fast for {breaker.cooldown:.0f}s")
+            elif response.status_code == 429:
+                breaker.release()
+            else:
+                breaker.success()
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                return response
+            delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+            if response is not None and response.status_code in (429, 503):
+                retry_after = retry_after_seconds(response.headers.get('Retry-After'))
+                if retry_after:
+                    delay = max(delay, min(retry_after, MAX_RETRY_AFTER))
+            if attempt >= RETRY_ATTEMPTS or breaker.is_open or time.monotonic() + delay >= deadline:
+                if error is not None:
+                    raise error
+                return response
+            reason = str(error) if error is not None else f"status {response.status_code}"
+            logger.info(f"Retrying {url} in {delay:.1f}s ({reason}; attempt {attempt}/{RETRY_ATTEMPTS})")
+            stats.count(site, 'retries')
+            await asyncio.sleep(delay)
+
+    async def _attempt(self, method, url, headers, data, timeout, site, host):
+        session = self._get_session()
+        target = URL_REWRITE(url) if URL_REWRITE is not None else url
+        bucket = self._bucket(host)
+        stats = metrics.get_metrics()
+        # Wait for the host's rate limit before taking a connection slot
+        with stats.span(site, 'rate_wait'):
+            await bucket.acquire()
+        async with self._in_flight, self._host_slot(host):
+            stats.count(site, 'requests')
+            start = time.perf_counter()
+            try:
+                async with session.request(
+                    method, target, headers=headers, data=data,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as resp:
+                    content = await resp.read()
+                    final_url = str(resp.url) if target == url else url
+                    response = Response(final_url, resp.status, resp.headers, content, resp.charset)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                stats.count(site, 'errors')
+                raise FetchError(f"{method} {url} failed: {type(e).__name__}: {str(e)}") from e
+            finally:
+                stats.observe(site, 'fetch', time.perf_counter() - start)
+        stats.count(site, 'bytes', len(response.content))
+        if response.status_code == 200:
+            stats.count(site, 'pages')
+        elif response.status_code == 429:
+            stats.count(site, 'throttled')
+        elif response.status_code >= 500:
+            stats.count(site, 'server_errors')
+        if response.status_code in (429, 503):
+            delay = retry_after_seconds(response.headers.get('Retry-After'))
+            if delay:
+                delay = min(delay, MAX_RETRY_AFTER)
+                logger.warning(f"{host} answered {response.status_code}; pausing requests to it for {delay:.1f}s")
+                bucket.pause(delay)
+        return response
+
+    async def _gather(self, urls, headers=None, headers_for=None, **kwargs):
+        return await asyncio.gather(
+            *(self.request("GET", url, headers={**(headers or {}), **headers_for(url)} if headers_for else headers,
+                           **kwargs) for url in urls),
+            return_exceptions=True
+        )
+
+    def run(self, coro):
+        """Run a coroutine on the engine loop and block until it completes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def get(self, url, **kwargs):
+        """Blocking GET through the shared engine."""
+        kwargs.setdefault('site', metrics.current_site())
+        return self.run(self.request("GET", url, **kwargs))
+
+    def post(self, url, data=None, **kwargs):
+        """Blocking POST through the shared engine."""
+        kwargs.setdefault('site', metrics.current_site())
+        return self.run(self.request("POST", url, data=data, **kwargs))
+
+    def fetch_all(self, urls, **kwargs):
+        """
+        GET every URL concurrently. Returns one entry per URL, in order: either a
+        Response or the FetchError raised for it. headers_for(url), when given,
+        returns headers added to headers for that URL (e.g. validators).
+        """
+        kwargs.setdefault('site', metrics.current_site())
+        return self.run(self._gather(list(urls), **kwargs))
+
+    def close(self):
+        """Close pooled connections and stop the event loop."""
+        if not self._loop.is_running():
+            return
+        if self._session is not None:
+            try:
+                self.run(self._session.close())
+            except Exception as e:
+                logger.debug(f"Error closing fetch session: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide FetchEngine, starting it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = FetchEngine(
+                max_in_flight=MAX_IN_FLIGHT, per_host=PER_HOST_LIMIT,
+                cache=ResponseCache() if CACHE_ENABLED else None,
+                host_rate=HOST_RATE, host_burst=HOST_BURST
+            )
+            atexit.register(_engine.close)
+        return _engine
+
+
+def get(url, **kwargs):
+    """GET a URL through the shared engine."""
+    return get_engine().get(url, **kwargs)
+
+
+def post(url, data=None, **kwargs):
+    """POST to a URL through the shared engine."""
+    return get_engine().post(url, data=data, **kwargs)
+
+
+def fetch_all(urls, **kwargs):
+    """GET several URLs concurrently through the shared engine."""
+    return get_engine().fetch_all(urls, **kwargs)
@@ -0,0 +1,186 @@
+# scraper/frontier.py
+import logging
+import threading
+
+from scraper import metrics
+from scraper.database import Database
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+# Times a URL is tried, across resumed runs, before it stays failed
+MAX_ATTEMPTS = 3
+# State changes buffered before they are handed to the database writer; an
+# interruption loses at most this many, which the next run then redoes
+CHECKPOINT_EVERY = 50
+
+# Stop requests: one event per scraper, and one for every scraper at once
+_stops = {}
+_stop_all = threading.Event()
+_stops_lock = threading.Lock()
+
+
+def _stop_event(scraper):
+    with _stops_lock:
+        event = _stops.get(scraper)
+        if event is None:
+            event = _stops[scraper] = threading.Event()
+        return event
+
+
+def request_stop(scraper=None):
+    """Ask a running scraper (every scraper when None) to stop at its next page, keeping its frontier."""
+    if scraper is None:
+        _stop_all.set()
+    else:
+        _stop_event(scraper).set()
+    logger.info(f"Stop requested for {scraper or 'every scraper'}")
+
+
+def clear_stop(scraper):
+    """Forget a stop request for scraper, e.g. one made after it had already ended."""
+    _stop_event(scraper).clear()
+
+
+def stop_requested(scraper=None):
+    """Whether scraper (by default the one the calling thread works for) was asked to stop."""
+    scraper = scraper or metrics.current_site()
+    return _stop_all.is_set() or (scraper is not None and _stop_event(scraper).is_set())
+
+
+class Frontier:
+    """
+    Persistent crawl frontier of one scraper run.
+
+    Every URL (or other page key) the run has to visit is recorded as
+    pending, in flight, done or failed, in the frontier table. When a run
+    is interrupted (a crash, the app being closed, a stop request), the next
+    run of the scraper resumes it: done URLs are not visited again but kept
+    by the tracker, and in-flight or failed ones are retried. finish() ends
+    the run, dropping the frontier once every URL was visited without a
+    failure.
+    """
+
+    def __init__(self, tracker):
+        self.scraper = tracker.scraper
+        self.tracker = tracker
+        self.writer = tracker.writer
+        self._lock = threading.Lock()
+        self._urls = {}
+        self._dirty = {}
+        db = Database()
+        try:
+            rows = db.frontier(self.scraper)
+        finally:
+            db.close()
+        self.resumed = bool(rows)
+        for url, state, result, attempts in rows:
+            if state == IN_FLIGHT or (state == FAILED and attempts < MAX_ATTEMPTS):
+                state = PENDING
+            self._urls[url] = [state, result, attempts]
+            if state == DONE:
+                tracker.keep(url)
+        if self.resumed:
+            done = len(self.done_urls())
+            logger.info(f"{self.scraper}: resuming an interrupted run ({done} of {len(rows)} URLs already done)")
+
+    def _set(self, url, state, result=None, attempt=False):
+        with self._lock:
+            entry = self._urls.setdefault(url, [PENDING, None, 0])
+            entry[0] = state
+            if result is not None:
+                entry[1] = result
+            if attempt:
+                entry[2] += 1
+            self._dirty[url] = tuple(entry)
+            if len(self._dirty) >= CHECKPOINT_EVERY:
+                self._checkpoint()
+
+    def _checkpoint(self):
+        # Caller holds the lock; the writer runs the write after anything queued before it
+        if self._dirty:
+            rows = [(url,) + entry for url, entry in self._dirty.items()]
+            self._dirty = {}
+            self.writer.submit(lambda db: db.save_frontier(self.scraper, rows))
+
+    def checkpoint(self):
+        """Hand the buffered state changes to the database writer."""
+        with self._lock:
+            self._checkpoint()
+
+    def add(self, urls):
+        """Record URLs to visit; returns the ones the frontier did not know yet, in order."""
+        added = []
+        with self._lock:
+            for url in urls:
+                if url not in self._urls:
+                    entry = self._urls[url] = [PENDING, None, 0]
+                    self._dirty[url] = tuple(entry)
+                    added.append(url)
+            if len(self._dirty) >= CHECKPOINT_EVERY:
+                self._checkpoint()
+        return added
+
+    def start(self, url):
+        self._set(url, IN_FLIGHT, attempt=True)
+
+    def done(self, url, result=None):
+        """Record a visited URL, with an optional result code (e.g. the HTTP status)."""
+        self._set(url, DONE, result)
+
+    def fail(self, url):
+        """Record a URL that could not be loaded; the tracker keeps its stored doctors."""
+        self._set(url, FAILED)
+        self.tracker.fail(url)
+
+    def state(self, url):
+        with self._lock:
+            entry = self._urls.get(url)
+            return entry[0] if entry else None
+
+    def is_done(self, url):
+        return self.state(url) == DONE
+
+    def known(self):
+        """Every URL of the frontier, in the order it was added."""
+        with self._lock:
+            return list(self._urls)
+
+    def pending(self):
+        """URLs still to visit, in the order they were added."""
+        with self._lock:
+            return [url for url, entry in self._urls.items() if entry[0] == PENDING]
+
+    def done_urls(self):
+        """{url: result} of the URLs already visited."""
+        with self._lock:
+            return {url: entry[1] for url, entry in self._urls.items() if entry[0] == DONE}
+
+    @property
+    def stopping(self):
+        """Whether the run was asked to stop."""
+        return stop_requested(self.scraper)
+
+    def finish(self):
+        """
+        End the run and finish its tracker. A stopped run, or one in which a
+        URL failed, keeps its frontier (and its stored pages) for the next run
+        to resume; a complete one drops it. Returns True when the run was complete.
+        """
+        complete = not self.stopping and not self.tracker.failures
+        with self._lock:
+            if complete:
+                self._dirty = {}
+                self.writer.submit(lambda db: db.clear_frontier(self.scraper))
+            else:
+                self._checkpoint()
+        self.tracker.finish(complete=complete)
+        if not complete:
+            with self._lock:
+                left = sum(1 for entry in self._urls.values() if entry[0] != DONE)
+            logger.info(f"{self.scraper}: {left} URLs left unvisited or failed; the next run resumes from here")
+        clear_stop(self.scraper)
+        return complete
@@ -0,0 +1,256 @@
+# scraper/images.py
+"""
+Content-addressed store of the doctors' images.
+
+Images are normalized to JPEG thumbnails of at most THUMBNAIL_SIZE pixels
+with Pillow. Pillow is optional: without it images are stored as they were
+downloaded (any size, in their own format), and a warning says so once per
+process. Installing Pillow (pip install Pillow) only affects images stored
+from then on.
+"""
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import time
+
+from scraper import metrics
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Whether scraper runs also download their doctors' images into the store (cli --images)
+STORE_IMAGES = False
+STORE_DIR = "image_store"
+# Longest side of a stored thumbnail, in pixels (needs Pillow)
+THUMBNAIL_SIZE = 300
+THUMBNAIL_QUALITY = 85
+# Seconds after which a stored image URL is revalidated with a conditional request
+REVALIDATE_AFTER = 7 * 24 * 3600
+# Images requested at once; the fetch engine still spaces them out per host
+IMAGE_BATCH = 32
+IMAGE_TIMEOUT = 15
+IMAGE_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36"}
+# Metrics site of the downloads, so they do not count as the scraper's pages
+IMAGE_SITE = "images"
+SIGNATURES = ((b'\xff\xd8\xff', '.jpg'), (b'\x89PNG\r\n\x1a\n', '.png'), (b'GIF87a', '.gif'), (b'GIF89a', '.gif'))
+
+_pillow_warned = False
+
+
+def create_schema(cursor):
+    """Create the image store tables and the doctors.image_hash column linking a doctor to its image."""
+    # One row per distinct image content; file is relative to STORE_DIR
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS images (
+        hash TEXT PRIMARY KEY,
+        file TEXT NOT NULL,
+        bytes INTEGER,
+        created_at REAL
+        )
+    """)
+    # One row per image URL: the content it served last and its validators
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS image_sources (
+        url TEXT PRIMARY KEY,
+        hash TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        checked_at REAL
+        )
+    """)
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(doctors)")]
+    if 'image_hash' not in columns:
+        cursor.execute("ALTER TABLE doctors ADD COLUMN image_hash TEXT")
+
+
+def content_hash(data):
+    """Content address of downloaded image data."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _extension(data):
+    for signature, extension in SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+def normalize(data):
+    """(bytes, extension) of the thumbnail stored for downloaded data, or None when it is not an image."""
+    extension = _extension(data)
+    if extension is None:
+        return None
+    if Image is None:
+        return data, extension
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            thumbnail = image.convert('RGB')
+            thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            out = io.BytesIO()
+            thumbnail.save(out, 'JPEG', quality=THUMBNAIL_QUALITY, optimize=True)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read image data: {str(e)}")
+        return None
+    return out.getvalue(), '.jpg'
+
+
+def _warn_without_pillow():
+    global _pillow_warned
+    if Image is None and not _pillow_warned:
+        _pillow_warned = True
+        logger.warning("Pillow is not installed: thumbnails are disabled and images are stored as downloaded "
+                       "(pip install Pillow)")
+
+
+def _save(root, digest, data, extension):
+    """Write a thumbnail under root, unless it is there already; returns its path relative to root."""
+    relative = os.path.join(digest[:2], digest + extension)
+    path = os.path.join(root, relative)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f"{path}.part"
+        with open(partial, 'wb') as f:
+            f.write(data)
+        os.replace(partial, path)
+    return relative
+
+
+def stored_file(conn, url, root=STORE_DIR):
+    """Path of the stored image for url, or None when the store does not have it."""
+    try:
+        row = conn.execute("""
+            SELECT images.file FROM image_sources JOIN images ON images.hash = image_sources.hash
+            WHERE image_sources.url = ?
+        """, (url,)).fetchone()
+    except sqlite3.Error:
+        return None
+    if row is None:
+        return None
+    path = os.path.join(root, row[0])
+    return path if os.path.exists(path) else None
+
+
+def save_images(conn, images, sources):
+    """Record new (hash, file, bytes, created_at) images and (url, hash, etag, last_modified, checked_at) sources."""
+    conn.executemany("INSERT OR IGNORE INTO images (hash, file, bytes, created_at) VALUES (?, ?, ?, ?)", images)
+    conn.executemany("""
+        INSERT INTO image_sources (url, hash, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+        hash = excluded.hash, etag = excluded.etag, last_modified = excluded.last_modified, checked_at = excluded.checked_at
+    """, sources)
+    conn.commit()
+
+
+def link_doctors(conn):
+    """Point every doctor at the stored image of its image_url; returns the rows changed."""
+    cursor = conn.execute("""
+        UPDATE doctors SET image_hash = (SELECT hash FROM image_sources WHERE url = doctors.image_url)
+        WHERE image_hash IS NOT (SELECT hash FROM image_sources WHERE url = doctors.image_url)
+    """)
+    conn.commit()
+    return cursor.rowcount
+
+
+def _sources(conn, scraper):
+    """[(url, hash, etag, last_modified, checked_at)] of the image URLs of scraper's doctors."""
+    return conn.execute("""
+        SELECT DISTINCT doctors.image_url, image_sources.hash, image_sources.etag,
+        image_sources.last_modified, image_sources.checked_at
+        FROM doctors JOIN pages ON pages.page_key = doctors.page_key
+        LEFT JOIN image_sources ON image_sources.url = doctors.image_url
+        WHERE pages.scraper = ? AND doctors.image_url LIKE 'http%'
+    """, (scraper,)).fetchall()
+
+
+def store_images(scraper, root=STORE_DIR):
+    """
+    Download the images of scraper's stored doctors into the content-addressed
+    store under root, and link them from the doctors rows.
+
+    Only new image URLs are downloaded; stored ones are revalidated with
+    their ETag / Last-Modified once REVALIDATE_AFTER has passed, and re-read
+    only when the server has changed them. Images with the same content are
+    stored once. Returns the number of images downloaded.
+    """
+    from scraper import fetch
+    from scraper.database import Database, get_writer
+    from scraper.frontier import stop_requested
+
+    db = Database()
+    try:
+        sources = _sources(db.conn, scraper)
+        stored = dict(db.conn.execute("SELECT hash, file FROM images"))
+    finally:
+        db.close()
+
+    now = time.time()
+    wanted = {}
+    for url, digest, etag, last_modified, checked_at in sources:
+        present = digest is not None and digest in stored and os.path.exists(os.path.join(root, stored[digest]))
+        if checked_at is not None and now - checked_at < REVALIDATE_AFTER and (digest is None or present):
+            continue
+        validators = {}
+        if present:
+            if etag:
+                validators['If-None-Match'] = etag
+            if last_modified:
+                validators['If-Modified-Since'] = last_modified
+        wanted[url] = (digest, validators)
+    if not wanted:
+        logger.info(f"{scraper}: all {len(sources)} doctor images are stored")
+        return 0
+
+    logger.info(f"{scraper}: fetching {len(wanted)} of {len(sources)} doctor images")
+    _warn_without_pillow()
+    writer = get_writer()
+    urls = list(wanted)
+    downloaded = unchanged = failed = 0
+    with metrics.get_metrics().site(IMAGE_SITE):
+        for start in range(0, len(urls), IMAGE_BATCH):
+            if stop_requested(scraper):
+                logger.info(f"{scraper}: stop requested; leaving the remaining images for the next run")
+                break
+            batch = urls[start:start + IMAGE_BATCH]
+            responses = fetch.fetch_all(batch, headers=IMAGE_HEADERS, headers_for=lambda url: wanted[url][1],
+                                        timeout=IMAGE_TIMEOUT, cache=False)
+            new_images, checked = [], []
+            for url, response in zip(batch, responses):
+                if isinstance(response, fetch.FetchError) or response.status_code not in (200, 304):
+                    failed += 1
+                    logger.debug(f"Could not fetch image {url}: {response if isinstance(response, fetch.FetchError) else response.status_code}")
+                    continue
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                checked_at = time.time()
+                if response.status_code == 304:
+                    unchanged += 1
+                    checked.append((url, wanted[url][0], etag, last_modified, checked_at))
+                    continue
+                digest = content_hash(response.content)
+                if digest not in stored or not os.path.exists(os.path.join(root, stored[digest])):
+                    thumbnail = normalize(response.content)
+                    if thumbnail is None:
+                        # Recorded without an image, so it is not tried again before it is revalidated
+                        logger.debug(f"Not an image: {url}")
+                        failed += 1
+                        checked.append((url, None, etag, last_modified, checked_at))
+                        continue
+                    stored[digest] = _save(root, digest, *thumbnail)
+                    new_images.append((digest, stored[digest], len(thumbnail[0]), checked_at))
+                downloaded += 1
+                checked.append((url, digest, etag, last_modified, checked_at))
+            writer.submit(lambda db, new_images=new_images, checked=checked: save_images(db.conn, new_images, checked))
+
+    writer.submit(lambda db: link_doctors(db.conn))
+    writer.flush()
+    logger.info(f"{scraper}: images: {downloaded} downloaded, {unchanged} unchanged, {failed} failed "
+                f"({len(stored)} distinct images stored)")
+    return downloaded
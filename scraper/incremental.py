@@ -0,0 +1,161 @@
+# scraper/incremental.py
+import hashlib
+import logging
+import threading
+import time
+
+from scraper import dedup, metrics
+from scraper.database import Database, get_writer
+
+logger = logging.getLogger(__name__)
+
+# Most recent finished PageTracker of every scraper, for run summaries
+_last_runs = {}
+_last_runs_lock = threading.Lock()
+
+
+def fingerprint(content):
+    """Stable hash of a page body."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class ChangeSet:
+    """Doctors added, updated and removed for one source during a run."""
+
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.removed = []
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def summary(self):
+        return f"{len(self.added)} added, {len(self.updated)} updated, {len(self.removed)} removed"
+
+
+class PageTracker:
+    """
+    Incremental re-scrape state of one scraper for one run.
+
+    unchanged() compares a downloaded page with the fingerprint stored last
+    time, so callers can skip parsing it. commit() hands the parsed doctors of
+    a changed page to the database writer, which stores only the differences.
+    fail() records a page that could not be loaded. finish() drops pages that
+    disappeared from the site, after a run in which no page failed, and
+    returns the resulting ChangeSet. With single_record, every page is one
+    doctor's detail page, so a page that parses empty removes its doctor.
+    """
+
+    def __init__(self, scraper, writer=None, single_record=False):
+        self.scraper = scraper
+        self.writer = writer or get_writer()
+        self.single_record = single_record
+        self.changes = ChangeSet()
+        self.skipped = 0
+        self.failures = 0
+        # Whether the run saw the whole site, set by finish()
+        self.complete = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._seen = set()
+        self._fetched = 0
+        db = Database()
+        try:
+            self._known = db.page_hashes(scraper)
+        finally:
+            db.close()
+
+    def unchanged(self, page_key, content):
+        """Record a downloaded page; True if it is identical to the stored version."""
+        content_hash = fingerprint(content)
+        with self._lock:
+            self._seen.add(page_key)
+            self._fetched += 1
+            if self._known.get(page_key) == content_hash:
+                self.skipped += 1
+                return True
+            self._pending[page_key] = content_hash
+            return False
+
+    def keep(self, page_key):
+        """Mark a page as still present without changing it (e.g. the download failed)."""
+        with self._lock:
+            self._seen.add(page_key)
+
+    def fail(self, page_key):
+        """
+        Record a page whose download failed: its stored doctors are kept, and
+        since the run did not see the whole site, no stale page is removed.
+        """
+        with self._lock:
+            self._seen.add(page_key)
+            self.failures += 1
+
+    def commit(self, page_key, doctors):
+        """Store the doctors parsed from a changed page. Pages that were not downloaded are kept as they are."""
+        with self._lock:
+            self._seen.add(page_key)
+            content_hash = self._pending.pop(page_key, None)
+        if content_hash is None:
+            return
+        doctors = list(doctors)
+        self.writer.submit(lambda db: self._apply(db, page_key, content_hash, doctors), batch=True)
+
+    def _apply(self, db, page_key, content_hash, doctors):
+        start = time.perf_counter()
+        added, updated, removed = db.apply_page(
+            self.scraper, page_key, content_hash, doctors, commit=False, single_record=self.single_record
+        )
+        stats = metrics.get_metrics()
+        stats.observe(self.scraper, 'insert', time.perf_counter() - start)
+        stats.count(self.scraper, 'rows', len(added) + len(updated) + len(removed))
+        with self._lock:
+            self.changes.added.extend(added)
+            self.changes.updated.extend(updated)
+            self.changes.removed.extend(removed)
+
+    def finish(self, complete=True):
+        """
+        Remove pages not seen in this run, wait for the writer and return the
+        ChangeSet. An incomplete (stopped) run, or one in which a page failed,
+        did not see every page, so it removes none.
+        """
+        with self._lock:
+            seen = set(self._seen)
+            fetched = self._fetched
+            failures = self.failures
+            self.complete = complete
+        if fetched:
+            if complete and not failures:
+                self.writer.submit(lambda db: self._remove_stale(db, seen))
+            elif failures:
+                logger.warning(f"{self.scraper}: {failures} pages failed to load, keeping stored pages not seen in this run")
+            # Fold this run's new and changed doctors into the cross-source clusters
+            self.writer.submit(lambda db: dedup.update_clusters(db.conn))
+        elif complete:
+            logger.warning(f"{self.scraper}: no page was downloaded, keeping previously stored doctors")
+        self.writer.flush()
+        logger.info(f"{self.scraper}: {self.changes.summary()} ({self.skipped} unchanged pages skipped)")
+        with _last_runs_lock:
+            _last_runs[self.scraper] = self
+        return self.changes
+
+    @property
+    def fetched(self):
+        """Number of pages downloaded in this run."""
+        with self._lock:
+            return self._fetched
+
+    def _remove_stale(self, db, seen):
+        removed = db.remove_pages(self.scraper, seen)
+        with self._lock:
+            self.changes.removed.extend(removed)
+
+
+def last_run(scraper):
+    """The most recently finished PageTracker of scraper in this process, or None."""
+    with _last_runs_lock:
+        return _last_runs.get(scraper)
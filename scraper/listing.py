@@ -0,0 +1,214 @@
+# scraper/listing.py
+import logging
+import re
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import soupsieve
+
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper.pagination import crawl, next_links
+from scraper.parsing import PAGINATION_LINKS, listing_soup
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+    "Connection": "keep-alive",
+}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+REQUIRED_FIELDS = ('name', 'specialty', 'location', 'profile_url', 'image_url', 'source')
+BACKGROUND_IMAGE = re.compile(r'background-image:\s*url\((.*?)\)')
+
+
+def _compile(selector):
+    return soupsieve.compile(selector) if selector else None
+
+
+def _collapse_slashes(url):
+    """url with runs of slashes in its path collapsed to one."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=re.sub(r'/+', '/', parts.path)))
+
+
+def _default_valid_name(name):
+    return bool(name) and name != "N/A"
+
+
+class ListingSpec:
+    """
+    Declarative description of a hospital site whose doctors are listed as
+    cards on one or more listing pages. parse() and scrape() then give every
+    such site the same fetch, parse and store path.
+
+    Selectors are CSS, compiled once per process:
+      listing: SoupStrainer of the elements holding the cards (fast parsing)
+      item: one doctor card, within the page
+      name / specialty / profile / image: elements within a card
+    image_attrs are tried in order; the first value that is not an inline
+    data: URI wins ("style" reads a background-image URL). specialty_keywords
+    turns the specialty element's text into the keywords it mentions;
+    specialty_words=True joins the text of its child elements with spaces.
+    """
+
+    def __init__(self, module, label, start_url, base_url, location, listing, item, name, profile,
+                 specialty=None, image=None, image_attrs=('src',), image_extensions=IMAGE_EXTENSIONS,
+                 specialty_keywords=None, specialty_words=False, valid_name=None, collapse_slashes=False,
+                 headers=None, parser='lxml'):
+        self.module = module
+        self.label = label
+        self.start_url = start_url
+        self.base_url = base_url
+        self.location = location
+        self.listing = listing
+        self.item = _compile(item)
+        self.name = _compile(name)
+        self.profile = _compile(profile)
+        self.specialty = _compile(specialty)
+        self.image = _compile(image)
+        self.image_attrs = tuple(image_attrs)
+        self.image_extensions = tuple(image_extensions)
+        self.specialty_keywords = [
+            (keyword, re.compile(r'\b' + re.escape(keyword) + r'\b')) for keyword in specialty_keywords or ()
+        ]
+        self.specialty_words = specialty_words
+        self.valid_name = valid_name or _default_valid_name
+        self.collapse_slashes = collapse_slashes
+        self.headers = headers or DEFAULT_HEADERS
+        self.parser = parser
+        # Logged under the scraper module, like the rest of its run
+        self.logger = logging.getLogger(f"scraper.scrapers.{module}")
+        self.diagnostics = Diagnostics(self.logger)
+
+    def _url(self, href):
+        url = urljoin(self.base_url, href)
+        return _collapse_slashes(url) if self.collapse_slashes else url
+
+    def _specialty(self, item):
+        elem = self.specialty.select_one(item) if self.specialty is not None else None
+        if elem is None:
+            text = ""
+        elif self.specialty_words:
+            text = ' '.join(elem.get_text(separator=' ').split())
+        else:
+            text = elem.text.strip()
+        if self.specialty_keywords:
+            lowered = text.lower()
+            text = " ".join(keyword for keyword, pattern in self.specialty_keywords if pattern.search(lowered))
+        return text or "N/A"
+
+    def _image(self, item, name, page_url):
+        if self.image is None:
+            return "N/A"
+        img = self.image.select_one(item)
+        if img is None:
+            self.diagnostics.warning("No image element found for %s on %s.", name, page_url, html=item)
+            return "N/A"
+        for attr in self.image_attrs:
+            value = img.get(attr, '')
+            if attr == 'style':
+                match = BACKGROUND_IMAGE.search(value)
+                value = match.group(1).strip('\'"') if match else ''
+            if value and not value.startswith('data:image'):
+                break
+        else:
+            self.diagnostics.warning("No valid image source for %s on %s.", name, page_url, html=img)
+            return "N/A"
+        url = self._url(value)
+        if not url.lower().endswith(self.image_extensions):
+            self.diagnostics.warning("Invalid image extension for %s on %s. Src: %.50s...", name, page_url, value)
+            return "N/A"
+        return url
+
+    def parse(self, content, page_url):
+        """The doctors of a listing page, and its pagination links."""
+        soup = listing_soup(content, self.parser, self.listing, PAGINATION_LINKS)
+        items = self.item.select(soup)
+        self.logger.debug("Found %d doctor items on %s", len(items), page_url)
+
+        doctors = []
+        for item in items:
+            try:
+                elem = self.name.select_one(item)
+                name = elem.text.strip() if elem is not None else ""
+                if not self.valid_name(name):
+                    self.diagnostics.warning("Skipping doctor with invalid name '%s' on %s.", name, page_url, html=item)
+                    continue
+
+                link = self.profile.select_one(item)
+                href = link.get('href') if link is not None else None
+                if not href:
+                    self.diagnostics.warning("Skipping doctor with invalid profile URL for %s on %s.", name, page_url, html=item)
+                    continue
+
+                doctors.append({
+                    'name': name,
+                    'specialty': self._specialty(item),
+                    'location': self.location,
+                    'profile_url': self._url(href),
+                    'image_url': self._image(item, name, page_url),
+                    'source': page_url
+                })
+            except Exception as e:
+                self.diagnostics.warning("Error parsing doctor on %s: %s.", page_url, e, html=item)
+                self.logger.debug("Stack trace", exc_info=True)
+
+        self.logger.info("Extracted %s valid doctors from %s", len(doctors), page_url)
+        return doctors, next_links(soup, page_url)
+
+
+def scrape(spec, parse_page):
+    """
+    Scrape every listing page of spec's site into the database.
+
+    parse_page(content, page_url) is the scraper module's function calling
+    spec.parse(), so the parsing processes can import it by name.
+    """
+    log = spec.logger
+    log.info("Starting %s doctor scraping process", spec.label)
+
+    # Shared database writer and incremental page tracker
+    writer = None
+    try:
+        writer = get_writer()
+        tracker = PageTracker(spec.module, writer)
+        frontier = Frontier(tracker)
+    except Exception as e:
+        log.error("Failed to initialize database: %s", e, exc_info=True)
+        return
+
+    total_doctors = 0
+    try:
+        # Follow the listing's pages, several at a time
+        for page_url, doctors in crawl(spec.start_url, parse_page, tracker, headers=spec.headers, frontier=frontier):
+            log.info("Scraped page: %s", page_url)
+            if doctors is None:
+                # Unchanged, or failed to load: the stored doctors stay as they are
+                continue
+            if not doctors:
+                log.warning("No valid doctors found on %s.", page_url)
+
+            # Hand complete doctors to the tracker, which writes only what changed
+            valid_doctors = []
+            for doctor in doctors:
+                missing_fields = [field for field in REQUIRED_FIELDS if not doctor.get(field)]
+                if missing_fields:
+                    log.warning("Skipping insertion for %s due to missing fields: %s. Doctor data: %s",
+                                doctor.get('name', 'Unknown'), missing_fields, doctor)
+                    continue
+                valid_doctors.append(doctor)
+            total_doctors += len(valid_doctors)
+            tracker.commit(page_url, valid_doctors)
+        if frontier.finish():
+            log.info("%s doctor scraping completed. Total doctors added: %s", spec.label, total_doctors)
+        else:
+            log.info("%s doctor scraping stopped. Total doctors added: %s", spec.label, total_doctors)
+
+    except Exception as e:
+        log.error("Unexpected error during scraping: %s", e, exc_info=True)
+    finally:
+        if writer is not None:
+            try:
+                writer.flush()
+            except Exception as e:
+                log.error("Error flushing database writer: %s", e, exc_info=True)
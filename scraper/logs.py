@@ -0,0 +1,230 @@
+# scraper/logs.py
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+from scraper import metrics
+
+logger = logging.getLogger(__name__)
+
+# Directory holding one subdirectory of structured log files per run
+LOG_DIR = "logs"
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+# Characters of an element's HTML attached to a diagnostic
+SNIPPET_CHARS = 200
+# Diagnostics of one kind logged per window; the rest are counted and reported with the next one
+DIAGNOSTIC_BURST = 5
+DIAGNOSTIC_WINDOW = 60.0
+SCRAPER_LOGGERS = "scraper.scrapers."
+
+
+class _Snippet:
+    """The start of an element's HTML, serialized only when a record is formatted."""
+    __slots__ = ('element', 'limit')
+
+    def __init__(self, element, limit):
+        self.element = element
+        self.limit = limit
+
+    def __str__(self):
+        return f"{str(self.element)[:self.limit]}..."
+
+
+def snippet(element, limit=SNIPPET_CHARS):
+    """Lazy %s argument for the HTML of a BeautifulSoup element."""
+    return _Snippet(element, limit)
+
+
+class Diagnostics:
+    """
+    Rate-limited diagnostics for a scraper's per-doctor parse loops.
+
+    Messages are %-formatted by the logging handlers, so a dropped message
+    costs nothing. Each message template is logged at most DIAGNOSTIC_BURST
+    times per DIAGNOSTIC_WINDOW seconds; the next one logged says how many
+    were suppressed. The HTML of the element passed as html= is attached
+    only when the logger is enabled for DEBUG.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def _allow(self, template):
+        """(allowed, suppressed so far) for one more message of template."""
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(template)
+            if window is None or now - window[0] >= DIAGNOSTIC_WINDOW:
+                suppressed = window[2] if window else 0
+                self._windows[template] = [now, 1, 0]
+                return True, suppressed
+            if window[1] < DIAGNOSTIC_BURST:
+                window[1] += 1
+                suppressed, window[2] = window[2], 0
+                return True, suppressed
+            window[2] += 1
+            return False, 0
+
+    def log(self, level, msg, *args, html=None):
+        if not self.logger.isEnabledFor(level):
+            return
+        allowed, suppressed = self._allow(msg)
+        if not allowed:
+            return
+        if html is not None and self.logger.isEnabledFor(logging.DEBUG):
+            msg += " HTML: %s"
+            args += (snippet(html),)
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args)
+
+    def info(self, msg, *args, html=None):
+        self.log(logging.INFO, msg, *args, html=html)
+
+    def warning(self, msg, *args, html=None):
+        self.log(logging.WARNING, msg, *args, html=html)
+
+
+def site_of(record):
+    """Scraper a record belongs to: the module it was logged from, else the one the thread works for."""
+    if record.name.startswith(SCRAPER_LOGGERS):
+        return record.name[len(SCRAPER_LOGGERS):].split('.', 1)[0]
+    return metrics.current_site()
+
+
+class _SiteFilter(logging.Filter):
+    # Runs in the thread that logged, where the current scraper is still known
+    def filter(self, record):
+        record.site = site_of(record)
+        return True
+
+
+class RunFiles(logging.Handler):
+    """
+    Writes every record as one JSON object per line to LOG_DIR/<run>/<site>.jsonl
+    (run.jsonl for records of no scraper).
+    """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self._files = {}
+
+    def _file(self, site):
+        f = self._files.get(site)
+        if f is None:
+            os.makedirs(self.directory, exist_ok=True)
+            f = self._files[site] = open(os.path.join(self.directory, f"{site or 'run'}.jsonl"), 'a', encoding='utf-8')
+        return f
+
+    def emit(self, record):
+        try:
+            entry = {
+                "time": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "site": getattr(record, 'site', None),
+                "thread": record.threadName,
+                "message": record.getMessage(),
+            }
+            self._file(entry["site"]).write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        super().close()
+
+
+class _Listener(logging.handlers.QueueListener):
+    """QueueListener that also answers flush markers (threading.Events) put on its queue."""
+
+    def handle(self, record):
+        if isinstance(record, threading.Event):
+            for handler in self.handlers:
+                handler.flush()
+            record.set()
+            return
+        super().handle(record)
+
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+run_dir = None
+
+
+def start(level=logging.INFO, stream=None, log_dir=LOG_DIR, fmt=CONSOLE_FORMAT):
+    """
+    Route the process's logging through a background thread. Loggers only
+    queue their records; the thread writes them to this run's structured log
+    files and, when a stream is given, to that stream. Starting twice does
+    nothing. Returns the run's log directory.
+    """
+    global _listener, _handler, run_dir
+    with _lock:
+        if _listener is not None:
+            return run_dir
+        run_dir = os.path.join(log_dir, time.strftime('%Y%m%d-%H%M%S'))
+        handlers = [RunFiles(run_dir)]
+        if stream is not None:
+            console = logging.StreamHandler(stream)
+            console.setFormatter(logging.Formatter(fmt))
+            handlers.append(console)
+        records = queue.SimpleQueue()
+        _handler = logging.handlers.QueueHandler(records)
+        _handler.addFilter(_SiteFilter())
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(level)
+        _listener = _Listener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop)
+    logger.info(f"Writing this run's logs to {run_dir}")
+    return run_dir
+
+
+def add_handler(handler):
+    """Also hand the queued records to handler (e.g. a GUI console), on the logging thread."""
+    with _lock:
+        if _listener is None:
+            logging.getLogger().addHandler(handler)
+        else:
+            _listener.handlers = _listener.handlers + (handler,)
+
+
+def flush(timeout=5.0):
+    """Wait until the records logged so far are written."""
+    listener = _listener
+    if listener is not None:
+        done = threading.Event()
+        listener.queue.put(done)
+        done.wait(timeout)
+
+
+def stop():
+    """Write the queued records and close this run's log files."""
+    global _listener, _handler
+    with _lock:
+        listener, _listener = _listener, None
+        if _handler is not None:
+            logging.getLogger().removeHandler(_handler)
+            _handler = None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
@@ -0,0 +1,231 @@
+# scraper/metrics.py
+import bisect
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets (Prometheus style)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Timed stages of a scrape: downloading a page, waiting for the host's rate
+# limit, parsing a page (CPU time in the parsing process) and storing a page
+SPANS = ('fetch', 'rate_wait', 'parse', 'insert')
+# Event counters kept per site
+COUNTERS = ('requests', 'bytes', 'cache_hits', 'retries', 'throttled', 'server_errors', 'errors', 'short_circuited',
+            'pages', 'rows')
+PREFIX = "scraper"
+
+# Scraper whose work the current thread is doing (see site())
+_current_site = contextvars.ContextVar('current_site', default=None)
+
+
+class Histogram:
+    """Cumulative latency histogram over BUCKETS, with count and sum."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """
+        Upper bound of the bucket holding the q-quantile (None when empty); like
+        Prometheus, the largest finite bound when it falls beyond every bucket.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKETS[-1]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip([str(bound) for bound in BUCKETS] + ["+Inf"], self.counts)),
+        }
+
+
+class SiteMetrics:
+    """Spans and counters of one site, plus the wall time of its runs."""
+
+    def __init__(self):
+        self.spans = {span: Histogram() for span in SPANS}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.runs = 0
+        self.running = 0
+        self.started = None
+        self.run_seconds = 0.0
+
+    def wall_seconds(self):
+        """Seconds spent in finished runs, plus the current run so far."""
+        if self.running and self.started is not None:
+            return self.run_seconds + time.monotonic() - self.started
+        return self.run_seconds
+
+    def snapshot(self):
+        wall = self.wall_seconds()
+        return {
+            "runs": self.runs,
+            "running": bool(self.running),
+            "wall_seconds": round(wall, 3),
+            "rows_per_sec": round(self.counters['rows'] / wall, 1) if wall else None,
+            "pages_per_sec": round(self.counters['pages'] / wall, 2) if wall else None,
+            "counters": dict(self.counters),
+            "spans": {span: histogram.snapshot() for span, histogram in self.spans.items()},
+        }
+
+
+class Metrics:
+    """
+    Thread-safe per-site performance metrics of one process run.
+
+    Stages report timings with observe() (or the span() context manager) and
+    events with count(); site() marks the work done by one scraper so the
+    shared fetch engine, parsing pool and writer can attribute it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.sites = {}
+
+    def _site(self, site):
+        metrics = self.sites.get(site)
+        if metrics is None:
+            metrics = self.sites[site] = SiteMetrics()
+        return metrics
+
+    def observe(self, site, span, seconds):
+        with self.lock:
+            self._site(site).spans[span].observe(seconds)
+
+    def count(self, site, counter, amount=1):
+        with self.lock:
+            self._site(site).counters[counter] += amount
+
+    @contextlib.contextmanager
+    def span(self, site, span):
+        """Time the enclosed block as one span of site."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(site, span, time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def site(self, site):
+        """Run the enclosed scrape as site: its requests, parses and writes are counted under it."""
+        token = _current_site.set(site)
+        with self.lock:
+            metrics = self._site(site)
+            metrics.runs += 1
+            metrics.running += 1
+            if metrics.running == 1:
+                metrics.started = time.monotonic()
+        try:
+            yield
+        finally:
+            _current_site.reset(token)
+            with self.lock:
+                metrics.running -= 1
+                if not metrics.running:
+                    metrics.run_seconds += time.monotonic() - metrics.started
+
+    def snapshot(self):
+        """Plain-data copy of every site's metrics."""
+        with self.lock:
+            return {
+                "started": self.started,
+                "seconds": round(time.time() - self.started, 3),
+                "sites": {site: metrics.snapshot() for site, metrics in sorted(self.sites.items())},
+            }
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.sites = {}
+
+
+def current_site():
+    """Scraper whose work the calling thread is doing, or None."""
+    return _current_site.get()
+
+
+def to_prometheus(snapshot):
+    """Prometheus text exposition of a snapshot."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{label_text}}} {value}")
+
+    sites = snapshot["sites"]
+    for counter in COUNTERS:
+        metric(f"{counter}_total", "counter", f"{counter.replace('_', ' ').capitalize()} per site",
+               [({"site": site}, data["counters"][counter]) for site, data in sites.items()])
+    metric("run_seconds", "gauge", "Wall time spent running each site's scraper",
+           [({"site": site}, data["wall_seconds"]) for site, data in sites.items()])
+    metric("rows_per_second", "gauge", "Doctor rows stored per second of scraper wall time",
+           [({"site": site}, data["rows_per_sec"] or 0) for site, data in sites.items()])
+    for span in SPANS:
+        lines.append(f"# HELP {PREFIX}_{span}_seconds Duration of the {span} stage per page")
+        lines.append(f"# TYPE {PREFIX}_{span}_seconds histogram")
+        for site, data in sites.items():
+            histogram = data["spans"][span]
+            cumulative = 0
+            for bound, count in histogram["buckets"].items():
+                cumulative += count
+                lines.append(f'{PREFIX}_{span}_seconds_bucket{{site="{_escape(site)}",le="{bound}"}} {cumulative}')
+            lines.append(f'{PREFIX}_{span}_seconds_sum{{site="{_escape(site)}"}} {histogram["sum"]}')
+            lines.append(f'{PREFIX}_{span}_seconds_count{{site="{_escape(site)}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write(path, snapshot=None):
+    """
+    Write the metrics to path: Prometheus text format, or JSON when path ends
+    in .json. The file is replaced atomically, so a scraper of it never sees
+    half a file.
+    """
+    snapshot = snapshot or get_metrics().snapshot()
+    if path.lower().endswith('.json'):
+        text = json.dumps(snapshot, indent=2)
+    else:
+        text = to_prometheus(snapshot)
+    partial = f"{path}.part"
+    with open(partial, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(partial, path)
+    logger.info(f"Wrote scraper metrics to {path}")
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Return the process-wide Metrics shared by every scraper."""
+    return _metrics
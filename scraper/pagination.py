@@ -0,0 +1,162 @@
+# scraper/pagination.py
+import logging
+from collections import deque
+from urllib.parse import urldefrag, urljoin
+
+from scraper import fetch, parsing
+from scraper.frontier import stop_requested
+from scraper.parsing import PAGINATION_LINKS, listing_soup
+
+logger = logging.getLogger(__name__)
+
+# Listing pages downloaded and parsed at once; the fetch engine still spaces
+# the requests out by the host's rate limit
+PREFETCH_PAGES = 4
+# Pages a listing may have at most, in case a site's pagination never ends
+MAX_PAGES = 100
+NEXT_LINKS = 'a.next, a.load-more, a.pagination-link'
+# Statuses of a page that does not exist, e.g. the one after the last numbered page
+GONE_STATUSES = (404, 410)
+# Numbered pages failing in a row after which the walk gives up
+MAX_FAILED_PAGES = 3
+# _load() result of a page past the end of the listing
+_GONE = object()
+
+
+def next_links(soup, page_url):
+    """Absolute URLs of the next, load-more and page links of a parsed listing page, in page order."""
+    links = []
+    for link in soup.select(NEXT_LINKS):
+        href = (link.get('href') or '').strip()
+        if not href or href.startswith(('#', 'javascript:')):
+            continue
+        url = urldefrag(urljoin(page_url, href))[0]
+        if url != page_url and url not in links:
+            links.append(url)
+    return links
+
+
+def page_links(content, page_url):
+    """Pagination links of a listing page that is not parsed for doctors (e.g. because it is unchanged)."""
+    return next_links(listing_soup(content, 'lxml', PAGINATION_LINKS), page_url)
+
+
+def _load(url, response, parse_page, tracker):
+    """
+    Start handling one downloaded page: (future of (doctors, links), unchanged),
+    _GONE if the page does not exist, or None if it failed to load.
+    """
+    if isinstance(response, fetch.FetchError):
+        logger.error(f"Failed to fetch {url}: {str(response)}")
+        return None
+    if response.status_code in GONE_STATUSES:
+        logger.info(f"No page at {url} (status code {response.status_code})")
+        return _GONE
+    if response.status_code != 200:
+        logger.warning(f"Failed to fetch {url}. Status code: {response.status_code}")
+        return None
+    if tracker is not None and tracker.unchanged(url, response.content):
+        logger.info(f"Skipping unchanged page {url}")
+        return parsing.submit(page_links, response.content, url), True
+    return parsing.submit(parse_page, response.content, url), False
+
+
+def crawl(start_url, parse_page, tracker=None, headers=None, numbered=None, timeout=30,
+          prefetch=None, max_pages=None, frontier=None):
+    """
+    Walk a paginated listing from start_url and yield (page_url, doctors)
+    for each page, in order: doctors is None for a page the tracker found
+    unchanged or that failed to load, and [] for a page that does not exist
+    or listed nobody. A failed page is recorded with the frontier (or the
+    tracker), which keeps its stored doctors and leaves the run incomplete;
+    the walk goes on past it.
+
+    parse_page(content, page_url) runs on the parsing stage and returns the
+    doctors of a page together with next_links() of the same soup, which are
+    followed breadth-first. Sites that number their pages without linking
+    them pass numbered(n), the URL of page n; those pages are then
+    downloaded ahead. Up to prefetch pages are downloaded and parsed at once.
+    An empty page ends the walk: its links are not followed, and numbered
+    pages after it are dropped. The walk also ends when the scraper is asked
+    to stop, or after MAX_FAILED_PAGES numbered pages failed in a row. With a
+    frontier, the pages found and visited are recorded in it, and a resumed
+    walk continues from its pending pages.
+    """
+    prefetch = prefetch or PREFETCH_PAGES
+    max_pages = max_pages or MAX_PAGES
+    queue = deque([start_url])
+    seen = {start_url}
+    number = 1
+    if frontier is not None:
+        frontier.add([start_url])
+        if frontier.resumed:
+            seen = set(frontier.known())
+            queue = deque(frontier.pending())
+            while numbered is not None and numbered(number + 1) in seen:
+                number += 1
+    pages = 0
+    failed_in_row = 0
+    while pages < max_pages:
+        if stop_requested():
+            logger.info(f"Stopping the walk of {start_url}: stop requested")
+            return
+        while numbered is not None and len(queue) < prefetch:
+            number += 1
+            url = numbered(number)
+            if url not in seen:
+                seen.add(url)
+                queue.append(url)
+                if frontier is not None:
+                    frontier.add([url])
+        if not queue:
+            return
+        batch = [queue.popleft() for _ in range(min(prefetch, len(queue), max_pages - pages))]
+        if frontier is not None:
+            for url in batch:
+                frontier.start(url)
+        responses = fetch.fetch_all(batch, headers=headers, timeout=timeout)
+        loads = [_load(url, response, parse_page, tracker) for url, response in zip(batch, responses)]
+
+        for url, load in zip(batch, loads):
+            pages += 1
+            doctors, links = [], []
+            if load is not None and load is not _GONE:
+                future, unchanged = load
+                try:
+                    if unchanged:
+                        doctors, links = None, future.result()
+                    else:
+                        doctors, links = future.result()
+                except Exception as e:
+                    logger.error(f"Error parsing {url}: {str(e)}")
+                    load = None
+            if load is None:
+                # Not an empty page: its stored doctors are kept and the run is left incomplete
+                yield url, None
+                if frontier is not None:
+                    frontier.fail(url)
+                elif tracker is not None:
+                    tracker.fail(url)
+                failed_in_row += 1
+                if numbered is not None and failed_in_row >= MAX_FAILED_PAGES:
+                    logger.error(f"Stopping pagination at {url}: {failed_in_row} pages failed in a row")
+                    return
+                continue
+            failed_in_row = 0
+            yield url, doctors
+            if frontier is not None:
+                frontier.done(url)
+
+            if doctors is not None and not doctors:
+                if numbered is not None:
+                    logger.info(f"Stopping pagination at {url}: no doctors found")
+                    return
+                continue
+            for link in links:
+                if link not in seen:
+                    seen.add(link)
+                    queue.append(link)
+            if frontier is not None:
+                frontier.add(links)
+    if queue or numbered is not None:
+        logger.warning(f"Stopped following pages of {start_url} after {max_pages} pages")
@@ -0,0 +1,231 @@
+# scraper/parsing.py
+import atexit
+import logging
+import logging.handlers
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from scraper import metrics
+
+logger = logging.getLogger(__name__)
+
+# Build only the listing containers of a page instead of the whole document.
+# Turn off to fall back to full-document parsing (e.g. to compare outputs).
+FAST_PARSE = True
+# Parse downloaded pages in a pool of worker processes, so parsing uses every
+# core while the threads that download pages only wait on the network
+PARSE_IN_PROCESSES = True
+# Number of parsing processes (None: one per CPU)
+PARSE_WORKERS = None
+# Pages handed to a ParseStage that may wait for a parsing process at once
+PARSE_BACKLOG = 64
+
+
+def class_strainer(name, *classes):
+    """
+    SoupStrainer keeping <name> elements that carry any of the given classes.
+
+    Matches on the raw class attribute, which is not yet split into a list
+    while the document is being parsed.
+    """
+    def has_class(value):
+        return value is not None and any(cls in value.split() for cls in classes)
+    return SoupStrainer(name, class_=has_class)
+
+
+# Links the listing scrapers look at to detect pagination
+PAGINATION_LINKS = class_strainer('a', 'next', 'load-more', 'pagination-link')
+
+
+class AnyStrainer(SoupStrainer):
+    """
+    Strainer that keeps a top-level element when any of several strainers keeps it.
+    """
+
+    def __init__(self, strainers):
+        super().__init__()
+        self.strainers = list(strainers)
+
+    @property
+    def excludes_everything(self):
+        return all(strainer.excludes_everything for strainer in self.strainers)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string):
+        return any(strainer.allow_string_creation(string) for strainer in self.strainers)
+
+
+def listing_soup(content, parser, *strainers):
+    """
+    Parse a listing page. With FAST_PARSE on, only the elements kept by the
+    given strainers (and everything inside them) are built, so selectors that
+    stay within those containers return the same elements as on the full tree.
+    """
+    if not FAST_PARSE or not strainers:
+        return BeautifulSoup(content, parser)
+    parse_only = strainers[0] if len(strainers) == 1 else AnyStrainer(strainers)
+    return BeautifulSoup(content, parser, parse_only=parse_only)
+
+
+class _ForwardToLogger(logging.Handler):
+    """Replays records received from parsing processes on the matching logger of this process."""
+
+    def emit(self, record):
+        target = logging.getLogger(record.name)
+        if target.isEnabledFor(record.levelno):
+            target.handle(record)
+
+
+def _init_worker(log_queue, level):
+    # Runs first in every parsing process: send all log records back to the
+    # parent, so they reach its handlers (log files, GUI console) as usual.
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_log_listener = None
+_stats = {"pages": 0, "cpu_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _timed_call(func, args):
+    # Runs in the parsing process; reports the CPU time the parse took
+    start = time.thread_time()
+    result = func(*args)
+    return result, time.thread_time() - start
+
+
+def _record(timed, future, site):
+    """Move the result of a _timed_call into future and count its CPU time."""
+    try:
+        result, elapsed = timed.result()
+    except BaseException as e:
+        future.set_exception(e)
+        return
+    with _stats_lock:
+        _stats["pages"] += 1
+        _stats["cpu_seconds"] += elapsed
+    if site is not None:
+        metrics.get_metrics().observe(site, 'parse', elapsed)
+    future.set_result(result)
+
+
+def stats():
+    """Pages parsed so far and the CPU seconds spent parsing them, across all parsing processes."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _get_pool():
+    """Return the process-wide parsing pool, starting it on first use."""
+    global _pool, _log_listener
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the parent runs the fetch loop and database writer threads
+            context = multiprocessing.get_context("spawn")
+            log_queue = context.Queue()
+            _log_listener = logging.handlers.QueueListener(log_queue, _ForwardToLogger())
+            _log_listener.start()
+            _pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=context,
+                initializer=_init_worker, initargs=(log_queue, logging.getLogger().getEffectiveLevel())
+            )
+            atexit.register(shutdown)
+        return _pool
+
+
+def shutdown():
+    """Stop the parsing processes and the log forwarding thread."""
+    global _pool, _log_listener
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+        if _log_listener is not None:
+            _log_listener.stop()
+            _log_listener = None
+
+
+def submit(func, *args):
+    """
+    Run func(*args) on the parsing stage and return a Future with its result.
+
+    func must be a module-level function taking and returning plain data
+    (bytes, strings, lists of record dicts). Runs inline when
+    PARSE_IN_PROCESSES is off or the pool is unusable.
+    """
+    global PARSE_IN_PROCESSES
+    future = Future()
+    site = metrics.current_site()
+    if PARSE_IN_PROCESSES:
+        try:
+            timed = _get_pool().submit(_timed_call, func, args)
+            timed.add_done_callback(lambda done: _record(done, future, site))
+            return future
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.error(f"Parsing pool unavailable, parsing in-process from now on: {str(e)}")
+            PARSE_IN_PROCESSES = False
+    timed = Future()
+    try:
+        timed.set_result(_timed_call(func, args))
+    except Exception as e:
+        timed.set_exception(e)
+    _record(timed, future, site)
+    return future
+
+
+def parse(func, *args):
+    """Run func(*args) on the parsing stage and wait for the result."""
+    return submit(func, *args).result()
+
+
+class ParseStage:
+    """
+    Parsing stage of a download pipeline.
+
+    Download threads hand pages over with submit() and go back to the
+    network at once; handler(key, future) is called with each finished
+    parse. At most backlog pages wait for a parsing process at a time, so
+    a slow parse slows the downloads down instead of piling up pages in memory.
+    """
+
+    def __init__(self, handler, backlog=None):
+        self.handler = handler
+        self._slots = threading.BoundedSemaphore(backlog or PARSE_BACKLOG)
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, key, func, *args):
+        self._slots.acquire()
+        with self._idle:
+            self._pending += 1
+        future = submit(func, *args)
+        future.add_done_callback(lambda done: self._finish(key, done))
+
+    def _finish(self, key, future):
+        try:
+            self.handler(key, future)
+        except Exception as e:
+            logger.error(f"Error handling parsed page {key}: {str(e)}")
+        finally:
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    def join(self):
+        """Wait until every submitted page has been parsed and handled."""
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
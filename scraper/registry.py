@@ -0,0 +1,63 @@
+# scraper/registry.py
+import functools
+import importlib
+
+from scraper import metrics
+
+# Display name -> module in scraper.scrapers, in the order the GUI lists them.
+# Modules are only imported when a scraper is actually run.
+SCRAPERS = {
+    "wellnesssurgerycenter.com": "wellness",
+    "uaeu.ac.ae": "uaeu",
+    "skmca.ae": "skmc",
+    "sharjahcmc.ae": "sharjahcmc",
+    "altaiecenter.com": "altaie",
+    "Tawam Hospital": "tawam",
+    "Dhafrah Hospitals": "dhafrah",
+    "Enfield Royal Clinic": "royalclinic",
+    "Mezyad Health Care Center - Al Ain": "mezyadmc",
+    "Liv Hospital City Walk": "livhospital",
+    "Harley Street Medical Center": "hsmc",
+    "Gargash Hospital": "gargashhospital",
+}
+
+
+def resolve(name):
+    """Return the display name for a display name or module name (case-insensitive); KeyError if unknown."""
+    if name in SCRAPERS:
+        return name
+    wanted = name.lower()
+    for display, module in SCRAPERS.items():
+        if wanted in (display.lower(), module):
+            return display
+    raise KeyError(name)
+
+
+def module_name(name):
+    """Module name (e.g. "tawam") of a scraper."""
+    return SCRAPERS[resolve(name)]
+
+
+def load(name):
+    """Import the module of a scraper and return it."""
+    return importlib.import_module(f"scraper.scrapers.{module_name(name)}")
+
+
+def get_scrape(name):
+    """
+    Import the module of a scraper and return its scrape() function, wrapped
+    so that its work is recorded under the module name in the process metrics,
+    and followed by the image store stage when images.STORE_IMAGES is set.
+    """
+    site = module_name(name)
+    scrape = load(name).scrape
+
+    @functools.wraps(scrape)
+    def run(*args, **kwargs):
+        with metrics.get_metrics().site(site):
+            result = scrape(*args, **kwargs)
+        from scraper import images
+        if images.STORE_IMAGES:
+            images.store_images(site)
+        return result
+    return run
@@ -0,0 +1,4 @@
+# from .mediclinic import scrape as mediclinic_scrape
+# __all__ = [
+#     'mediclinic_scrape', 
+# ]
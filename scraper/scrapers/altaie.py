@@ -0,0 +1,132 @@
+import logging
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper.pagination import crawl, next_links
+from scraper.parsing import listing_soup, class_strainer, PAGINATION_LINKS
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+# Rate-limited warnings of the per-doctor loop
+diagnostics = Diagnostics(logger)
+
+BASE_URL = "https://altaiecenter.com/our-doctors/"
+# Elements of the page that hold the doctor listing, for fast parsing
+LISTING = class_strainer('div', 'bx')
+# Request headers of the listing pages
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+    "Connection": "keep-alive",
+}
+
+def listing_page(number):
+    """URL of page number of the doctors listing."""
+    return BASE_URL if number == 1 else f"{BASE_URL}page/{number}/"
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of an Al Taie Medical Center doctors page."""
+    soup = listing_soup(content, 'html.parser', LISTING, PAGINATION_LINKS)
+    doctor_items = soup.select('div.bx')
+    
+    logger.debug("Found %d doctor items on %s", len(doctor_items), page_url)
+    
+    doctors_data = []
+    base_url = "https://altaiecenter.com"
+    for item in doctor_items:
+        try:
+            # Extract name
+            name_elem = item.select_one('.nm-txt h4')
+            name = name_elem.text.strip() if name_elem else ""
+            if not name or name == "N/A":
+                diagnostics.warning("Skipping doctor with invalid name on %s.", page_url, html=item)
+                continue
+            
+            # Extract specialty
+            spec_elem = item.select_one('.nm-txt p')
+            specialty = spec_elem.text.strip() if spec_elem else ""
+            if not specialty or specialty == "N/A":
+                diagnostics.warning("Skipping doctor with invalid specialty on %s.", page_url, html=item)
+                continue
+            
+            # Extract profile URL
+            profile_link = item.select_one('.nm-txt a')
+            profile_url = urljoin(base_url, profile_link['href']) if profile_link and profile_link.get('href') else ""
+            if not profile_url:
+                diagnostics.warning("Skipping doctor with invalid profile URL on %s.", page_url, html=item)
+                continue
+            
+            # Extract image URL (prefer data-lazy-src, fallback to noscript img src)
+            img_elem = item.select_one('img[data-lazy-src]')
+            image_url = img_elem['data-lazy-src'] if img_elem and img_elem.get('data-lazy-src') else ""
+            if not image_url:
+                noscript_img = item.select_one('noscript img')
+                image_url = noscript_img['src'] if noscript_img and noscript_img.get('src') else "N/A"
+            
+            # Format location
+            location = "Al Taie Medical Center, Jumeirah, Dubai"
+            
+            doctor = {
+                'name': name,
+                'specialty': specialty,
+                'location': location,
+                'profile_url': profile_url,
+                'image_url': image_url,
+                'source': page_url
+            }
+            doctors_data.append(doctor)
+            logger.debug("Extracted doctor: %s - %s - %s", name, specialty, profile_url)
+        
+        except Exception as e:
+            diagnostics.warning("Error parsing doctor on %s: %s.", page_url, e, html=item)
+            logger.debug("Stack trace", exc_info=True)
+            continue
+    
+    logger.info("Extracted %s valid doctors from %s", len(doctors_data), page_url)
+    return doctors_data, next_links(soup, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from Al Taie Medical Center Our Doctors pages."""
+    logger.info("Starting Al Taie Medical Center Our Doctors scraping process")
+    
+    # Shared database writer and incremental page tracker
+    writer = None
+    try:
+        writer = get_writer()
+        tracker = PageTracker("altaie", writer)
+        frontier = Frontier(tracker)
+    except Exception as e:
+        logger.error("Failed to initialize database: %s", e, exc_info=True)
+        return
+    
+    total_doctors = 0
+    try:
+        # Pages are numbered (/page/N/); several are fetched ahead, up to the first empty one
+        for page_url, doctors in crawl(BASE_URL, parse_doctors, tracker, headers=HEADERS, numbered=listing_page,
+                                       frontier=frontier):
+            logger.info("Scraped page: %s", page_url)
+            
+            if doctors is None:
+                # Unchanged, or failed to load: the stored doctors stay as they are
+                continue
+            if not doctors:
+                logger.warning("No valid doctors found on %s.", page_url)
+            
+            # Hand doctors to the tracker, which writes only what changed
+            tracker.commit(page_url, doctors)
+            total_doctors += len(doctors)
+        
+        if frontier.finish():
+            logger.info("Al Taie Medical Center Our Doctors scraping completed. Total doctors added: %s",
+                        total_doctors)
+        else:
+            logger.info("Al Taie Medical Center Our Doctors scraping stopped. Total doctors added: %s", total_doctors)
+        
+    except Exception as e:
+        logger.error("Unexpected error during scraping: %s", e, exc_info=True)
+    finally:
+        if writer is not None:
+            try:
+                writer.flush()
+            except Exception as e:
+                logger.error("Error flushing database writer: %s", e, exc_info=True)
\ No newline at end of file
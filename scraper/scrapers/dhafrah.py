@@ -0,0 +1,29 @@
+import logging
+from scraper import listing
+from scraper.listing import ListingSpec
+from scraper.parsing import class_strainer
+
+logger = logging.getLogger(__name__)
+
+SITE = ListingSpec(
+    module="dhafrah",
+    label="Dhafrah Hospitals Group",
+    start_url="https://www.aldhafra-hf.ae/team-member/",
+    base_url="https://www.aldhafra-hf.ae/",
+    location="Dhafrah Hospitals Group - Zayed City Hospital",
+    listing=class_strainer('div', 'mkdf-team'),
+    item='div.mkdf-team.info-bellow',
+    name='.mkdf-team-name.entry-title',
+    specialty='.mkdf-team-position',
+    profile='.mkdf-team-image a',
+    image='div.mkdf-team-image a img',
+    image_attrs=('src', 'data-src', 'data-lazy-src'),
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Dhafrah Hospitals Group listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Dhafrah Hospitals Group doctors pages."""
+    listing.scrape(SITE, parse_doctors)
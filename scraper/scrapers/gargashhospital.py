@@ -0,0 +1,31 @@
+import logging
+from bs4 import SoupStrainer
+from scraper import listing
+from scraper.listing import ListingSpec
+
+logger = logging.getLogger(__name__)
+
+SITE = ListingSpec(
+    module="gargashhospital",
+    label="Gargash Hospital - Umm Suqaim",
+    start_url="https://www.gargashhospital.com/our-doctors",
+    base_url="https://www.gargashhospital.com/",
+    location="Gargash Hospital - Umm Suqaim",
+    listing=SoupStrainer('div', id='docs-list'),
+    item='div#docs-list div.element',
+    name='div.header',
+    specialty='div.top div.txt',
+    profile='a[href]',
+    image='div.bg img',
+    image_extensions=('.jpg', '.jpeg', '.png', '.webp'),
+    # Its links contain doubled slashes
+    collapse_slashes=True,
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Gargash Hospital - Umm Suqaim listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Gargash Hospital - Umm Suqaim doctors pages."""
+    listing.scrape(SITE, parse_doctors)
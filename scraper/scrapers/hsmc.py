@@ -0,0 +1,46 @@
+import logging
+from scraper import listing
+from scraper.listing import ListingSpec
+from scraper.parsing import class_strainer
+
+logger = logging.getLogger(__name__)
+
+def is_valid_doctor_name(name):
+    """Validate if the name appears to be a doctor's name."""
+    if not name or name == "N/A":
+        return False
+    # Check for common doctor prefixes or name-like patterns
+    name = name.lower()
+    if any(prefix in name for prefix in ['dr.', 'prof.', 'doctor', 'professor']):
+        return True
+    # Allow names with at least two words (e.g., "John Smith")
+    if len(name.split()) >= 2 and not any(keyword in name for keyword in ['visit', 'quick links', 'opening hours', 'subscribe', 'we speak']):
+        return True
+    return False
+
+SITE = ListingSpec(
+    module="hsmc",
+    label="Harley Street Medical Center",
+    start_url="https://www.hsmc.ae/our-doctors/",
+    base_url="https://www.hsmc.ae/",
+    location="Harley Street Medical Center",
+    listing=class_strainer('div', 'rowItemContent'),
+    item='div.rowItemContent:has(a.btBtn)',
+    name='header.btClear h3',
+    valid_name=is_valid_doctor_name,
+    # <br>-separated specialties
+    specialty='header.btClear div.btSubTitle',
+    specialty_words=True,
+    profile='a.btBtn',
+    image='div.btImage img',
+    image_attrs=('data-src',),
+    image_extensions=('.jpg', '.jpeg', '.png', '.webp'),
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Harley Street Medical Center listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Harley Street Medical Center doctors pages."""
+    listing.scrape(SITE, parse_doctors)
@@ -0,0 +1,30 @@
+import logging
+from scraper import listing
+from scraper.listing import ListingSpec
+from scraper.parsing import class_strainer
+
+logger = logging.getLogger(__name__)
+
+SITE = ListingSpec(
+    module="livhospital",
+    label="Liv Hospital City Walk",
+    start_url="https://www.livhospital.ae/doctors/",
+    base_url="https://www.livhospital.ae/",
+    location="Liv Hospital City Walk",
+    listing=class_strainer('div', 'tdm-team-member-wrap'),
+    item='div.tdm-team-member-wrap',
+    name='h3.tdm-title a',
+    specialty='div.tdm-member-info-inner p.tdm-descr',
+    profile='h3.tdm-title a',
+    # The photo is the card's CSS background
+    image='div.tdm-member-image',
+    image_attrs=('style',),
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Liv Hospital City Walk listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Liv Hospital City Walk doctors pages."""
+    listing.scrape(SITE, parse_doctors)
@@ -0,0 +1,28 @@
+import logging
+from scraper import listing
+from scraper.listing import ListingSpec
+from scraper.parsing import class_strainer
+
+logger = logging.getLogger(__name__)
+
+SITE = ListingSpec(
+    module="mezyadmc",
+    label="Mezyad Health Care Center - Al Ain",
+    start_url="https://www.mezyadmc.com/our-team",
+    base_url="https://www.mezyadmc.com/",
+    location="Mezyad Health Care Center - Al Ain",
+    listing=class_strainer('div', 'beautypress-single-team'),
+    item='div.beautypress-single-team',
+    name='div.beautypress-team-person-details h3',
+    specialty='div.beautypress-team-person-details h4',
+    profile='a[href*="team-detail"]',
+    image='img',
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Mezyad Health Care Center - Al Ain listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Mezyad Health Care Center - Al Ain doctors pages."""
+    listing.scrape(SITE, parse_doctors)
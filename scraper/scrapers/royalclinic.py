@@ -0,0 +1,39 @@
+import logging
+from scraper import listing
+from scraper.listing import ListingSpec
+from scraper.parsing import class_strainer
+
+logger = logging.getLogger(__name__)
+
+# List of common medical specialties for extraction
+SPECIALTY_KEYWORDS = [
+    'urologist', 'surgeon', 'nutritionist', 'dietician', 'dentist', 'gynecologist',
+    'obstetrician', 'physician', 'aesthetic medicine', 'laser treatments',
+    'anti aging', 'regenerative medicine', 'plastic surgeon', 'dermatologist',
+    'family care', 'laparoscopic surgeon', 'hair restoration', 'hair transplant'
+]
+
+SITE = ListingSpec(
+    module="royalclinic",
+    label="Enfield Royal Clinic - Dubai",
+    start_url="https://www.royalclinicdubai.com/en-ae/doctors/",
+    base_url="https://www.royalclinicdubai.com/",
+    location="Enfield Royal Clinic - Dubai",
+    listing=class_strainer('div', 'doctor-grid'),
+    item='div.doctor-grid',
+    name='div.doctor-details h3',
+    # The cards carry a free-text description instead of a specialty
+    specialty='div.doctor-details p',
+    specialty_keywords=SPECIALTY_KEYWORDS,
+    profile='div.doctor-details a.elementor-button',
+    image='div.doctor-image img',
+    image_attrs=('data-lazy-src', 'data-src', 'src'),
+)
+
+def parse_doctors(content, page_url):
+    """Parse the doctors and pagination links out of the HTML of a Enfield Royal Clinic - Dubai listing page."""
+    return SITE.parse(content, page_url)
+
+def scrape():
+    """Main function to scrape doctor data from the Enfield Royal Clinic - Dubai doctors pages."""
+    listing.scrape(SITE, parse_doctors)
@@ -0,0 +1,209 @@
+from bs4 import BeautifulSoup
+import logging
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper import fetch
+from scraper import parsing
+from scraper.parsing import listing_soup, class_strainer
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+# Rate-limited warnings of the per-doctor loop
+diagnostics = Diagnostics(logger)
+
+# Elements of the page that hold the doctor listing, for fast parsing
+LISTING = class_strainer(None, 'elementor-inner-section', 'elementor-inner-column')
+
+# Returned by extract_doctors for a page that could not be loaded or parsed
+_FAILED = object()
+
+def parse_doctors(content, specialty_url, specialty_name):
+    """Parse doctor information out of the HTML of a Sharjah Corniche Hospital specialty page."""
+    soup = listing_soup(content, 'html.parser', LISTING)
+    # Primary selector for visible doctor columns
+    doctor_items = soup.select(
+        '.elementor-section.elementor-inner-section '
+        '.elementor-column.elementor-col-25.elementor-inner-column'
+        ':not(.elementor-hidden-desktop):not(.elementor-hidden-tablet):not(.elementor-hidden-mobile)'
+    )
+    
+    # Fallback selector if primary fails
+    if not doctor_items:
+        logger.warning("No doctors found with primary selector for %s. Trying fallback selector.", specialty_url)
+        doctor_items = soup.select('.elementor-column.elementor-inner-column')
+    
+    logger.debug("Found %d doctor columns in specialty %s", len(doctor_items), specialty_name)
+    
+    doctors_data = []
+    base_url = "https://www.sharjahcmc.ae"
+    for item in doctor_items:
+        try:
+            # Extract name
+            name_elem = item.select_one('.elementor-image-box-title')
+            name = name_elem.text.strip() if name_elem else ""
+            if not name or name == "Dr. Name" or name == "N/A":
+                diagnostics.warning("Skipping doctor with invalid name in %s.", specialty_name, html=item)
+                continue
+            
+            # Extract specialty
+            spec_elem = item.select_one('.elementor-image-box-description')
+            specialty = spec_elem.text.strip() if spec_elem else ""
+            if not specialty or specialty == "Dr. Position" or specialty == "N/A":
+                diagnostics.warning("Skipping doctor with invalid specialty in %s.", specialty_name, html=item)
+                continue
+            
+            # Extract profile URL (prefer button link, fallback to image link)
+            profile_link = item.select_one('.elementor-button-wrapper a') or item.select_one('.elementor-widget-image a')
+            profile_url = urljoin(base_url, profile_link['href']) if profile_link and profile_link.get('href') and profile_link['href'] != "#" else ""
+            if not profile_url:
+                diagnostics.warning("Skipping doctor with invalid profile URL in %s.", specialty_name, html=item)
+                continue
+            
+            # Extract image URL
+            img_elem = item.select_one('.elementor-widget-image img')
+            image_url = urljoin(base_url, img_elem['src']) if img_elem and img_elem.get('src') else "N/A"
+            
+            # Format location
+            location = f"Amina Group - Sharjah Corniche Hospital, Halwan Suburb, {specialty_name}"
+            
+            doctor = {
+                'name': name,
+                'specialty': specialty,
+                'location': location,
+                'profile_url': profile_url,
+                'image_url': image_url,
+                'source': specialty_url
+            }
+            doctors_data.append(doctor)
+            logger.debug("Extracted doctor: %s - %s - %s", name, specialty, profile_url)
+        
+        except Exception as e:
+            diagnostics.warning("Error parsing doctor in %s: %s.", specialty_name, e, html=item)
+            logger.debug("Stack trace", exc_info=True)
+            continue
+    
+    logger.info("Extracted %s valid doctors from specialty %s", len(doctors_data), specialty_name)
+    return doctors_data
+
+def extract_doctors(specialty_url, specialty_name, tracker=None):
+    """Extract doctor information from a Sharjah Corniche Hospital specialty page."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    
+    try:
+        response = fetch.get(specialty_url, headers=headers, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch specialty page %s. Status code: %s", specialty_url, response.status_code)
+            return _FAILED
+        
+        if tracker is not None and tracker.unchanged(specialty_url, response.content):
+            logger.info("Skipping unchanged page %s", specialty_url)
+            return None
+        
+        return parsing.parse(parse_doctors, response.content, specialty_url, specialty_name)
+        
+    except fetch.FetchError as e:
+        logger.error("Error fetching %s: %s", specialty_url, e, exc_info=True)
+        return _FAILED
+    except Exception as e:
+        logger.error("Unexpected error in extract_doctors for %s: %s", specialty_url, e, exc_info=True)
+        return _FAILED
+
+def scrape():
+    """Main function to scrape doctor data from Sharjah Corniche Hospital Our Doctors page."""
+    base_url = "https://www.sharjahcmc.ae/our-doctors/"
+    logger.info("Starting Sharjah Corniche Hospital Our Doctors scraping process")
+    
+    # Fetch the main page to get specialty links
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    
+    try:
+        response = fetch.get(base_url, headers=headers, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch page %s. Status code: %s", base_url, response.status_code)
+            return
+        
+        soup = BeautifulSoup(response.content, 'html.parser')
+        nav_menu = soup.select_one('ul#menu-1-17b34650')
+        if not nav_menu:
+            logger.error("No specialty navigation menu found on the page.")
+            return
+        
+        specialties = []
+        for item in nav_menu.find_all('li', class_='menu-item'):
+            link = item.find('a', class_='hfe-menu-item')
+            if link and link.get('href'):
+                specialties.append({
+                    "url": link['href'],
+                    "name": link.text.strip()
+                })
+        
+        if not specialties:
+            logger.error("No valid specialties found in the navigation menu.")
+            return
+        
+        logger.info("Found %s specialties to scrape", len(specialties))
+        
+        # Shared database writer and incremental page tracker
+        writer = None
+        try:
+            writer = get_writer()
+            tracker = PageTracker("sharjahcmc", writer)
+            # Specialties already scraped by an interrupted run are not fetched again
+            frontier = Frontier(tracker)
+            frontier.add([specialty['url'] for specialty in specialties])
+        except Exception as e:
+            logger.error("Failed to initialize database: %s", e, exc_info=True)
+            return
+        
+        total_doctors = 0
+        for specialty in specialties:
+            if frontier.stopping:
+                logger.info("Stop requested; leaving the remaining specialties for the next run.")
+                break
+            if frontier.is_done(specialty['url']):
+                logger.info("Skipping specialty %s: already scraped by the interrupted run", specialty['name'])
+                continue
+            logger.info("Scraping specialty: %s (%s)", specialty['name'], specialty['url'])
+            frontier.start(specialty['url'])
+            doctors = extract_doctors(specialty['url'], specialty['name'], tracker)
+            
+            if doctors is _FAILED:
+                # Its stored doctors are kept, and the next run tries it again
+                frontier.fail(specialty['url'])
+                continue
+            if doctors is None:
+                frontier.done(specialty['url'])
+                continue
+            if not doctors:
+                logger.warning("No valid doctors found for specialty %s.", specialty['name'])
+            
+            # Hand doctors to the tracker, which writes only what changed
+            tracker.commit(specialty['url'], doctors)
+            frontier.done(specialty['url'])
+            total_doctors += len(doctors)
+        
+        if frontier.finish():
+            logger.info("Sharjah Corniche Hospital Our Doctors scraping completed. Total doctors added: %s",
+                        total_doctors)
+        else:
+            logger.info("Sharjah Corniche Hospital Our Doctors scraping stopped. Total doctors added: %s",
+                        total_doctors)
+        
+    except fetch.FetchError as e:
+        logger.error("Error fetching initial page %s: %s", base_url, e, exc_info=True)
+    except Exception as e:
+        logger.error("Unexpected error during scraping: %s", e, exc_info=True)
+    finally:
+        if 'writer' in locals() and writer is not None:
+            try:
+                writer.flush()
+            except Exception as e:
+                logger.error("Error flushing database writer: %s", e, exc_info=True)
\ No newline at end of file
@@ -0,0 +1,195 @@
+from bs4 import BeautifulSoup
+import logging
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper import fetch
+from scraper import parsing
+from scraper.parsing import listing_soup, class_strainer
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+# Rate-limited warnings of the per-doctor loop
+diagnostics = Diagnostics(logger)
+
+# Elements of the page that hold the doctor listing, for fast parsing
+LISTING = class_strainer(None, 'doclist')
+
+# Returned by extract_doctors for a page that could not be loaded or parsed
+_FAILED = object()
+
+def clinic_page_key(base_url, clinic_id):
+    """Page key used to track one clinic's POST results between runs."""
+    return f"{base_url}?specialt={clinic_id}"
+
+def parse_doctors(content, clinic_name, base_url):
+    """Parse doctor information out of the HTML of a SKMC clinic POST response."""
+    soup = listing_soup(content, 'html.parser', LISTING)
+    doc_list = soup.select('.doclist .doctorsec')
+    
+    doctors_data = []
+    for item in doc_list:
+        try:
+            # Extract name
+            name_elem = item.select_one('.docname')
+            name = name_elem.text.strip() if name_elem else "N/A"
+            
+            # Extract specialty (handle multiple .spec tags, take first non-empty)
+            spec_elems = item.select('.spec')
+            specialty = "N/A"
+            for spec_elem in spec_elems:
+                spec_text = spec_elem.text.strip().rstrip(',')
+                if spec_text:
+                    specialty = spec_text
+                    break
+            if specialty == "N/A":
+                diagnostics.warning("No valid specialty found for doctor in clinic %s.", clinic_name, html=item)
+            
+            # Extract profile URL
+            profile_link = item.select_one('a')
+            profile_url = urljoin(base_url, profile_link['href']) if profile_link and profile_link.get('href') else "N/A"
+            
+            # Extract image URL
+            img_elem = item.select_one('.featimg img')
+            image_url = urljoin(base_url, img_elem['src']) if img_elem and img_elem.get('src') else "N/A"
+            
+            # Format location
+            location = f"Sheikh Khalifa Medical City (SKMC) Hospital, Al Markaziyah, {clinic_name}"
+            
+            if name != "N/A":
+                doctors_data.append({
+                    'name': name,
+                    'specialty': specialty,
+                    'location': location,
+                    'profile_url': profile_url,
+                    'image_url': image_url,
+                    'source': base_url
+                })
+            else:
+                diagnostics.warning("Skipping doctor with missing name for clinic %s.", clinic_name, html=item)
+        
+        except Exception as e:
+            diagnostics.warning("Error parsing doctor in clinic %s: %s", clinic_name, e, html=item)
+            continue
+    
+    logger.info("Extracted %s doctors from clinic %s", len(doctors_data), clinic_name)
+    return doctors_data
+
+def extract_doctors(clinic_id, clinic_name, base_url, tracker=None):
+    """Extract doctor information from a SKMC clinic POST response."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    page_key = clinic_page_key(base_url, clinic_id)
+    data = {
+        "specialt": clinic_id,
+        "doclst": "",
+        "searchbtn": "Search"
+    }
+    
+    try:
+        response = fetch.post(base_url, headers=headers, data=data, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch doctors for clinic ID %s (%s). Status code: %s",
+                         clinic_id, clinic_name, response.status_code)
+            return _FAILED
+        
+        if tracker is not None and tracker.unchanged(page_key, response.content):
+            logger.info("Skipping unchanged page %s", page_key)
+            return None
+        
+        return parsing.parse(parse_doctors, response.content, clinic_name, base_url)
+        
+    except fetch.FetchError as e:
+        logger.error("Error extracting doctors for clinic ID %s (%s): %s", clinic_id, clinic_name, e)
+        return _FAILED
+    except Exception as e:
+        logger.error("Error parsing doctors for clinic ID %s (%s): %s", clinic_id, clinic_name, e, exc_info=True)
+        return _FAILED
+
+def scrape():
+    """Main function to scrape doctor data from SKMC Our Doctors page."""
+    base_url = "https://www.skmca.ae/our-doctors/"
+    logger.info("Starting SKMC Our Doctors scraping process")
+    
+    # Fetch the initial page to get clinic IDs
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    
+    try:
+        response = fetch.get(base_url, headers=headers, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch page %s. Status code: %s", base_url, response.status_code)
+            return
+        
+        soup = BeautifulSoup(response.content, 'html.parser')
+        clinic_select = soup.select_one('select[name="specialt"]')
+        if not clinic_select:
+            logger.error("No clinic dropdown found on the page.")
+            return
+        
+        clinics = []
+        for option in clinic_select.find_all('option'):
+            clinic_id = option.get('value')
+            clinic_name = option.text.strip()
+            if clinic_id and clinic_id != "select" and clinic_name:
+                clinics.append({"id": clinic_id, "name": clinic_name})
+        
+        if not clinics:
+            logger.error("No valid clinics found in the dropdown.")
+            return
+        
+        logger.info("Found %s clinics to scrape", len(clinics))
+        
+        # Shared database writer and incremental page tracker
+        writer = get_writer()
+        tracker = PageTracker("skmc", writer)
+        # Clinics already scraped by an interrupted run are not fetched again
+        frontier = Frontier(tracker)
+        frontier.add([clinic_page_key(base_url, clinic['id']) for clinic in clinics])
+        
+        total_doctors = 0
+        for clinic in clinics:
+            page_key = clinic_page_key(base_url, clinic['id'])
+            if frontier.stopping:
+                logger.info("Stop requested; leaving the remaining clinics for the next run.")
+                break
+            if frontier.is_done(page_key):
+                logger.info("Skipping clinic %s: already scraped by the interrupted run", clinic['name'])
+                continue
+            logger.info("Scraping clinic: %s (ID: %s)", clinic['name'], clinic['id'])
+            frontier.start(page_key)
+            doctors = extract_doctors(clinic['id'], clinic['name'], base_url, tracker)
+            
+            if doctors is _FAILED:
+                # Its stored doctors are kept, and the next run tries it again
+                frontier.fail(page_key)
+                continue
+            if doctors is None:
+                frontier.done(page_key)
+                continue
+            if not doctors:
+                logger.warning("No doctors found for clinic %s.", clinic['name'])
+            
+            # Hand doctors to the tracker, which writes only what changed
+            tracker.commit(page_key, doctors)
+            frontier.done(page_key)
+            total_doctors += len(doctors)
+        
+        if frontier.finish():
+            logger.info("SKMC Our Doctors scraping completed. Total doctors added: %s", total_doctors)
+        else:
+            logger.info("SKMC Our Doctors scraping stopped. Total doctors added: %s", total_doctors)
+        
+    except fetch.FetchError as e:
+        logger.error("Error fetching initial page %s: %s", base_url, e)
+        if 'writer' in locals():
+            writer.flush()
+    except Exception as e:
+        logger.error("Unexpected error during scraping: %s", e, exc_info=True)
+        if 'writer' in locals():
+            writer.flush()
\ No newline at end of file
@@ -0,0 +1,333 @@
+from bs4 import BeautifulSoup
+import logging
+from urllib.parse import urljoin
+import threading
+import functools
+import contextvars
+from collections import deque
+import re
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper.pagination import GONE_STATUSES
+from scraper import fetch
+from scraper import parsing
+
+logger = logging.getLogger(__name__)
+# Rate-limited diagnostics of the detail page parser
+diagnostics = Diagnostics(logger)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+    "Connection": "keep-alive",
+}
+
+BASE_URL = "https://skmc-seha.brahui.dev/doctor-detail/"
+# Discovery settings: first ID to fetch, how many consecutive missing IDs end a
+# dense range, and how many sparse probes are sent past it to look for a later range
+START_ID = 1
+MAX_CONSECUTIVE_MISSES = 100
+PROBE_STEPS = 4
+WORKER_COUNT = 10
+# Cheap pre-check on the raw HTML before parsing a detail page
+TAWAM_MARKER = re.compile(r"tawam", re.IGNORECASE)
+
+class IdSpace:
+    """
+    Work queue over the doctor-detail ID space.
+
+    IDs are handed out in ascending order, but only up to MAX_CONSECUTIVE_MISSES
+    past the highest ID that returned a page. When that run of misses is reached,
+    a few sparse probes are sent further out (doubling the distance each time);
+    a probe hit opens a new dense range around it, otherwise the crawl ends.
+    A failed download is not a miss: it widens the range by one instead, for
+    at most max_misses failures after a hit.
+    """
+
+    def __init__(self, start=START_ID, max_misses=MAX_CONSECUTIVE_MISSES, probe_steps=PROBE_STEPS):
+        self.max_misses = max_misses
+        self.probe_steps = probe_steps
+        self.hits = []
+        self._next_id = start
+        self._limit = start + max_misses
+        self._last_hit = start - 1
+        self._failures = 0
+        self._probes = deque()
+        self._probed = False
+        self._fetched = set()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def get(self):
+        """Return the next ID to fetch, or None once the ID space is exhausted."""
+        with self._cond:
+            while True:
+                while self._next_id < self._limit and self._next_id in self._fetched:
+                    self._next_id += 1
+                if self._next_id < self._limit:
+                    doctor_id = self._next_id
+                    self._next_id += 1
+                    return self._claim(doctor_id)
+                if self._in_flight > 0:
+                    self._cond.wait()
+                    continue
+                # Probes go out one at a time, nearest first, so a hit never skips an unscanned range
+                if self._probes:
+                    return self._claim(self._probes.popleft())
+                if self._probed:
+                    return None
+                self._probed = True
+                self._probes.extend(
+                    self._last_hit + self.max_misses * 2 ** step
+                    for step in range(1, self.probe_steps + 1)
+                    if self._last_hit + self.max_misses * 2 ** step >= self._limit
+                )
+                if self._probes:
+                    logger.info("No pages in IDs %s-%s, probing %s",
+                                self._last_hit + 1, self._limit - 1, list(self._probes))
+
+    def restore(self, visited):
+        """Resume an interrupted crawl from {doctor_id: found} of the IDs it visited, which are not handed out again."""
+        with self._cond:
+            self._fetched.update(visited)
+            for doctor_id, found in visited.items():
+                if found:
+                    self.hits.append(doctor_id)
+                    self._last_hit = max(self._last_hit, doctor_id)
+                    self._limit = max(self._limit, doctor_id + self.max_misses + 1)
+
+    def _claim(self, doctor_id):
+        self._fetched.add(doctor_id)
+        self._in_flight += 1
+        return doctor_id
+
+    def done(self, doctor_id, found, failed=False):
+        """
+        Record whether the page for doctor_id exists, extending the range on a
+        hit. A failed download tells neither, so it does not count as a miss.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            if failed:
+                if doctor_id < self._limit and self._failures < self.max_misses:
+                    self._failures += 1
+                    self._limit += 1
+            elif found:
+                self.hits.append(doctor_id)
+                if doctor_id >= self._limit:
+                    # Probe hit past the current range: skip the empty gap
+                    self._next_id = max(self._next_id, doctor_id - self.max_misses)
+                    self._probes.clear()
+                self._last_hit = max(self._last_hit, doctor_id)
+                self._limit = max(self._limit, doctor_id + self.max_misses + 1)
+                self._probed = False
+                self._failures = 0
+            self._cond.notify_all()
+
+    def ranges(self):
+        """Return the discovered IDs as a list of (first, last) contiguous ranges."""
+        ranges = []
+        for doctor_id in sorted(self.hits):
+            if ranges and doctor_id == ranges[-1][1] + 1:
+                ranges[-1][1] = doctor_id
+            else:
+                ranges.append([doctor_id, doctor_id])
+        return [tuple(r) for r in ranges]
+
+def fetch_doctor_page(url):
+    """Fetch a doctor detail page. Returns the final Response, or None if the request kept failing."""
+    try:
+        response = fetch.get(url, headers=HEADERS, timeout=30)
+    except fetch.FetchError as e:
+        logger.error("Failed to fetch %s: %s", url, e, exc_info=True)
+        return None
+    # The fetch engine already retried; a page that is still throttled or
+    # erroring counts as not downloaded, so its stored doctor is kept
+    if response.status_code in fetch.RETRY_STATUSES:
+        logger.warning("Status %s for %s after retries", response.status_code, url)
+        return None
+    return response
+
+def parse_doctor(html, url):
+    """Extract doctor information from a detail page if it contains 'Tawam Hospital, Abu Dhabi'."""
+    # Most detail pages belong to other hospitals; a page whose markup never
+    # mentions Tawam cannot pass the text check, so skip building its tree
+    if parsing.FAST_PARSE and not TAWAM_MARKER.search(html):
+        logger.info("Skipping %s. 'Tawam Hospital, Abu Dhabi' not found in text.", url)
+        return None
+    
+    soup = BeautifulSoup(html, 'lxml')
+    text = soup.get_text()
+    if not re.search(r"Tawam Hospital\s*,\s*Abu Dhabi", text, re.IGNORECASE):
+        logger.info("Skipping %s. 'Tawam Hospital, Abu Dhabi' not found in text.", url)
+        return None
+    
+    logger.info("Found doctor at Tawam Hospital, Abu Dhabi ...")
+    name_elem = soup.select_one('div.doctorSingleHeading h1')
+    name = name_elem.text.strip() if name_elem else ""
+    if not name or name == "N/A":
+        diagnostics.info("Skipping %s. Invalid name.", url, html=soup)
+        return None
+    
+    specialties = []
+    specialty_elem = soup.select_one('div.doctorSingleHeading h2')
+    if specialty_elem:
+        specialties.append(specialty_elem.text.strip())
+    
+    education_elems = soup.select('p.doctorEducation span')
+    for elem in education_elems:
+        specialty_text = elem.text.strip()
+        if specialty_text:
+            specialties.append(specialty_text)
+    
+    specialty = " ".join(specialties) if specialties else "N/A"
+    
+    img_elem = soup.select_one('div.doctorSingleImage img')
+    image_url = "N/A"
+    if img_elem:
+        src = img_elem.get('src', '')
+        data_src = img_elem.get('data-src', '')
+        data_lazy_src = img_elem.get('data-lazy-src', '')
+        
+        logger.debug("Image attributes for %s: src=%.50s, data-src=%.50s, data-lazy-src=%.50s", name, src, data_src, data_lazy_src)
+        
+        selected_src = src
+        if (not src or src.startswith('data:image') or src == ''):
+            selected_src = data_src or data_lazy_src or ''
+        
+        if selected_src and not selected_src.startswith('data:image'):
+            if selected_src.lower().endswith(('.jpg', '.jpeg', '.png')):
+                image_url = urljoin(url, selected_src)
+            else:
+                diagnostics.info("Invalid image extension for %s on %s. Src: %.50s...", name, url, selected_src, html=img_elem)
+        else:
+            diagnostics.info("No valid image source for %s on %s. Src: %.50s... Data-src: %.50s...", name, url, src, data_src, html=img_elem)
+    else:
+        diagnostics.info("No image element found for %s on %s.", name, url, html=soup)
+    
+    doctor = {
+        'name': name,
+        'specialty': specialty,
+        'location': "Tawam Hospital, Abu Dhabi",
+        'profile_url': url,
+        'image_url': image_url,
+        'source': url
+    }
+    logger.info("Extracted doctor: %s - %s - %s - %s", name, specialty, url, image_url)
+    return doctor
+
+def store_doctor(tracker, frontier, url, future):
+    """Validate the doctor parsed from a detail page and hand it to the page tracker."""
+    try:
+        doctor = future.result()
+    except Exception as e:
+        logger.error("Unexpected error parsing %s: %s", url, e, exc_info=True)
+        frontier.fail(url)
+        return
+    doctors = []
+    if doctor:
+        required_fields = ['name', 'specialty', 'location', 'profile_url', 'image_url', 'source']
+        missing_fields = [field for field in required_fields if field not in doctor or not doctor[field]]
+        if missing_fields:
+            logger.info("Skipping insertion for %s due to missing fields: %s. Doctor data: %s",
+                        doctor.get('name', 'Unknown'), missing_fields, doctor)
+        else:
+            doctors.append(doctor)
+            logger.info("Found doctor: %s - %s - %s", doctor['name'], doctor['specialty'], doctor['image_url'])
+    tracker.commit(url, doctors)
+    frontier.done(url, 200)
+
+def worker(space, stage, tracker, frontier):
+    """Worker function to download IDs from the shared IdSpace and hand changed doctor pages to the parsing stage."""
+    try:
+        while True:
+            doctor_id = space.get()
+            if doctor_id is None:
+                logger.info("Thread %s found no more IDs, exiting.", threading.current_thread().name)
+                break
+            if frontier.stopping:
+                # Not recorded in the frontier, so a resumed run fetches it
+                space.done(doctor_id, False)
+                logger.info("Thread %s stopping on request.", threading.current_thread().name)
+                break
+            
+            url = f"{BASE_URL}{doctor_id}"
+            found = failed = False
+            frontier.start(url)
+            try:
+                response = fetch_doctor_page(url)
+                if response is not None and response.status_code != 200 and response.status_code not in GONE_STATUSES:
+                    logger.warning("Status %s for %s", response.status_code, url)
+                    response = None
+                if response is None:
+                    # Download failed, which says nothing about the page: its stored
+                    # doctor is kept, it is not a miss, and the run is left incomplete
+                    failed = True
+                    frontier.fail(url)
+                    continue
+                found = response.status_code == 200
+                if not found:
+                    logger.info("Skipping %s. Status code: %s", url, response.status_code)
+                    frontier.done(url, response.status_code)
+                    continue
+                if tracker.unchanged(url, response.content):
+                    logger.info("Skipping unchanged page %s", url)
+                    frontier.done(url, response.status_code)
+                    continue
+                # Parsing happens in the parsing pool; this thread goes back to downloading.
+                # The page counts as done once its doctor is stored (store_doctor)
+                stage.submit(url, parse_doctor, response.text, url)
+            except Exception as e:
+                logger.error("Unexpected error in worker for URL %s: %s", url, e, exc_info=True)
+                failed = True
+                frontier.fail(url)
+            finally:
+                space.done(doctor_id, found, failed)
+    except Exception as e:
+        logger.error("Worker thread %s failed: %s", threading.current_thread().name, e, exc_info=True)
+
+def scrape():
+    """Main function to scrape doctor data from Tawam Hospital doctor detail pages, discovering the ID range as it goes."""
+    logger.info("Starting Tawam Hospital doctor scraping process")
+    
+    # Shared database writer, incremental page tracker and work queue over the doctor ID space
+    try:
+        writer = get_writer()
+        tracker = PageTracker("tawam", writer, single_record=True)
+        frontier = Frontier(tracker)
+    except Exception as e:
+        logger.error("Failed to initialize database: %s", e, exc_info=True)
+        return
+    space = IdSpace()
+    if frontier.resumed:
+        # IDs an interrupted run already visited are not fetched again
+        space.restore({
+            int(url[len(BASE_URL):]): result == 200 for url, result in frontier.done_urls().items()
+        })
+    stage = parsing.ParseStage(functools.partial(store_doctor, tracker, frontier))
+    
+    # Start worker threads
+    threads = []
+    for i in range(WORKER_COUNT):
+        # Each thread runs in a copy of this context, so its requests are attributed to this scraper
+        context = contextvars.copy_context()
+        t = threading.Thread(target=context.run, args=(worker, space, stage, tracker, frontier), name=f"Worker-{i+1}")
+        t.start()
+        threads.append(t)
+        logger.info("Started thread %s", t.name)
+    
+    # Wait for all threads to finish
+    for t in threads:
+        t.join()
+        logger.info("Thread %s has joined.", t.name)
+    
+    # Wait for the pages still being parsed
+    stage.join()
+    complete = frontier.finish()
+    ranges = ", ".join(f"{first}-{last}" if first != last else f"{first}" for first, last in space.ranges())
+    logger.info("Discovered %s doctor pages in ID ranges: %s", len(space.hits), ranges or 'none')
+    if complete:
+        logger.info("Tawam Hospital doctor scraping completed.")
+    else:
+        logger.info("Tawam Hospital doctor scraping stopped; the next run resumes where it left off.")
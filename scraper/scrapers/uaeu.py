@@ -0,0 +1,136 @@
+import logging
+from scraper.database import get_writer
+from scraper.frontier import Frontier
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper import fetch
+from scraper import parsing
+from scraper.parsing import listing_soup, class_strainer
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+# Rate-limited warnings of the per-doctor loop
+diagnostics = Diagnostics(logger)
+
+# Elements of the page that hold the doctor listing, for fast parsing
+LISTING = class_strainer(None, 'spotlight-list')
+
+# Returned by extract_doctors for a page that could not be loaded or parsed
+_FAILED = object()
+
+def parse_doctors(content, team_url, specialty):
+    """Parse person information out of the HTML of a UAEU Spotlights page."""
+    soup = listing_soup(content, 'html.parser', LISTING)
+    spotlight_list = soup.select('.spotlight-list .list-item')
+    
+    persons_data = []
+    base_url = "https://www.uaeu.ac.ae"
+    for item in spotlight_list:
+        try:
+            # Extract name
+            name_elem = item.select_one('h6')
+            name = name_elem.text.strip().replace('[...]', '') if name_elem else "N/A"
+            
+            # Extract profile URL
+            profile_link = item.select_one('a.main-video-element')
+            profile_url = urljoin(base_url, profile_link['href']) if profile_link and profile_link.get('href') else "N/A"
+            
+            # Extract image URL
+            img_elem = item.select_one('.video-hi img')
+            image_url = urljoin(base_url, img_elem['src']) if img_elem and img_elem.get('src') else "N/A"
+            
+            # Hardcoded location
+            location = "Al Ain, UAE"
+            
+            if name != "N/A":
+                persons_data.append({
+                    'name': name,
+                    'specialty': specialty,
+                    'location': location,
+                    'profile_url': profile_url,
+                    'image_url': image_url,
+                    'source': team_url
+                })
+            else:
+                diagnostics.warning("Skipping person with missing name at %s.", team_url, html=item)
+        
+        except Exception as e:
+            diagnostics.warning("Error parsing item in %s: %s", team_url, e, html=item)
+            continue
+    
+    logger.info("Extracted %s persons from %s", len(persons_data), team_url)
+    return persons_data
+
+def extract_doctors(team_url, specialty, tracker=None):
+    """Extract person information from a UAEU Spotlights page."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    
+    try:
+        response = fetch.get(team_url, headers=headers, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch page %s. Status code: %s", team_url, response.status_code)
+            return _FAILED
+        
+        if tracker is not None and tracker.unchanged(team_url, response.content):
+            logger.info("Skipping unchanged page %s", team_url)
+            return None
+        
+        return parsing.parse(parse_doctors, response.content, team_url, specialty)
+        
+    except fetch.FetchError as e:
+        logger.error("Error extracting persons from %s: %s", team_url, e)
+        return _FAILED
+    except Exception as e:
+        logger.error("Error parsing persons from %s: %s", team_url, e, exc_info=True)
+        return _FAILED
+
+def scrape():
+    """Main function to scrape person data from UAEU Spotlights pages."""
+    pages = [
+        {"url": "https://www.uaeu.ac.ae/en/spotlights/index.shtml", "specialty": "Faculty"},
+        {"url": "https://www.uaeu.ac.ae/en/spotlights/alumni_spotlight.shtml", "specialty": "Alumni"}
+    ]
+    logger.info("Starting UAEU Spotlights scraping process")
+    
+    # Shared database writer and incremental page tracker
+    writer = get_writer()
+    tracker = PageTracker("uaeu", writer)
+    # Pages already scraped by an interrupted run are not fetched again
+    frontier = Frontier(tracker)
+    frontier.add([page['url'] for page in pages])
+    
+    total_persons = 0
+    for page in pages:
+        if frontier.stopping:
+            logger.info("Stop requested; leaving the remaining pages for the next run.")
+            break
+        if frontier.is_done(page['url']):
+            logger.info("Skipping %s: already scraped by the interrupted run", page['url'])
+            continue
+        logger.info("Scraping %s as %s", page['url'], page['specialty'])
+        frontier.start(page['url'])
+        # Extract persons from the page
+        persons = extract_doctors(page['url'], page['specialty'], tracker)
+        
+        if persons is _FAILED:
+            # Its stored doctors are kept, and the next run tries it again
+            frontier.fail(page['url'])
+            continue
+        if persons is None:
+            frontier.done(page['url'])
+            continue
+        if not persons:
+            logger.warning("No persons found at %s. Continuing to next page.", page['url'])
+        
+        # Hand persons to the tracker, which writes only what changed
+        tracker.commit(page['url'], persons)
+        frontier.done(page['url'])
+        total_persons += len(persons)
+    
+    if frontier.finish():
+        logger.info("UAEU Spotlights scraping completed. Total persons added: %s", total_persons)
+    else:
+        logger.info("UAEU Spotlights scraping stopped. Total persons added: %s", total_persons)
\ No newline at end of file
@@ -0,0 +1,105 @@
+import time
+import logging
+from scraper.database import get_writer
+from scraper.incremental import PageTracker
+from scraper.logs import Diagnostics
+from scraper import fetch
+from scraper import parsing
+from scraper.parsing import listing_soup, class_strainer
+
+logger = logging.getLogger(__name__)
+# Rate-limited warnings of the per-doctor loop
+diagnostics = Diagnostics(logger)
+
+# Elements of the page that hold the doctor listing, for fast parsing
+LISTING = class_strainer(None, 'team-listing_item')
+
+def parse_doctors(content, team_url):
+    """Parse doctor information out of the HTML of the Wellness team page."""
+    soup = listing_soup(content, 'html.parser', LISTING)
+    doctor_items = soup.select('.team-listing_item')
+    
+    doctors_data = []
+    for item in doctor_items:
+        # Extract name
+        name_elem = item.select_one('.team-listing_name a')
+        name = name_elem.text.strip() if name_elem else "N/A"
+        
+        # Extract specialty
+        specialty_elem = item.select_one('.team-meta_item.position')
+        specialty = specialty_elem.text.strip() if specialty_elem else "N/A"
+        
+        # Extract profile URL
+        profile_link = item.select_one('.team-listing_name a') or item.select_one('.team-listing_photo a')
+        profile_url = profile_link['href'] if profile_link and profile_link.get('href') else "N/A"
+        
+        # Extract image URL from data-lazy-src (for lazy-loaded images)
+        img_elem = item.select_one('.team-listing_photo img')
+        image_url = img_elem.get('data-lazy-src', 'N/A') if img_elem else "N/A"
+        
+        # Hardcoded location
+        location = "Wellness One Day Surgery Center, Al Dhafrah"
+        
+        if name != "N/A":
+            doctors_data.append({
+                'name': name,
+                'specialty': specialty,
+                'location': location,
+                'profile_url': profile_url,
+                'image_url': image_url,
+                'source': team_url
+            })
+        else:
+            diagnostics.warning("Skipping doctor with missing name at %s.", team_url, html=item)
+        
+    logger.info("Extracted %s doctors from %s", len(doctors_data), team_url)
+    return doctors_data
+
+def extract_doctors(team_url, tracker=None):
+    """Extract doctor information from the Wellness team page."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/134.0.0.0 Safari/537.36",
+        "Connection": "keep-alive",
+    }
+    
+    try:
+        response = fetch.get(team_url, headers=headers, timeout=30)
+        if response.status_code != 200:
+            logger.error("Failed to fetch team page %s. Status code: %s", team_url, response.status_code)
+            return []
+        
+        if tracker is not None and tracker.unchanged(team_url, response.content):
+            logger.info("Skipping unchanged page %s", team_url)
+            return None
+        
+        return parsing.parse(parse_doctors, response.content, team_url)
+        
+    except fetch.FetchError as e:
+        logger.error("Error extracting doctors from %s: %s", team_url, e)
+        return []
+
+def scrape():
+    """Main function to scrape doctor data from the Wellness team page."""
+    team_url = "https://www.wellnesssurgerycenter.com/team/"
+    logger.info("Starting Wellness One Day Surgery Center scraping process")
+    
+    # Shared database writer and incremental page tracker
+    writer = get_writer()
+    tracker = PageTracker("wellness", writer)
+    
+    # Extract doctors from the team page
+    doctors = extract_doctors(team_url, tracker)
+    
+    if doctors is None:
+        tracker.finish()
+        return
+    if not doctors:
+        logger.error("No doctors found. Aborting scrape.")
+        return
+    
+    # Hand doctors to the tracker, which writes only what changed
+    tracker.commit(team_url, doctors)
+    total_doctors = len(doctors)
+    
+    tracker.finish()
+    logger.info("Wellness One Day Surgery Center scraping completed. Total doctors added: %s", total_doctors)
\ No newline at end of file
@@ -0,0 +1,100 @@
+# scraper/search.py
+import logging
+from array import array
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "doctors_search"
+# Indexed doctor fields and their bm25 weights (a match in the name ranks highest)
+SEARCH_FIELDS = ('name', 'specialty', 'location', 'source')
+WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+# Arabic spelling variants folded to one form before indexing and before
+# querying, so "احمد" finds "أحمد" and vowel marks never split a word. Case
+# and Latin accents are folded by the unicode61 tokenizer itself. The sync
+# triggers apply this as nested replace() calls, which SQLite's parser only
+# allows to a limited depth, so keep the list short.
+FOLDING = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ة": "ه",
+    # Tatweel and harakat
+    "\u0640": "", "\u064b": "", "\u064c": "", "\u064d": "", "\u064e": "",
+    "\u064f": "", "\u0650": "", "\u0651": "", "\u0652": "",
+}
+_TRANSLATION = str.maketrans(FOLDING)
+
+
+def normalize(text):
+    """Fold Arabic spelling variants the way the search index does."""
+    return text.translate(_TRANSLATION)
+
+
+def _fold_sql(expression):
+    """SQL expression applying FOLDING to expression, for the sync triggers."""
+    for source, target in FOLDING.items():
+        expression = f"replace({expression}, '{source}', '{target}')"
+    return expression
+
+
+def create_index(cursor):
+    """
+    Create the full-text index over the doctors table and the triggers that
+    keep it in sync; fill it from the existing rows when it is new.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+    ).fetchone()
+    if exists:
+        return
+    columns = ", ".join(SEARCH_FIELDS)
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        {columns},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+        )
+    """)
+    new_values = ", ".join(_fold_sql(f"coalesce(new.{field}, '')") for field in SEARCH_FIELDS)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS doctors_search_insert AFTER INSERT ON doctors BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS doctors_search_delete AFTER DELETE ON doctors BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS doctors_search_update AFTER UPDATE ON doctors BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    """)
+    row_values = ", ".join(_fold_sql(f"coalesce({field}, '')") for field in SEARCH_FIELDS)
+    cursor.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) SELECT id, {row_values} FROM doctors")
+    logger.info(f"Built the doctor search index ({cursor.rowcount} rows)")
+
+
+def match_query(text):
+    """
+    FTS5 query matching every word of text as a prefix, or None for blank text.
+    """
+    # Words without a letter or digit would make an empty, invalid phrase
+    words = [word for word in normalize(text).split() if any(char.isalnum() for char in word)]
+    if not words:
+        return None
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in words)
+
+
+def search(conn, text):
+    """Ids of the doctors matching text, best match first, as an array."""
+    query = match_query(text)
+    if query is None:
+        return array('q')
+    weights = ", ".join(str(weight) for weight in WEIGHTS)
+    rows = conn.execute(
+        f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH ? ORDER BY bm25({SEARCH_TABLE}, {weights})",
+        (query,)
+    )
+    return array('q', (row[0] for row in rows))
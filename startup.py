@@ -0,0 +1,47 @@
+import json
+import logging
+import os
+import time
+
+# Wall-clock time the app started; main.py and display.py import this module first
+STARTED = time.time()
+
+# When set to a file path, a JSON line with the startup timings is appended to
+# it once the window has painted, and the app quits (see bench/startup.py)
+TIMING_ENV = "SCRAPER_STARTUP_TIMING"
+
+logger = logging.getLogger(__name__)
+
+
+def track_first_paint(app, window, name):
+    """Log the time from start to the first paint of window."""
+    from PyQt5.QtCore import QEvent, QObject, QTimer
+
+    shown = time.time()
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and obj.isWidgetType() and obj.window() is window:
+                app.removeEventFilter(self)
+                # Report once the paint has been handled
+                QTimer.singleShot(0, lambda: report(time.time()))
+            return False
+
+    def report(painted):
+        timings = {
+            "app": name,
+            "startup_ms": round((painted - STARTED) * 1000, 1),
+            "window_ms": round((shown - STARTED) * 1000, 1),
+            "paint_ms": round((painted - shown) * 1000, 1),
+            "started": STARTED,
+            "painted": painted,
+        }
+        logger.info(f"{name} painted its window {timings['startup_ms']:.0f} ms after start")
+        path = os.environ.get(TIMING_ENV)
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(timings) + "\n")
+            app.quit()
+
+    window._first_paint_filter = FirstPaint()
+    app.installEventFilter(window._first_paint_filter)
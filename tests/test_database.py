@@ -0,0 +1,37 @@
+import pytest
+
+from scraper import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database.Database, "DB_PATH", str(tmp_path / "doctors.db"))
+    db = database.Database()
+    yield db
+    db.close()
+
+
+def doctor(name):
+    return {
+        'name': name, 'specialty': "Cardiology", 'location': "Dubai",
+        'profile_url': f"https://example.com/{name}", 'image_url': "N/A", 'source': "https://example.com/",
+    }
+
+
+def names(db):
+    return sorted(row[0] for row in db.conn.execute("SELECT name FROM doctors"))
+
+
+def test_empty_listing_page_keeps_its_doctors_but_stores_the_new_hash(db):
+    db.apply_page("site", "https://example.com/", "first", [doctor("a"), doctor("b")])
+    assert db.apply_page("site", "https://example.com/", "empty", []) == ([], [], [])
+    assert names(db) == ["a", "b"]
+    assert db.page_hashes("site") == {"https://example.com/": "empty"}
+
+
+def test_empty_detail_page_removes_its_doctor(db):
+    db.apply_page("site", "https://example.com/a", "first", [doctor("a")], single_record=True)
+    db.apply_page("site", "https://example.com/b", "first", [doctor("b")], single_record=True)
+    assert db.apply_page("site", "https://example.com/a", "empty", [], single_record=True) == ([], [], ["a"])
+    assert names(db) == ["b"]
+    assert db.page_hashes("site")["https://example.com/a"] == "empty"
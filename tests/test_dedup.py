@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from scraper import dedup
+
+
+def doctor(name, specialty):
+    return dedup.name_tokens(name), dedup.specialty_key(specialty)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Mohammed Ali", "Muhammad Ali"),
+    ("Dr. Mohamed Ali", "Mohammad Ali"),
+    ("Omar Saleh", "Umar Saleh"),
+    ("Hamid Saleh", "Hamed Saleh"),
+    ("Abdul Rahman Al Hashimi", "Abdulrahman Hashimi"),
+])
+def test_spellings_of_one_name_match(first, second):
+    assert dedup.is_match(doctor(first, "Cardiology"), doctor(second, "Consultant Cardiology"))
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Mahmoud Ali", "Mohammed Ali"),
+    ("Hamad Saleh", "Hamid Saleh"),
+    ("Omar Khan", "Amr Khan"),
+    ("Amr Khan", "Amir Khan"),
+    ("Amir Khan", "Umar Khan"),
+])
+def test_names_that_differ_in_vowels_do_not_match(first, second):
+    assert not dedup.is_match(doctor(first, "Cardiology"), doctor(second, "Cardiology"))
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Consultant Cardiology", "Consultant Dermatology"),
+    ("Specialist Pediatrics", "Specialist Urology"),
+    ("Internal Medicine", "Family Medicine"),
+    ("Orthopedic Surgery", "Plastic Surgery"),
+])
+def test_shared_title_words_do_not_make_specialties_compatible(first, second):
+    assert not dedup.is_match(doctor("Mohammed Ali", first), doctor("Mohammed Ali", second))
+
+
+def test_same_specialty_in_other_words_matches():
+    assert dedup.is_match(doctor("Mohammed Ali", "Orthopedic Surgery"), doctor("Muhammad Ali", "Orthopaedics Consultant"))
+
+
+def clusters(rows):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE doctors (id INTEGER PRIMARY KEY, name TEXT, specialty TEXT)")
+    conn.executemany("INSERT INTO doctors (id, name, specialty) VALUES (?, ?, ?)", rows)
+    dedup.update_clusters(conn)
+    return dict(conn.execute(f"SELECT doctor_id, cluster_id FROM {dedup.CLUSTER_TABLE}"))
+
+
+def test_cluster_keeps_different_doctors_apart():
+    assigned = clusters([
+        (1, "Mahmoud Ali", "Consultant Cardiology"),
+        (2, "Mohammed Ali", "Consultant Dermatology"),
+        (3, "Mohammed Ali", "Consultant Cardiology"),
+    ])
+    assert len(set(assigned.values())) == 3
+
+
+def test_cluster_joins_spellings_of_one_doctor():
+    assigned = clusters([
+        (1, "Dr. Mohammed Ali", "Consultant Cardiology"),
+        (2, "Muhammad Ali", "Cardiologist, Cardiology"),
+        (3, "Mohamed Ali", None),
+    ])
+    assert set(assigned.values()) == {1}
@@ -0,0 +1,50 @@
+import pytest
+
+from scraper import database, facets
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database.Database, "DB_PATH", str(tmp_path / "doctors.db"))
+    db = database.Database()
+    yield db
+    db.close()
+
+
+def store(db, scraper, page_url, location, specialty="Cardiology"):
+    db.apply_page(scraper, page_url, "hash", [{
+        'name': "Dr. Test", 'specialty': specialty, 'location': location,
+        'profile_url': page_url, 'image_url': "N/A", 'source': page_url,
+    }])
+
+
+def values(db, facet):
+    return {name: doctors for _, name, doctors in facets.facet_counts(db.conn, facet)}
+
+
+def test_source_is_the_scraper_not_the_page_url(db):
+    for doctor_id in range(3):
+        store(db, "tawam", f"https://tawam.example/doctor-detail/{doctor_id}", "Tawam Hospital, Abu Dhabi")
+    store(db, "skmc", "https://skmc.example/doctors?page=1", "Sheikh Khalifa Medical City, Al Markaziyah")
+    assert values(db, 'source') == {"Tawam Hospital": 3, "skmca.ae": 1}
+
+
+@pytest.mark.parametrize("location, city", [
+    ("Tawam Hospital, Abu Dhabi", "Al Ain"),
+    ("Sheikh Khalifa Medical City (SKMC) Hospital, Al Markaziyah", "Abu Dhabi"),
+    ("Harley Street Medical Center", "Abu Dhabi"),
+    ("Gargash Hospital - Umm Suqaim", "Dubai"),
+    ("Clinic 4, Al Ain, UAE", "Al Ain"),
+    ("Somewhere else", facets.UNKNOWN),
+])
+def test_hospital_city_wins_over_city_named_in_location(db, location, city):
+    store(db, "tawam", "https://tawam.example/doctor-detail/1", location)
+    assert values(db, 'city') == {city: 1}
+
+
+def test_existing_rows_are_filed_when_the_facets_are_rebuilt(db):
+    store(db, "tawam", "https://tawam.example/doctor-detail/1", "Tawam Hospital, Abu Dhabi")
+    facets._drop(db.cursor)
+    facets.create_schema(db.cursor)
+    assert values(db, 'source') == {"Tawam Hospital": 1}
+    assert values(db, 'city') == {"Al Ain": 1}